@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Check that agent runs stop calling the model and tools once their client disconnects, and that
+a dropped stream can be resumed without a new model call.
+
+Each scenario starts `benchmarks/stub_llm.py` and `benchmarks/serve_stubbed_app.py`, starts a
+run on `/v1/agents/{agent_id}/runs`, drops the connection and then watches the stub's counters:
+the run passes when the stub's streams are closed within `--max-stop-seconds` and no further
+completion (i.e. no model call after a tool call) arrives in the following `--observe-seconds`.
+The app runs with STREAM_RESUME_GRACE_SECONDS=0 so abandoned streamed runs are cancelled at once.
+
+- `mid_stream`: disconnect after the first streamed content chunk.
+- `during_tool_call`: the stub answers with a tool call; disconnect while the (slow) tool runs.
+- `during_tool_call_blocking`: as above, for a non-streaming run.
+- `resume`: disconnect after the first content chunk, then resume from its Last-Event-ID; passes
+  when the resumed stream continues with the next event id, ends with [DONE] and the stub served
+  a single completion.
+
+Exits with status 1 if any scenario fails.
+Usage:
+    python benchmarks/disconnect_cancellation.py [--agent-id web_agent] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from load_test import _free_port, _wait_until_up
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+SCENARIOS = {
+    "mid_stream": {"stream": True, "tool_calls": False},
+    "during_tool_call": {"stream": True, "tool_calls": True},
+    "during_tool_call_blocking": {"stream": False, "tool_calls": True},
+    "resume": {"stream": True, "tool_calls": False, "resume": True},
+}
+
+
+async def _start_and_drop_run(
+    base_url: str, agent_id: str, stream: bool, disconnect_after: float
+) -> Tuple[Optional[str], Optional[int]]:
+    """Start a run and drop it; return its request id and the last event id received, if streamed."""
+    payload = {"message": "What is the latest news on open source AI?", "stream": stream, "session_id": "disconnect"}
+    url = f"{base_url}/v1/agents/{agent_id}/runs"
+    async with httpx.AsyncClient(timeout=disconnect_after if not stream else 60) as client:
+        if not stream:
+            try:
+                await client.post(url, json=payload)
+            except httpx.TimeoutException:
+                pass
+            return None, None
+
+        start = time.monotonic()
+        last_event_id = None
+        async with client.stream("POST", url, json=payload) as response:
+            response.raise_for_status()
+            request_id = response.headers["X-Request-Id"]
+            lines = response.aiter_lines()
+            while time.monotonic() - start < disconnect_after:
+                try:
+                    line = await asyncio.wait_for(lines.__anext__(), disconnect_after)
+                except (asyncio.TimeoutError, StopAsyncIteration):
+                    break
+                if line.startswith("id: "):
+                    last_event_id = int(line[4:])
+                if line.startswith("data: ") and '"content": "tok' in line:
+                    break
+        # Leaving the context manager closes the connection mid-stream
+        return request_id, last_event_id
+
+
+async def _resume_run(base_url: str, agent_id: str, request_id: str, last_event_id: int) -> Dict[str, Any]:
+    url = f"{base_url}/v1/agents/{agent_id}/runs/{request_id}/stream"
+    event_ids: List[int] = []
+    done = False
+    async with httpx.AsyncClient(timeout=120) as client:
+        async with client.stream("GET", url, headers={"Last-Event-ID": str(last_event_id)}) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.startswith("id: "):
+                    event_ids.append(int(line[4:]))
+                done = done or line == "data: [DONE]"
+    contiguous = event_ids == list(range(last_event_id + 1, last_event_id + 1 + len(event_ids)))
+    return {"resumed_events": len(event_ids), "contiguous": contiguous and bool(event_ids), "done": done}
+
+
+async def run_scenario(name: str, args: argparse.Namespace) -> Dict[str, Any]:
+    config = SCENARIOS[name]
+    llm_port, app_port = _free_port(), _free_port()
+    env = {
+        **os.environ,
+        "LLM_BASE_URL": f"http://127.0.0.1:{llm_port}/v1",
+        "OPENAI_API_KEY": "stub",
+        "STREAM_RESUME_GRACE_SECONDS": "15" if config.get("resume") else "0",
+    }
+    stub_args = ["--tokens-per-second=5", "--response-tokens=200", "--first-token-ms=200"]
+    if config["tool_calls"]:
+        stub_args.append("--tool-calls")
+    processes = [
+        subprocess.Popen(
+            [sys.executable, os.path.join(script_dir, "stub_llm.py"), f"--port={llm_port}", *stub_args], env=env
+        ),
+        subprocess.Popen(
+            [
+                sys.executable,
+                os.path.join(script_dir, "serve_stubbed_app.py"),
+                f"--port={app_port}",
+                f"--tool-latency-ms={args.tool_latency_ms}",
+            ],
+            env=env,
+        ),
+    ]
+    stats_url = f"http://127.0.0.1:{llm_port}/stats"
+    try:
+        await _wait_until_up(stats_url)
+        base_url = f"http://127.0.0.1:{app_port}"
+        await _wait_until_up(f"{base_url}/v1/health")
+
+        request_id, last_event_id = await _start_and_drop_run(
+            base_url, args.agent_id, config["stream"], args.disconnect_after
+        )
+        if config.get("resume"):
+            resumed = await _resume_run(base_url, args.agent_id, request_id, last_event_id)
+            async with httpx.AsyncClient() as client:
+                stub_stats = (await client.get(stats_url)).json()
+            return {
+                "scenario": name,
+                "passed": resumed["contiguous"] and resumed["done"] and stub_stats["chat_completions"] == 1,
+                **resumed,
+                "stub_stats": stub_stats,
+            }
+
+        disconnected_at = time.monotonic()
+        async with httpx.AsyncClient() as client:
+            at_disconnect = (await client.get(stats_url)).json()
+            streams_closed_after = None
+            while time.monotonic() - disconnected_at < args.observe_seconds:
+                stats = (await client.get(stats_url)).json()
+                if streams_closed_after is None and stats["active_streams"] == 0:
+                    streams_closed_after = time.monotonic() - disconnected_at
+                await asyncio.sleep(0.1)
+            final = (await client.get(stats_url)).json()
+            app_runs = (await client.get(f"{base_url}/v1/metrics")).json()["runs"]
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=30)
+
+    completions_after = final["chat_completions"] - at_disconnect["chat_completions"]
+    passed = (
+        streams_closed_after is not None and streams_closed_after <= args.max_stop_seconds and completions_after == 0
+    )
+    return {
+        "scenario": name,
+        "passed": passed,
+        "streams_closed_after_s": round(streams_closed_after, 3) if streams_closed_after is not None else None,
+        "completions_after_disconnect": completions_after,
+        "tool_calls_requested": final["tool_calls"],
+        "stub_stats": final,
+        "app_runs": app_runs,
+    }
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    results = []
+    for name in args.scenarios:
+        result = await run_scenario(name, args)
+        print(json.dumps(result), flush=True)
+        results.append(result)
+    return {"config": vars(args), "scenarios": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that runs are cancelled when their client disconnects.")
+    parser.add_argument("--agent-id", default="web_agent")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--disconnect-after", type=float, default=1.0)
+    parser.add_argument("--tool-latency-ms", type=float, default=3000.0)
+    parser.add_argument("--max-stop-seconds", type=float, default=2.0)
+    parser.add_argument("--observe-seconds", type=float, default=6.0)
+    parser.add_argument("--output", help="Optional path to write the JSON results.")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    sys.exit(0 if all(r["passed"] for r in results["scenarios"]) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Load-test the `/v1/agents/{agent_id}/runs` path against a stub LLM and stub tools.
+
+Starts `benchmarks/stub_llm.py` and `benchmarks/serve_stubbed_app.py` as subprocesses, drives
+streaming and non-streaming runs at the requested concurrency, and reports latency percentiles,
+time-to-first-token, throughput and Postgres connection usage as JSON.
+Requires DATABASE_URL to point at a local Postgres.
+Usage:
+    python benchmarks/load_test.py [--agent-id web_agent] [--concurrency 10] [--requests 100]
+                                   [--mode both] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+from sqlalchemy import create_engine, text
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "mean": None}
+    ordered = sorted(values)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "mean": round(statistics.fmean(ordered), 2)}
+
+
+async def _wait_until_up(url: str, timeout: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+class DbConnectionSampler:
+    """Samples the number of Postgres backends connected to the benchmark database."""
+
+    def __init__(self, db_url: str, interval: float = 0.1):
+        self.engine = create_engine(db_url, pool_size=1)
+        self.interval = interval
+        self.samples: List[int] = []
+
+    def _sample(self) -> int:
+        with self.engine.connect() as conn:
+            count = conn.execute(
+                text("SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()")
+            ).scalar_one()
+        # Exclude the sampler's own connection
+        return int(count) - 1
+
+    async def run(self, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            self.samples.append(await asyncio.to_thread(self._sample))
+            try:
+                await asyncio.wait_for(stop.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def summary(self) -> Dict[str, Any]:
+        if not self.samples:
+            return {"max": None, "mean": None}
+        return {"max": max(self.samples), "mean": round(statistics.fmean(self.samples), 2)}
+
+
+async def _one_run(client: httpx.AsyncClient, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    ttft = None
+    try:
+        if payload["stream"]:
+            async with client.stream("POST", url, json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if ttft is None and line.startswith("data: ") and line != "data: [DONE]":
+                        delta = json.loads(line[6:])["choices"][0]["delta"]
+                        if delta.get("content"):
+                            ttft = (time.perf_counter() - start) * 1000
+        else:
+            response = await client.post(url, json=payload)
+            response.raise_for_status()
+        return {"ok": True, "latency_ms": (time.perf_counter() - start) * 1000, "ttft_ms": ttft}
+    except Exception as e:
+        return {"ok": False, "latency_ms": (time.perf_counter() - start) * 1000, "ttft_ms": None, "error": str(e)}
+
+
+async def run_scenario(
+    base_url: str, agent_id: str, stream: bool, concurrency: int, total: int, db_url: str, message: str
+) -> Dict[str, Any]:
+    url = f"{base_url}/v1/agents/{agent_id}/runs"
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+    results: List[Dict[str, Any]] = []
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            payload = {
+                "message": message,
+                "stream": stream,
+                "user_id": f"bench-user-{i % concurrency}",
+                "session_id": f"bench-session-{i}",
+            }
+            results.append(await _one_run(client, url, payload))
+
+    sampler = DbConnectionSampler(db_url)
+    stop = asyncio.Event()
+    sampler_task = asyncio.create_task(sampler.run(stop))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    start = time.perf_counter()
+    async with httpx.AsyncClient(timeout=300, limits=limits) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await sampler_task
+
+    ok = [r for r in results if r["ok"]]
+    return {
+        "mode": "stream" if stream else "non_stream",
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": total - len(ok),
+        "sample_errors": [r["error"] for r in results if not r["ok"]][:5],
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 3) if elapsed else None,
+        "latency_ms": _percentiles([r["latency_ms"] for r in ok]),
+        "ttft_ms": _percentiles([r["ttft_ms"] for r in ok if r["ttft_ms"] is not None]),
+        "db_connections": sampler.summary(),
+    }
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    db_url = os.environ["DATABASE_URL"]
+    llm_port, app_port = _free_port(), _free_port()
+    env = {**os.environ, "LLM_BASE_URL": f"http://127.0.0.1:{llm_port}/v1", "OPENAI_API_KEY": "stub"}
+    processes = [
+        subprocess.Popen(
+            [
+                sys.executable,
+                os.path.join(script_dir, "stub_llm.py"),
+                f"--port={llm_port}",
+                f"--tokens-per-second={args.tokens_per_second}",
+                f"--first-token-ms={args.first_token_ms}",
+                f"--response-tokens={args.response_tokens}",
+            ],
+            env=env,
+        ),
+        subprocess.Popen(
+            [
+                sys.executable,
+                os.path.join(script_dir, "serve_stubbed_app.py"),
+                f"--port={app_port}",
+                f"--tool-latency-ms={args.tool_latency_ms}",
+            ],
+            env=env,
+        ),
+    ]
+    try:
+        await _wait_until_up(f"http://127.0.0.1:{llm_port}/stats")
+        base_url = f"http://127.0.0.1:{app_port}"
+        await _wait_until_up(f"{base_url}/v1/health")
+
+        modes = {"stream": [True], "non_stream": [False], "both": [True, False]}[args.mode]
+        scenarios = []
+        for stream in modes:
+            scenario = await run_scenario(
+                base_url, args.agent_id, stream, args.concurrency, args.requests, db_url, args.message
+            )
+            print(json.dumps(scenario), flush=True)
+            scenarios.append(scenario)
+
+        async with httpx.AsyncClient() as client:
+            app_metrics = (await client.get(f"{base_url}/v1/metrics")).json()
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=30)
+
+    return {"config": vars(args), "scenarios": scenarios, "app_metrics": app_metrics}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the agent runs endpoint with stub dependencies.")
+    parser.add_argument("--agent-id", default="web_agent")
+    parser.add_argument("--message", default="Summarize the latest news about open source AI.")
+    parser.add_argument("--mode", choices=["stream", "non_stream", "both"], default="both")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--first-token-ms", type=float, default=300.0)
+    parser.add_argument("--response-tokens", type=int, default=100)
+    parser.add_argument("--tool-latency-ms", type=float, default=200.0)
+    parser.add_argument("--output", help="Optional path to write the JSON results.")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark user-memory prompt size and retrieval latency against memory count.
+
+Seeds synthetic memories (spread over several years, with deterministic fake embeddings) into a
+scratch table and compares loading every memory with the bounded "recency" and "vector" reads.
+Requires DATABASE_URL to point at a Postgres with the pgvector extension.
+Usage:
+    python benchmarks/memory_retrieval.py [--counts 100 1000 10000] [--limit 20] [--output results.json]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, os.pardir))
+sys.path.insert(0, os.path.join(project_root, "src"))
+
+from agno.embedder.base import Embedder  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from db.session import db_engine  # noqa: E402
+from memory.db import IndexedPostgresMemoryDb  # noqa: E402
+from memory.settings import memory_settings  # noqa: E402
+
+TOPICS = ["travel", "food", "work", "family", "finance", "health", "music", "sports", "books", "tech"]
+
+
+class HashEmbedder(Embedder):
+    """Deterministic offline embedder: a pseudo-random unit vector seeded by the text."""
+
+    def get_embedding(self, text: str) -> List[float]:
+        rng = random.Random(hashlib.sha256(text.encode()).digest())
+        vector = [rng.gauss(0, 1) for _ in range(self.dimensions or memory_settings.embedding_dimensions)]
+        norm = sum(v * v for v in vector) ** 0.5
+        return [v / norm for v in vector]
+
+
+def seed(db: IndexedPostgresMemoryDb, user_id: str, count: int) -> None:
+    now = datetime.now(timezone.utc)
+    rows: List[Dict[str, Any]] = []
+    for i in range(count):
+        topic = TOPICS[i % len(TOPICS)]
+        text = f"The user mentioned a {topic} detail number {i}: they prefer option {i % 7} when it comes to {topic}."
+        rows.append(
+            {
+                "id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "memory": {"memory": text, "topics": [topic]},
+                "embedding": db.embedder.get_embedding(text),  # type: ignore
+                "created_at": now - timedelta(days=random.uniform(0, 3 * 365)),
+            }
+        )
+    with db.Session() as sess, sess.begin():
+        for start in range(0, len(rows), 1000):
+            sess.execute(insert(db.table), rows[start : start + 1000])
+
+
+def prompt_size(memories: List[str]) -> Dict[str, int]:
+    text = "".join(f"\n- {m}" for m in memories)
+    # ~4 characters per token is a good approximation for English text
+    return {"chars": len(text), "approx_tokens": len(text) // 4}
+
+
+def measure(fn, repeat: int) -> Dict[str, Any]:
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "p50_ms": round(statistics.median(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "memories": len(result or []),
+        **prompt_size([row.memory["memory"] for row in result or []]),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark bounded user-memory retrieval.")
+    parser.add_argument("--counts", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--limit", type=int, default=memory_settings.retrieval_limit)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="Optional path to write the JSON results.")
+    args = parser.parse_args()
+
+    db = IndexedPostgresMemoryDb(
+        table_name=f"bench_user_memories_{uuid.uuid4().hex[:8]}", db_engine=db_engine, embedder=HashEmbedder()
+    )
+    db.create()
+    results = []
+    try:
+        for count in args.counts:
+            user_id = f"bench-user-{count}"
+            seed(db, user_id, count)
+            query = "What food does the user like?"
+            results.append(
+                {
+                    "memory_count": count,
+                    "all": measure(lambda: db.read_memories(user_id=user_id), args.repeat),
+                    "recency": measure(lambda: db.read_memories(user_id=user_id, limit=args.limit), args.repeat),
+                    "vector": measure(
+                        lambda: db.search_memories(user_id=user_id, query=query, limit=args.limit), args.repeat
+                    ),
+                }
+            )
+            print(json.dumps(results[-1]))
+    finally:
+        db.drop_table()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"limit": args.limit, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
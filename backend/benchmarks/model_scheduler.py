@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Compare model calls with and without the rate-limit-aware scheduler against a rate-limited stub.
+
+For each scenario a fresh `benchmarks/stub_llm.py` is started with the given per-minute limits,
+then interactive ("agent") and batch ("memory") calls are fired concurrently through
+`llm.clients.get_model`. Without the scheduler the OpenAI SDK retries 429s on its own; with it,
+calls wait for budget from `llm.scheduler.model_scheduler`. Reports latency per role, failures
+and the number of 429s the stub returned.
+Usage:
+    python benchmarks/model_scheduler.py [--requests-per-minute 60] [--tokens-per-minute 40000]
+                                         [--interactive 40] [--batch 40] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+# Ensure the src directory is on the Python path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, os.pardir))
+sys.path.insert(0, os.path.join(project_root, "src"))
+
+from agno.models.message import Message  # noqa: E402
+
+from llm.clients import close_model_clients, get_model  # noqa: E402
+from llm.scheduler import model_scheduler  # noqa: E402
+from llm.settings import RateLimit, llm_settings  # noqa: E402
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p95": None, "max": None, "mean": None}
+    ordered = sorted(values)
+    return {
+        "p50": round(ordered[len(ordered) // 2], 3),
+        "p95": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 3),
+        "max": round(ordered[-1], 3),
+        "mean": round(statistics.fmean(ordered), 3),
+    }
+
+
+async def _call(model_id: str, role: str, index: int) -> Dict[str, Any]:
+    model = get_model(model_id, usage_role=role)
+    start = time.perf_counter()
+    try:
+        await model.ainvoke([Message(role="user", content=f"Request {index}: summarize the market news.")])
+        return {"role": role, "ok": True, "seconds": time.perf_counter() - start}
+    except Exception as e:
+        return {"role": role, "ok": False, "seconds": time.perf_counter() - start, "error": str(e)}
+
+
+async def run_scenario(args: argparse.Namespace, scheduled: bool) -> Dict[str, Any]:
+    port = _free_port()
+    stub = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.join(script_dir, "stub_llm.py"),
+            f"--port={port}",
+            "--first-token-ms=200",
+            f"--response-tokens={args.response_tokens}",
+            f"--requests-per-minute={args.requests_per_minute}",
+            f"--tokens-per-minute={args.tokens_per_minute}",
+        ]
+    )
+    try:
+        async with httpx.AsyncClient() as client:
+            for _ in range(100):
+                try:
+                    await client.get(f"http://127.0.0.1:{port}/stats")
+                    break
+                except httpx.HTTPError:
+                    await asyncio.sleep(0.2)
+
+        llm_settings.base_url = f"http://127.0.0.1:{port}/v1"
+        llm_settings.rate_limit_completion_tokens = args.response_tokens
+        llm_settings.rate_limits = (
+            {"*": RateLimit(requests_per_minute=args.requests_per_minute, tokens_per_minute=args.tokens_per_minute)}
+            if scheduled
+            else {}
+        )
+        # Clients are created with or without SDK retries depending on the limits, so start fresh
+        await close_model_clients()
+
+        calls = [_call(args.model_id, "agent", i) for i in range(args.interactive)]
+        calls += [_call(args.model_id, "memory", i) for i in range(args.batch)]
+        start = time.perf_counter()
+        results = await asyncio.gather(*calls)
+        elapsed = time.perf_counter() - start
+
+        async with httpx.AsyncClient() as client:
+            stub_stats = (await client.get(f"http://127.0.0.1:{port}/stats")).json()
+    finally:
+        stub.terminate()
+        stub.wait(timeout=30)
+
+    by_role: Dict[str, Any] = {}
+    for role in ("agent", "memory"):
+        role_results = [r for r in results if r["role"] == role]
+        by_role[role] = {
+            "calls": len(role_results),
+            "failed": sum(not r["ok"] for r in role_results),
+            "seconds": _percentiles([r["seconds"] for r in role_results if r["ok"]]),
+        }
+    return {
+        "scheduled": scheduled,
+        "duration_s": round(elapsed, 3),
+        "provider_429s": stub_stats["rate_limited"],
+        "roles": by_role,
+        "sample_errors": [r["error"] for r in results if not r["ok"]][:5],
+        "scheduler": model_scheduler.metrics() if scheduled else None,
+    }
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    scenarios = []
+    for scheduled in (False, True):
+        scenario = await run_scenario(args, scheduled)
+        print(json.dumps(scenario), flush=True)
+        scenarios.append(scenario)
+    await close_model_clients()
+    return {"config": vars(args), "scenarios": scenarios}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the model call scheduler against a rate-limited stub.")
+    parser.add_argument("--model-id", default="gpt-4.1")
+    parser.add_argument("--requests-per-minute", type=int, default=60)
+    parser.add_argument("--tokens-per-minute", type=int, default=40000)
+    parser.add_argument("--response-tokens", type=int, default=100)
+    parser.add_argument("--interactive", type=int, default=40)
+    parser.add_argument("--batch", type=int, default=40)
+    parser.add_argument("--output", help="Optional path to write the JSON results.")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark the wall-clock time of agent runs whose model makes several tool calls in one turn.
+
+Starts `benchmarks/stub_llm.py` answering the first completion of each run with `--calls` calls
+to the agent's first tool, then, for each cap in `--caps`, serves the app from
+`benchmarks/serve_stubbed_app.py` with TOOL_PARALLEL_MAX_CALLS set to it (1 runs the calls one
+after another, 0 runs them all at once) and sends `--runs` non-streaming runs one at a time.
+Reports run latency percentiles per cap, the reduction of the median against the first cap and the
+`tool_call_turns` counters of `GET /v1/metrics`.
+Requires DATABASE_URL to point at a local Postgres.
+Usage:
+    python benchmarks/parallel_tool_calls.py [--agent-id web_agent] [--calls 5] [--caps 1 2 5]
+                                             [--runs 20] [--tool-latency-ms 500] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+from load_test import _free_port, _percentiles, _wait_until_up
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+async def _measure_cap(cap: int, llm_port: int, args: argparse.Namespace) -> Dict[str, Any]:
+    app_port = _free_port()
+    env = {
+        **os.environ,
+        "LLM_BASE_URL": f"http://127.0.0.1:{llm_port}/v1",
+        "OPENAI_API_KEY": "stub",
+        "TOOL_PARALLEL_MAX_CALLS": str(cap),
+    }
+    app = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.join(script_dir, "serve_stubbed_app.py"),
+            f"--port={app_port}",
+            f"--tool-latency-ms={args.tool_latency_ms}",
+        ],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{app_port}"
+    latencies: List[float] = []
+    errors: List[str] = []
+    try:
+        await _wait_until_up(f"{base_url}/v1/health")
+        async with httpx.AsyncClient(timeout=300) as client:
+            for i in range(args.runs):
+                payload = {"message": args.message, "stream": False, "session_id": f"parallel-{cap}-{i}"}
+                start = time.perf_counter()
+                response = await client.post(f"{base_url}/v1/agents/{args.agent_id}/runs", json=payload)
+                if response.status_code == 200:
+                    latencies.append((time.perf_counter() - start) * 1000)
+                else:
+                    errors.append(response.text[:200])
+            turns = (await client.get(f"{base_url}/v1/metrics")).json()["tool_call_turns"]
+    finally:
+        app.terminate()
+        app.wait(timeout=30)
+    return {
+        "cap": cap,
+        "runs": args.runs,
+        "errors": len(errors),
+        "sample_errors": errors[:5],
+        "latency_ms": _percentiles(latencies),
+        "tool_call_turns": turns,
+    }
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    llm_port = _free_port()
+    stub = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.join(script_dir, "stub_llm.py"),
+            f"--port={llm_port}",
+            "--tool-calls",
+            f"--parallel-tool-calls={args.calls}",
+            f"--first-token-ms={args.first_token_ms}",
+            "--response-tokens=20",
+            "--tokens-per-second=0",
+        ],
+        env={**os.environ, "OPENAI_API_KEY": "stub"},
+    )
+    try:
+        await _wait_until_up(f"http://127.0.0.1:{llm_port}/stats")
+        results = []
+        for cap in args.caps:
+            result = await _measure_cap(cap, llm_port, args)
+            print(json.dumps(result), flush=True)
+            results.append(result)
+    finally:
+        stub.terminate()
+        stub.wait(timeout=30)
+
+    baseline = results[0]["latency_ms"]["p50"]
+    for result in results:
+        p50 = result["latency_ms"]["p50"]
+        result["p50_reduction"] = round(1 - p50 / baseline, 3) if baseline and p50 is not None else None
+    return {"config": vars(args), "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark agent runs making several tool calls in one turn.")
+    parser.add_argument("--agent-id", default="web_agent")
+    parser.add_argument("--message", default="Find the latest news on five open source AI projects.")
+    parser.add_argument("--calls", type=int, default=5, help="Tool calls the stub model makes in one turn.")
+    parser.add_argument("--caps", type=int, nargs="+", default=[1, 2, 5], help="TOOL_PARALLEL_MAX_CALLS values.")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--tool-latency-ms", type=float, default=500.0)
+    parser.add_argument("--first-token-ms", type=float, default=100.0)
+    parser.add_argument("--output", help="Optional path to write the JSON results.")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    print(json.dumps(results["results"], indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
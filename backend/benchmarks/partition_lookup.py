@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Benchmark session lookups, vacuum and retention on a plain and a monthly partitioned session table.
+
+Fills two scratch session tables in the `partition_bench` schema with the same `--rows` synthetic
+sessions (small payloads, `created_at` spread over the last `--months` months), one laid out as agno
+creates it and one partitioned by `db.partitions`, then measures through `CompactPostgresStorage`:
+point reads by session id, the newest sessions of a user (over all time and over the last 30 days),
+table and index size, VACUUM ANALYZE time and the time to remove the oldest month (DELETE vs
+dropping its partition). The schema is recreated on every run.
+Requires DATABASE_URL to point at a local Postgres.
+Usage:
+    python benchmarks/partition_lookup.py [--rows 10000000] [--months 36] [--users 100000]
+                                          [--lookups 2000] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, os.pardir))
+sys.path.insert(0, os.path.join(project_root, "src"))
+
+from sqlalchemy import text  # noqa: E402
+
+from db.partitions import (  # noqa: E402
+    PartitionedTable,
+    add_months,
+    archive_partition,
+    ensure_partitions,
+    list_partitions,
+    partition_name,
+)
+from db.session import db_engine  # noqa: E402
+from db.storage import CompactPostgresStorage  # noqa: E402
+from load_test import _percentiles  # noqa: E402
+
+SCHEMA = "partition_bench"
+LAYOUTS = {"plain": "bench_sessions_plain", "partitioned": "bench_sessions_partitioned"}
+# Rows inserted per statement while filling
+_BATCH = 1_000_000
+
+
+def _storage(layout: str) -> CompactPostgresStorage:
+    return CompactPostgresStorage(
+        table_name=LAYOUTS[layout], schema=SCHEMA, db_engine=db_engine, partitioned=layout == "partitioned"
+    )
+
+
+def _first_month(months: int):
+    return add_months(datetime.now(timezone.utc).date(), -(months - 1))
+
+
+def create_tables(args: argparse.Namespace) -> Dict[str, float]:
+    """Create and fill both tables; return the seconds spent filling each."""
+    with db_engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    for layout in LAYOUTS:
+        _storage(layout).create()
+    ensure_partitions(db_engine, PartitionedTable(LAYOUTS["partitioned"], "epoch", SCHEMA), _first_month(args.months))
+
+    plain = f"{SCHEMA}.{LAYOUTS['plain']}"
+    columns = "session_id, user_id, agent_id, memory, session_data, created_at, updated_at"
+    now = int(time.time())
+    span = int((now - datetime.combine(_first_month(args.months), datetime.min.time(), timezone.utc).timestamp()))
+    seconds: Dict[str, float] = {}
+    start = time.perf_counter()
+    for first in range(1, args.rows + 1, _BATCH):
+        last = min(args.rows, first + _BATCH - 1)
+        with db_engine.begin() as conn:
+            conn.execute(
+                text(
+                    f"INSERT INTO {plain} ({columns}) "
+                    "SELECT 'bench-' || g, 'user-' || (g % :users), 'bench_agent', "
+                    "jsonb_build_object('runs', jsonb_build_array(jsonb_build_object('content', md5(g::text)))), "
+                    "'{}'::jsonb, t, t "
+                    "FROM (SELECT g, :now - (random() * :span)::bigint AS t "
+                    "FROM generate_series(:first, :last) AS g) AS s"
+                ),
+                {"users": args.users, "first": first, "last": last, "now": now, "span": span},
+            )
+        print(f"Inserted {last}/{args.rows} rows", flush=True)
+    seconds["plain"] = round(time.perf_counter() - start, 2)
+
+    start = time.perf_counter()
+    with db_engine.begin() as conn:
+        conn.execute(text(f"INSERT INTO {SCHEMA}.{LAYOUTS['partitioned']} SELECT * FROM {plain}"))
+    seconds["partitioned"] = round(time.perf_counter() - start, 2)
+    return seconds
+
+
+def _vacuum_seconds(table: str) -> float:
+    start = time.perf_counter()
+    with db_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql(f"VACUUM ANALYZE {SCHEMA}.{table}")
+    return round(time.perf_counter() - start, 2)
+
+
+def _sizes(table: str) -> Dict[str, int]:
+    with db_engine.connect() as conn:
+        row = conn.execute(
+            text(
+                "SELECT coalesce(sum(pg_table_size(relid)), 0) AS table_bytes, "
+                "coalesce(sum(pg_indexes_size(relid)), 0) AS index_bytes "
+                "FROM pg_partition_tree(to_regclass(:table))"
+            ),
+            {"table": f"{SCHEMA}.{table}"},
+        ).one()
+    return {"table_bytes": int(row.table_bytes), "index_bytes": int(row.index_bytes)}
+
+
+def _timed(queries: List[Any], run) -> Dict[str, Any]:
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        run(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return _percentiles(latencies)
+
+
+def measure(layout: str, args: argparse.Namespace) -> Dict[str, Any]:
+    storage = _storage(layout)
+    # The same lookups for each layout
+    rng = random.Random(args.seed)
+    table = f"{SCHEMA}.{LAYOUTS[layout]}"
+    session_ids = [f"bench-{rng.randint(1, args.rows)}" for _ in range(args.lookups)]
+    user_ids = [f"user-{rng.randrange(args.users)}" for _ in range(args.lookups)]
+    month_ago = int(time.time()) - 30 * 86400
+
+    def recent(user_id: str, since: int = 0) -> None:
+        with db_engine.connect() as conn:
+            conn.execute(
+                text(
+                    f"SELECT session_id FROM {table} WHERE user_id = :user_id AND created_at >= :since "
+                    "ORDER BY created_at DESC LIMIT 20"
+                ),
+                {"user_id": user_id, "since": since},
+            ).all()
+
+    result: Dict[str, Any] = {"layout": layout, "vacuum_analyze_seconds": _vacuum_seconds(LAYOUTS[layout])}
+    result.update(_sizes(LAYOUTS[layout]))
+    # Warm the connection pool and the caches with the same number of lookups first
+    for session_id in session_ids:
+        storage.read(session_id)
+    result["read_session_ms"] = _timed(session_ids, storage.read)
+    result["recent_sessions_of_user_ms"] = _timed(user_ids, recent)
+    result["recent_month_sessions_of_user_ms"] = _timed(user_ids, lambda user_id: recent(user_id, month_ago))
+
+    oldest = _first_month(args.months)
+    start = time.perf_counter()
+    if layout == "partitioned":
+        spec = PartitionedTable(LAYOUTS[layout], "epoch", SCHEMA)
+        with db_engine.connect() as conn:
+            partitions = list_partitions(conn, spec)
+        archive_partition(db_engine, spec, partition_name(spec, oldest), "drop", "")
+        result["partitions"] = len(partitions)
+    else:
+        bound = int(datetime.combine(add_months(oldest, 1), datetime.min.time(), timezone.utc).timestamp())
+        with db_engine.begin() as conn:
+            conn.execute(text(f"DELETE FROM {table} WHERE created_at < :bound"), {"bound": bound})
+    result["drop_oldest_month_seconds"] = round(time.perf_counter() - start, 2)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark session lookups on a plain and a partitioned table.")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--months", type=int, default=36, help="Months the sessions are spread over.")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Optional path to write the JSON results.")
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {"config": vars(args), "fill_seconds": create_tables(args)}
+    results["results"] = [measure(layout, args) for layout in LAYOUTS]
+    print(json.dumps(results["results"], indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Compare the prompt cache hit rate of the default and cache-friendly prompt layouts.
+
+For each `LLM_PROMPT_LAYOUT`, starts `benchmarks/stub_llm.py`, which simulates a provider prompt
+cache, and `benchmarks/serve_stubbed_app.py`, then runs `--sessions` conversations of `--turns`
+turns against `/v1/agents/{agent_id}/runs`. Reports the prompt and cached tokens the stub LLM saw
+and the latency of the runs; with --prefill-ms-per-1k-tokens, uncached tokens also cost latency.
+Requires DATABASE_URL to point at a local Postgres.
+Usage:
+    python benchmarks/prompt_cache.py [--agent-id web_agent] [--sessions 4] [--turns 8]
+                                      [--prefill-ms-per-1k-tokens 20] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from typing import Any, Dict, List
+
+import httpx
+
+from load_test import _free_port, _percentiles, _wait_until_up
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+async def _run_session(client: httpx.AsyncClient, url: str, args: argparse.Namespace) -> List[float]:
+    session_id = f"prompt-cache-{uuid.uuid4().hex[:8]}"
+    latencies = []
+    for turn in range(args.turns):
+        start = time.perf_counter()
+        response = await client.post(
+            url,
+            json={
+                "message": f"{args.message} (follow-up {turn})",
+                "stream": False,
+                "user_id": "bench-user",
+                "session_id": session_id,
+            },
+        )
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def run_layout(layout: str, args: argparse.Namespace) -> Dict[str, Any]:
+    llm_port, app_port = _free_port(), _free_port()
+    env = {
+        **os.environ,
+        "LLM_BASE_URL": f"http://127.0.0.1:{llm_port}/v1",
+        "LLM_PROMPT_LAYOUT": layout,
+        "OPENAI_API_KEY": "stub",
+    }
+    stub = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.join(script_dir, "stub_llm.py"),
+            f"--port={llm_port}",
+            f"--first-token-ms={args.first_token_ms}",
+            f"--prefill-ms-per-1k-tokens={args.prefill_ms_per_1k_tokens}",
+        ],
+        env=env,
+    )
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(script_dir, "serve_stubbed_app.py"), f"--port={app_port}"],
+        env=env,
+    )
+    try:
+        stats_url = f"http://127.0.0.1:{llm_port}/stats"
+        await _wait_until_up(stats_url)
+        base_url = f"http://127.0.0.1:{app_port}"
+        await _wait_until_up(f"{base_url}/v1/health")
+        url = f"{base_url}/v1/agents/{args.agent_id}/runs"
+        async with httpx.AsyncClient(timeout=300) as client:
+            sessions = await asyncio.gather(*(_run_session(client, url, args) for _ in range(args.sessions)))
+            stats = (await client.get(stats_url)).json()
+    finally:
+        for process in (server, stub):
+            process.terminate()
+        for process in (server, stub):
+            process.wait(timeout=60)
+
+    latencies = [latency for session in sessions for latency in session]
+    # Later turns are where a stable prefix pays off
+    later_turns = [latency for session in sessions for latency in session[1:]]
+    return {
+        "layout": layout,
+        "runs": len(latencies),
+        "prompt_tokens": stats["prompt_tokens"],
+        "cached_tokens": stats["cached_tokens"],
+        "cached_token_ratio": (
+            round(stats["cached_tokens"] / stats["prompt_tokens"], 3) if stats["prompt_tokens"] else 0.0
+        ),
+        "latency_ms": _percentiles(latencies),
+        "later_turns_latency_ms": _percentiles(later_turns),
+    }
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    results = []
+    for layout in args.layouts:
+        result = await run_layout(layout, args)
+        print(json.dumps(result), flush=True)
+        results.append(result)
+    return {"config": vars(args), "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prompt cache hits of the agent prompt layouts.")
+    parser.add_argument("--agent-id", default="web_agent")
+    parser.add_argument("--message", default="Summarize the latest news about open source AI.")
+    parser.add_argument("--layouts", nargs="+", default=["default", "cache_friendly"])
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--turns", type=int, default=8)
+    parser.add_argument("--first-token-ms", type=float, default=100.0)
+    parser.add_argument("--prefill-ms-per-1k-tokens", type=float, default=20.0)
+    parser.add_argument("--output", help="Optional path to write the JSON results.")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    print(json.dumps([{k: r[k] for k in ("layout", "cached_token_ratio")} for r in results["results"]]))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
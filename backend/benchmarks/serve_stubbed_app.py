@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Serve the backend app from `api.main.create_app` with offline stub tools.
+
+Started by `benchmarks/load_test.py`; set LLM_BASE_URL to the stub LLM server and
+DATABASE_URL to a local Postgres before running it directly.
+Usage:
+    python benchmarks/serve_stubbed_app.py [--port 8000] [--tool-latency-ms 200] [--workers 1]
+"""
+
+import argparse
+import os
+import sys
+
+# Ensure the src directory is on the Python path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, os.pardir))
+sys.path.insert(0, os.path.join(project_root, "src"))
+
+import uvicorn  # noqa: E402
+
+from stub_tools import install_stub_tools  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the backend with stub tools for benchmarking.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--tool-latency-ms", type=float, default=200.0)
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Serve with this many preloaded gunicorn workers if more than 1."
+    )
+    args = parser.parse_args()
+
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    os.environ["WEB_CONCURRENCY"] = str(args.workers)
+    install_stub_tools(args.tool_latency_ms)
+
+    from api.main import app
+
+    if args.workers > 1:
+        from api.serving import serve
+
+        serve(app, host=args.host, port=args.port, workers=args.workers, loglevel="warning")
+    else:
+        uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Measure prompt tokens and latency per turn of long sessions, with and without session compaction.
+
+For each mode, starts `benchmarks/stub_llm.py` and `benchmarks/serve_stubbed_app.py`, then runs
+`--sessions` conversations of `--turns` turns against `/v1/agents/{agent_id}/runs`, one turn at a
+time per session. "truncate" keeps agno's last `history_runs`; "compact" sets
+MEMORY_SESSION_COMPACTION_THRESHOLD_TOKENS=--threshold-tokens. Prompt tokens per turn are read from
+the agent's model usage on `/v1/metrics`; the tokens spent writing summaries are reported separately.
+Requires DATABASE_URL to point at a local Postgres.
+Usage:
+    python benchmarks/session_compaction.py [--agent-id web_agent] [--turns 100] [--sessions 2]
+                                            [--threshold-tokens 4000] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from typing import Any, Dict, List
+
+import httpx
+
+from load_test import _free_port, _percentiles, _wait_until_up
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+def _usage(metrics: Dict[str, Any], model_id: str, role: str) -> Dict[str, float]:
+    return metrics["models"].get(model_id, {}).get(role, {"calls": 0, "input_tokens": 0, "output_tokens": 0})
+
+
+async def _run_session(
+    client: httpx.AsyncClient, base_url: str, args: argparse.Namespace, lock: asyncio.Lock
+) -> List[Dict[str, float]]:
+    session_id = f"compaction-{uuid.uuid4().hex[:8]}"
+    url = f"{base_url}/v1/agents/{args.agent_id}/runs"
+    turns = []
+    for turn in range(args.turns):
+        # Sessions take turns so the token delta of each turn belongs to a single run
+        async with lock:
+            before = _usage((await client.get(f"{base_url}/v1/metrics")).json(), args.model_id, "agent")
+            start = time.perf_counter()
+            response = await client.post(
+                url,
+                json={
+                    "message": f"Turn {turn}: {args.message}",
+                    "stream": False,
+                    "user_id": "bench-user",
+                    "session_id": session_id,
+                },
+            )
+            response.raise_for_status()
+            latency_ms = (time.perf_counter() - start) * 1000
+            after = _usage((await client.get(f"{base_url}/v1/metrics")).json(), args.model_id, "agent")
+        turns.append({"latency_ms": latency_ms, "prompt_tokens": after["input_tokens"] - before["input_tokens"]})
+    return turns
+
+
+async def run_mode(mode: str, args: argparse.Namespace) -> Dict[str, Any]:
+    llm_port, app_port = _free_port(), _free_port()
+    env = {**os.environ, "LLM_BASE_URL": f"http://127.0.0.1:{llm_port}/v1", "OPENAI_API_KEY": "stub"}
+    env.pop("MEMORY_SESSION_COMPACTION_THRESHOLD_TOKENS", None)
+    if mode == "compact":
+        env["MEMORY_SESSION_COMPACTION_THRESHOLD_TOKENS"] = str(args.threshold_tokens)
+    stub = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.join(script_dir, "stub_llm.py"),
+            f"--port={llm_port}",
+            f"--tokens-per-second={args.tokens_per_second}",
+            f"--first-token-ms={args.first_token_ms}",
+            f"--response-tokens={args.response_tokens}",
+        ],
+        env=env,
+    )
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(script_dir, "serve_stubbed_app.py"), f"--port={app_port}"],
+        env=env,
+    )
+    try:
+        await _wait_until_up(f"http://127.0.0.1:{llm_port}/stats")
+        base_url = f"http://127.0.0.1:{app_port}"
+        await _wait_until_up(f"{base_url}/v1/health")
+        lock = asyncio.Lock()
+        async with httpx.AsyncClient(timeout=300) as client:
+            sessions = await asyncio.gather(*(_run_session(client, base_url, args, lock) for _ in range(args.sessions)))
+            # Let the last compactions finish before reading their usage
+            await asyncio.sleep(2)
+            metrics = (await client.get(f"{base_url}/v1/metrics")).json()
+    finally:
+        for process in (server, stub):
+            process.terminate()
+        for process in (server, stub):
+            process.wait(timeout=60)
+
+    by_turn = [[session[turn] for session in sessions] for turn in range(args.turns)]
+    prompt_tokens = [sum(t["prompt_tokens"] for t in turn) / len(turn) for turn in by_turn]
+    summaries = _usage(metrics, args.summary_model_id, "session_summary")
+    return {
+        "mode": mode,
+        "runs": args.turns * args.sessions,
+        "prompt_tokens_per_turn": {
+            "first": prompt_tokens[0] if prompt_tokens else None,
+            "last": prompt_tokens[-1] if prompt_tokens else None,
+            "max": max(prompt_tokens, default=None),
+            "mean": round(sum(prompt_tokens) / len(prompt_tokens), 1) if prompt_tokens else None,
+            # Mean prompt tokens of every tenth turn, to show how the prompt grows
+            "every_tenth_turn": [round(tokens, 1) for tokens in prompt_tokens[9::10]],
+        },
+        "agent_prompt_tokens_total": sum(t["prompt_tokens"] for session in sessions for t in session),
+        "summary_calls": summaries["calls"],
+        "summary_tokens_total": summaries["input_tokens"] + summaries["output_tokens"],
+        "session_compaction": metrics.get("session_compaction"),
+        "latency_ms": _percentiles([t["latency_ms"] for session in sessions for t in session]),
+        "last_ten_turns_latency_ms": _percentiles([t["latency_ms"] for session in sessions for t in session[-10:]]),
+    }
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    results = []
+    for mode in args.modes:
+        result = await run_mode(mode, args)
+        print(json.dumps(result), flush=True)
+        results.append(result)
+    return {"config": vars(args), "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prompt size of long sessions with session compaction.")
+    parser.add_argument("--agent-id", default="web_agent")
+    parser.add_argument("--model-id", default="gpt-4.1", help="Model the agent runs on.")
+    parser.add_argument("--summary-model-id", default="gpt-4.1-mini", help="MEMORY_SESSION_SUMMARY_MODEL_ID.")
+    parser.add_argument(
+        "--message",
+        default="Tell me more about the open source AI projects we discussed and how they compare on benchmarks.",
+    )
+    parser.add_argument("--modes", nargs="+", default=["truncate", "compact"])
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--sessions", type=int, default=2)
+    parser.add_argument("--threshold-tokens", type=int, default=4000)
+    parser.add_argument("--tokens-per-second", type=float, default=2000.0)
+    parser.add_argument("--first-token-ms", type=float, default=20.0)
+    parser.add_argument("--response-tokens", type=int, default=300)
+    parser.add_argument("--output", help="Optional path to write the JSON results.")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    print(json.dumps([{"mode": r["mode"], **r["prompt_tokens_per_turn"]} for r in results["results"]]))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
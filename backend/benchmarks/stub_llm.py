@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI-compatible stub server for benchmarks.
+
+Serves `/v1/chat/completions` (streaming and non-streaming) and `/v1/embeddings` with a
+configurable first-token latency and token rate, so the backend can be load-tested without
+calling the real provider. Point the backend at it with LLM_BASE_URL=http://host:port/v1.
+Optional requests/tokens-per-minute limits are enforced like a provider would, with 429
+responses carrying Retry-After. With --tool-calls the first completion of a conversation that
+offers tools is a call to its first tool (--parallel-tool-calls calls with different arguments).
+Prompt caching is simulated like OpenAI's: prompts of 1024 tokens or more report the longest
+previously seen prefix, in 128-token steps, as `cached_tokens`, and only uncached tokens cost
+--prefill-ms-per-1k-tokens before the first token.
+Usage:
+    python benchmarks/stub_llm.py [--port 8100] [--tokens-per-second 50] [--first-token-ms 300]
+                                  [--requests-per-minute 60] [--tokens-per-minute 40000] [--tool-calls]
+                                  [--parallel-tool-calls 1] [--prefill-ms-per-1k-tokens 0]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def _prompt_text(messages: List[Dict[str, Any]]) -> str:
+    return "".join(json.dumps(m.get("content") or "") for m in messages)
+
+
+def _prompt_tokens(messages: List[Dict[str, Any]]) -> int:
+    # ~4 characters per token is close enough for load generation
+    return len(_prompt_text(messages)) // 4
+
+
+class _PrefixCache:
+    """Remembers prompt prefixes at the provider's cache granularity."""
+
+    MIN_TOKENS = 1024
+    STEP_TOKENS = 128
+
+    def __init__(self):
+        self._seen: set = set()
+
+    def cached_tokens(self, text: str) -> int:
+        """Return the tokens of `text` served from the cache, then cache its prefixes."""
+        cached = 0
+        hit = True
+        for boundary in range(self.MIN_TOKENS, len(text) // 4 + 1, self.STEP_TOKENS):
+            digest = hashlib.sha256(text[: boundary * 4].encode()).digest()
+            hit = hit and digest in self._seen
+            if hit:
+                cached = boundary
+            self._seen.add(digest)
+        return cached
+
+
+class _RateLimiter:
+    """Token buckets refilled continuously, like the provider's per-minute limits."""
+
+    def __init__(self, requests_per_minute: Optional[int], tokens_per_minute: Optional[int]):
+        self.limits = {"requests": requests_per_minute, "tokens": tokens_per_minute}
+        self.levels = {key: float(limit or 0) for key, limit in self.limits.items()}
+        self.updated_at = time.monotonic()
+
+    def take(self, tokens: int) -> float:
+        """Take one request and `tokens`; return 0 on success, else the seconds until they are available."""
+        now = time.monotonic()
+        elapsed, self.updated_at = now - self.updated_at, now
+        wait = 0.0
+        for key, amount in (("requests", 1), ("tokens", tokens)):
+            limit = self.limits[key]
+            if limit is None:
+                continue
+            self.levels[key] = min(float(limit), self.levels[key] + elapsed * limit / 60)
+            if self.levels[key] < min(amount, limit):
+                wait = max(wait, (min(amount, limit) - self.levels[key]) * 60 / limit)
+        if wait > 0:
+            return wait
+        self.levels["requests"] -= 1
+        self.levels["tokens"] -= tokens
+        return 0.0
+
+
+def _stub_tool_calls(
+    messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]], count: int = 1
+) -> List[Dict[str, Any]]:
+    """Return `count` calls to the first offered tool, unless the conversation already contains a tool result."""
+    if not tools or any(m.get("role") == "tool" for m in messages):
+        return []
+    function = tools[0]["function"]
+    parameters = function.get("parameters") or {}
+    calls = []
+    for index in range(count):
+        # Different arguments per call, so calls are answered by the tool rather than by a memo or cache
+        placeholders = {"integer": index + 1, "number": index + 1, "boolean": False}
+        text = f"stub {uuid.uuid4().hex[:8]}"
+        arguments = {
+            name: placeholders.get(parameters.get("properties", {}).get(name, {}).get("type"), text)
+            for name in parameters.get("required", [])
+        }
+        calls.append(
+            {
+                "index": index,
+                "id": f"call_{uuid.uuid4().hex[:24]}",
+                "type": "function",
+                "function": {"name": function["name"], "arguments": json.dumps(arguments)},
+            }
+        )
+    return calls
+
+
+def create_stub_app(
+    tokens_per_second: float,
+    first_token_ms: float,
+    response_tokens: int,
+    requests_per_minute: Optional[int] = None,
+    tokens_per_minute: Optional[int] = None,
+    tool_calls: bool = False,
+    prefill_ms_per_1k_tokens: float = 0.0,
+    parallel_tool_calls: int = 1,
+) -> FastAPI:
+    """
+    Create the stub provider app.
+
+    Args:
+        tokens_per_second (float): Rate at which completion tokens are produced.
+        first_token_ms (float): Delay before the first token (or the whole non-streaming response).
+        response_tokens (int): Number of completion tokens per response.
+        requests_per_minute (Optional[int]): Chat completion requests allowed per minute.
+        tokens_per_minute (Optional[int]): Prompt plus completion tokens allowed per minute.
+        tool_calls (bool): Answer the first completion of a conversation offering tools with a tool call.
+        prefill_ms_per_1k_tokens (float): Extra delay before the first token per 1000 uncached prompt tokens.
+        parallel_tool_calls (int): Tool calls made in that first completion.
+
+    Returns:
+        FastAPI: The stub application.
+    """
+    app = FastAPI(title="stub-llm")
+    token_delay = 1.0 / tokens_per_second if tokens_per_second > 0 else 0.0
+    # `active_streams` drops as soon as the caller closes a stream; `cancelled_streams` counts those closed early
+    stats = {
+        "chat_completions": 0,
+        "tool_calls": 0,
+        "rate_limited": 0,
+        "active_streams": 0,
+        "cancelled_streams": 0,
+        "embeddings": 0,
+        "prompt_tokens": 0,
+        "cached_tokens": 0,
+    }
+    limiter = _RateLimiter(requests_per_minute, tokens_per_minute)
+    prefix_cache = _PrefixCache()
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        retry_after = limiter.take(_prompt_tokens(body.get("messages", [])) + response_tokens)
+        if retry_after > 0:
+            stats["rate_limited"] += 1
+            return JSONResponse(
+                status_code=429,
+                content={"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                headers={"retry-after-ms": str(int(retry_after * 1000)), "retry-after": str(int(retry_after) + 1)},
+            )
+        stats["chat_completions"] += 1
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        model = body.get("model", "stub")
+        prompt_tokens = _prompt_tokens(body.get("messages", []))
+        cached_tokens = prefix_cache.cached_tokens(_prompt_text(body.get("messages", [])))
+        stats["prompt_tokens"] += prompt_tokens
+        stats["cached_tokens"] += cached_tokens
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": response_tokens,
+            "total_tokens": prompt_tokens + response_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+        }
+        first_token_delay = (first_token_ms + (prompt_tokens - cached_tokens) / 1000 * prefill_ms_per_1k_tokens) / 1000
+
+        def chunk(delta: Dict[str, Any], finish_reason=None) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        calls = _stub_tool_calls(body.get("messages", []), body.get("tools"), parallel_tool_calls) if tool_calls else []
+        stats["tool_calls"] += len(calls)
+
+        if body.get("stream"):
+
+            async def stream():
+                stats["active_streams"] += 1
+                finished = False
+                try:
+                    await asyncio.sleep(first_token_delay)
+                    if calls:
+                        yield chunk({"role": "assistant", "content": None, "tool_calls": calls})
+                        yield chunk({}, finish_reason="tool_calls")
+                    else:
+                        yield chunk({"role": "assistant", "content": ""})
+                        for i in range(response_tokens):
+                            yield chunk({"content": f"tok{i} "})
+                            await asyncio.sleep(token_delay)
+                        yield chunk({}, finish_reason="stop")
+                    finished = True
+                finally:
+                    stats["active_streams"] -= 1
+                    stats["cancelled_streams"] += int(not finished)
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    usage_payload = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": created,
+                        "model": model,
+                        "choices": [],
+                        "usage": usage,
+                    }
+                    yield f"data: {json.dumps(usage_payload)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(stream(), media_type="text/event-stream")
+
+        if calls:
+            await asyncio.sleep(first_token_delay)
+            for call in calls:
+                call.pop("index")
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": None, "tool_calls": calls},
+                        "finish_reason": "tool_calls",
+                    }
+                ],
+                "usage": usage,
+            }
+
+        await asyncio.sleep(first_token_delay + response_tokens * token_delay)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": " ".join(f"tok{i}" for i in range(response_tokens))},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": usage,
+        }
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        stats["embeddings"] += 1
+        inputs = body.get("input")
+        inputs = inputs if isinstance(inputs, list) else [inputs]
+        dimensions = body.get("dimensions") or 1536
+        data = []
+        for index, text in enumerate(inputs):
+            rng = random.Random(hashlib.sha256(str(text).encode()).digest())
+            data.append(
+                {"object": "embedding", "index": index, "embedding": [rng.uniform(-1, 1) for _ in range(dimensions)]}
+            )
+        return {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "stub-embedding"),
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        }
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible stub server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--first-token-ms", type=float, default=300.0)
+    parser.add_argument("--response-tokens", type=int, default=100)
+    parser.add_argument("--requests-per-minute", type=int, default=None)
+    parser.add_argument("--tokens-per-minute", type=int, default=None)
+    parser.add_argument("--tool-calls", action="store_true")
+    parser.add_argument("--prefill-ms-per-1k-tokens", type=float, default=0.0)
+    parser.add_argument("--parallel-tool-calls", type=int, default=1, help="Tool calls made per tool call turn.")
+    args = parser.parse_args()
+
+    app = create_stub_app(
+        args.tokens_per_second,
+        args.first_token_ms,
+        args.response_tokens,
+        requests_per_minute=args.requests_per_minute,
+        tokens_per_minute=args.tokens_per_minute,
+        tool_calls=args.tool_calls,
+        prefill_ms_per_1k_tokens=args.prefill_ms_per_1k_tokens,
+        parallel_tool_calls=args.parallel_tool_calls,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Offline stand-ins for the DuckDuckGo, market data and HackerNews tools used in benchmarks.
+
+``install_stub_tools`` must run before the agent registry is imported: toolkits register
+bound methods when the agent configs are created at import time. Market data and web search
+results are cached in memory only, so runs do not depend on entries left in the shared tables by
+earlier benchmarks; repeated queries are still served from the cache, as in production.
+"""
+
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+import httpx
+
+from tools.base.cache import ToolResultCache
+from tools.market_data.sources import FixtureSource
+
+
+def _stub_method(original: Callable[..., Any], latency: float, result: Callable[..., Any]) -> Callable[..., Any]:
+    def method(self, *args, **kwargs):
+        time.sleep(latency)
+        return json.dumps(result(*args, **kwargs))
+
+    # Keep the name, signature and docstring so the tool schema sent to the model is unchanged
+    method.__name__ = original.__name__
+    method.__doc__ = original.__doc__
+    method.__annotations__ = original.__annotations__
+    method.__wrapped__ = original  # type: ignore[attr-defined]
+    return method
+
+
+class _SlowFixtureSource(FixtureSource):
+    """Serves the same quote for any ticker after a fixed delay per batch."""
+
+    def __init__(self, latency: float):
+        super().__init__({})
+        self.latency = latency
+
+    def fetch(self, kind: str, symbols: List[str], **params: Any) -> Dict[str, Any]:
+        time.sleep(self.latency)
+        self.calls[kind] = self.calls.get(kind, 0) + 1
+        return {symbol: {"symbol": symbol, "price": 123.45, "currency": "USD", "stub": True} for symbol in symbols}
+
+
+class _StubResponse:
+    def __init__(self, payload: Any):
+        self._payload = payload
+
+    def raise_for_status(self) -> None:
+        return None
+
+    def json(self) -> Any:
+        return self._payload
+
+
+class _StubHackerNewsHttpx:
+    """Replaces the `httpx` module used by the HackerNews tool."""
+
+    HTTPError = httpx.HTTPError
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def get(self, url: str, **kwargs) -> _StubResponse:
+        time.sleep(self.latency)
+        if url.endswith("topstories.json"):
+            return _StubResponse(list(range(1, 501)))
+        story_id = int(url.rsplit("/", 1)[-1].split(".")[0])
+        return _StubResponse(
+            {"id": story_id, "title": f"Stub story {story_id}", "url": f"https://example.com/{story_id}", "score": 100}
+        )
+
+
+def install_stub_tools(latency_ms: float = 200.0) -> None:
+    """
+    Replace network-bound tool calls with canned results after a fixed delay.
+
+    Args:
+        latency_ms (float): Simulated upstream latency per tool call (per HTTP request for HackerNews, per
+            batch of tickers for market data).
+    """
+    from agno.tools.duckduckgo import DuckDuckGoTools
+    import tools.hackernews.builder as hackernews_builder
+    from tools.market_data.builder import set_market_data_source
+    from tools.web_search.builder import set_web_search_cache
+
+    latency = latency_ms / 1000
+
+    def search_results(query: str, max_results: int = 5, **kwargs) -> Any:
+        return [
+            {"title": f"Result {i} for {query}", "href": f"https://example.com/{i}", "body": f"Stub snippet {i}."}
+            for i in range(max_results)
+        ]
+
+    for name in ("duckduckgo_search", "duckduckgo_news"):
+        setattr(DuckDuckGoTools, name, _stub_method(getattr(DuckDuckGoTools, name), latency, search_results))
+
+    set_web_search_cache(ToolResultCache("web_search_cache", max_entries=2000))
+    set_market_data_source(_SlowFixtureSource(latency), ToolResultCache("market_data_cache", max_entries=5000))
+
+    hackernews_builder.httpx = _StubHackerNewsHttpx(latency)  # type: ignore[assignment]
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark event-loop responsiveness while many synchronous tool calls run concurrently.
+
+Runs `--calls` calls of a blocking tool, `--concurrency` at a time, in each mode: called inline on
+the event loop, offloaded with `asyncio.to_thread` (how agno runs synchronous tools, on the default
+executor) and offloaded by `tools.base.executor.ToolExecutor` with `--threads` threads; for
+`--kind cpu` also on a ToolExecutor process pool of `--processes` processes. While the calls run, a
+ticker measures how late the event loop wakes it up and a probe measures the latency of a trivial
+`asyncio.to_thread` call, standing in for the database calls the API offloads to the default
+executor. Reports loop lag and probe latency percentiles, timeouts and tool calls per second as JSON.
+Usage:
+    python benchmarks/tool_offload.py [--kind io] [--tool-ms 200] [--calls 400] [--concurrency 64]
+                                      [--threads 16] [--processes 4] [--timeout 30] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, os.pardir))
+sys.path.insert(0, os.path.join(project_root, "src"))
+
+from load_test import _percentiles  # noqa: E402
+from tools.base.executor import ToolExecutor, ToolTimeoutError  # noqa: E402
+
+# Interval of the loop lag ticker and of the default executor probe
+_TICK_SECONDS = 0.01
+_PROBE_SECONDS = 0.05
+
+
+def io_tool(milliseconds: float) -> str:
+    """A tool blocking on I/O, such as a synchronous HTTP call."""
+    time.sleep(milliseconds / 1000)
+    return "done"
+
+
+def cpu_tool(milliseconds: float) -> str:
+    """A tool keeping a core busy, such as parsing or scoring a large document."""
+    deadline = time.perf_counter() + milliseconds / 1000
+    digest = b""
+    while time.perf_counter() < deadline:
+        digest = hashlib.sha256(digest).digest()
+    return digest.hex()
+
+
+def _runner(mode: str, tool: Callable[..., Any], args: argparse.Namespace) -> Tuple[Callable[..., Any], Any]:
+    """Return the async function running `tool` in `mode`, and the ToolExecutor it uses, if any."""
+    if mode == "inline":
+
+        async def inline(**kwargs: Any) -> Any:
+            return tool(**kwargs)
+
+        return inline, None
+    if mode == "to_thread":
+
+        async def to_thread(**kwargs: Any) -> Any:
+            return await asyncio.to_thread(tool, **kwargs)
+
+        return to_thread, None
+    executor = ToolExecutor(threads=args.threads, processes=args.processes if mode == "process" else 0)
+
+    async def offloaded(**kwargs: Any) -> Any:
+        return await executor.run(tool, (), kwargs, timeout=args.timeout, cpu_bound=mode == "process")
+
+    return offloaded, executor
+
+
+async def _measure(mode: str, args: argparse.Namespace) -> Dict[str, Any]:
+    tool = cpu_tool if args.kind == "cpu" else io_tool
+    run_tool, executor = _runner(mode, tool, args)
+    # Start the pools before measuring
+    await run_tool(milliseconds=0)
+
+    lags: List[float] = []
+    probes: List[float] = []
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        loop = asyncio.get_running_loop()
+        while not done.is_set():
+            expected = loop.time() + _TICK_SECONDS
+            await asyncio.sleep(_TICK_SECONDS)
+            lags.append(max(0.0, loop.time() - expected) * 1000)
+
+    async def probe() -> None:
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.to_thread(lambda: None)
+            probes.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(_PROBE_SECONDS)
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    timeouts = 0
+
+    async def call() -> None:
+        nonlocal timeouts
+        async with semaphore:
+            try:
+                await run_tool(milliseconds=args.tool_ms)
+            except ToolTimeoutError:
+                timeouts += 1
+
+    background = [asyncio.create_task(ticker()), asyncio.create_task(probe())]
+    # Let the ticker and probe start before the calls do
+    await asyncio.sleep(_PROBE_SECONDS)
+    start = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(args.calls)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await asyncio.gather(*background)
+    if executor is not None:
+        executor.shutdown()
+    return {
+        "mode": mode,
+        "seconds": round(elapsed, 2),
+        "calls_per_second": round(args.calls / elapsed, 1),
+        "timeouts": timeouts,
+        "loop_lag_ms": {**_percentiles(lags), "max": round(max(lags, default=0.0), 2)},
+        "default_executor_probe_ms": {**_percentiles(probes), "max": round(max(probes, default=0.0), 2)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark event-loop lag with concurrent synchronous tool calls.")
+    parser.add_argument("--kind", choices=["io", "cpu"], default="io", help="Whether the tool sleeps or computes.")
+    parser.add_argument("--tool-ms", type=float, default=200, help="Milliseconds each tool call takes.")
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=30, help="Timeout in seconds of each offloaded call.")
+    parser.add_argument("--output", help="Optional path to write the JSON results.")
+    args = parser.parse_args()
+
+    modes = ["inline", "to_thread", "executor"] + (["process"] if args.kind == "cpu" else [])
+    results = {"config": vars(args), "results": [asyncio.run(_measure(mode, args)) for mode in modes]}
+    print(json.dumps(results["results"], indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
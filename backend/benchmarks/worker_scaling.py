@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Measure how throughput of `/v1/agents/{agent_id}/runs` scales with the number of worker processes.
+
+For each worker count, starts `benchmarks/stub_llm.py` and `benchmarks/serve_stubbed_app.py
+--workers N` (preloaded gunicorn workers above 1), drives `--requests` runs at `--concurrency`
+per worker with `load_test.run_scenario`, and reports throughput, latency, Postgres connections
+and, on Linux, the memory of the worker processes: `private_mb` is what each worker holds on its
+own, `shared_mb` what it still shares copy-on-write with the preloaded master.
+The stub LLM answers quickly by default so the app, not the model, is the bottleneck; it runs in
+a single process, so keep an eye on its CPU at high worker counts.
+Requires DATABASE_URL to point at a local Postgres.
+Usage:
+    python benchmarks/worker_scaling.py [--workers 1 2 4] [--concurrency 8] [--requests 400]
+                                        [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from load_test import _free_port, _wait_until_up, run_scenario
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+def _child_pids(pid: int) -> List[int]:
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The parent pid is the second field after the parenthesised command name
+                parent = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if parent == pid:
+            children.append(int(entry))
+    return children
+
+
+def _memory_mb(pid: int) -> Optional[Dict[str, float]]:
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            fields = {line.split(":")[0]: int(line.split()[1]) for line in f if line.split()[-1] == "kB"}
+    except OSError:
+        return None
+    return {
+        "rss_mb": round(fields.get("Rss", 0) / 1024, 1),
+        "private_mb": round((fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)) / 1024, 1),
+        "shared_mb": round((fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)) / 1024, 1),
+    }
+
+
+def _worker_memory(server_pid: int, workers: int) -> Optional[List[Dict[str, float]]]:
+    if not os.path.isdir("/proc"):
+        return None
+    pids = _child_pids(server_pid) if workers > 1 else [server_pid]
+    return [m for m in (_memory_mb(pid) for pid in pids) if m is not None]
+
+
+async def run_workers(workers: int, args: argparse.Namespace, db_url: str) -> Dict[str, Any]:
+    llm_port, app_port = _free_port(), _free_port()
+    env = {**os.environ, "LLM_BASE_URL": f"http://127.0.0.1:{llm_port}/v1", "OPENAI_API_KEY": "stub"}
+    stub = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.join(script_dir, "stub_llm.py"),
+            f"--port={llm_port}",
+            f"--tokens-per-second={args.tokens_per_second}",
+            f"--first-token-ms={args.first_token_ms}",
+            f"--response-tokens={args.response_tokens}",
+        ],
+        env=env,
+    )
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.join(script_dir, "serve_stubbed_app.py"),
+            f"--port={app_port}",
+            f"--tool-latency-ms={args.tool_latency_ms}",
+            f"--workers={workers}",
+        ],
+        env=env,
+    )
+    try:
+        await _wait_until_up(f"http://127.0.0.1:{llm_port}/stats")
+        base_url = f"http://127.0.0.1:{app_port}"
+        await _wait_until_up(f"{base_url}/v1/health")
+        # Let every worker accept a few requests before measuring
+        async with httpx.AsyncClient(timeout=60) as client:
+            await asyncio.gather(*(client.get(f"{base_url}/v1/agents") for _ in range(workers * 4)))
+        scenario = await run_scenario(
+            base_url,
+            args.agent_id,
+            args.mode == "stream",
+            args.concurrency * workers,
+            args.requests,
+            db_url,
+            args.message,
+        )
+        memory = _worker_memory(server.pid, workers)
+    finally:
+        for process in (server, stub):
+            process.terminate()
+        for process in (server, stub):
+            process.wait(timeout=60)
+    return {"workers": workers, **scenario, "worker_memory": memory}
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    db_url = os.environ["DATABASE_URL"]
+    results = []
+    for workers in args.workers:
+        result = await run_workers(workers, args, db_url)
+        print(json.dumps(result), flush=True)
+        results.append(result)
+
+    baseline = results[0]["throughput_rps"] if results and results[0]["throughput_rps"] else None
+    for result in results:
+        result["speedup"] = (
+            round(result["throughput_rps"] / baseline, 2) if baseline and result["throughput_rps"] else None
+        )
+    return {"config": vars(args), "cpu_count": os.cpu_count(), "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark throughput against the number of worker processes.")
+    parser.add_argument("--agent-id", default="web_agent")
+    parser.add_argument("--message", default="Summarize the latest news about open source AI.")
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, os.cpu_count() or 1}))
+    parser.add_argument("--mode", choices=["stream", "non_stream"], default="non_stream")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent runs per worker.")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--tokens-per-second", type=float, default=2000.0)
+    parser.add_argument("--first-token-ms", type=float, default=5.0)
+    parser.add_argument("--response-tokens", type=int, default=50)
+    parser.add_argument("--tool-latency-ms", type=float, default=0.0)
+    parser.add_argument("--output", help="Optional path to write the JSON results.")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    print(json.dumps([{k: r[k] for k in ("workers", "throughput_rps", "speedup")} for r in results["results"]]))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,22 +3,27 @@
 Script to load the knowledge base for an agent.
 Usage:
     python scripts/load_agent_knowledge.py <agent_id>
+    python scripts/load_agent_knowledge.py --all [--processes N] [--per-agent-concurrency N] [--report PATH]
 """
 
 import argparse
 import asyncio
+import json
 import logging
 import os
 import sys
-
-from agno.agent import AgentKnowledge
-from agents.registry import AGENT_REGISTRY
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Set
 
 # Ensure the src directory is on the Python path
 script_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(script_dir, os.pardir))
 sys.path.insert(0, os.path.join(project_root, "src"))
 
+from agno.agent import AgentKnowledge  # noqa: E402
+from agents.registry import AGENT_REGISTRY  # noqa: E402
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -46,12 +51,146 @@ async def load_knowledge(agent_id: str) -> int:
     return 0
 
 
+def get_knowledge_agents() -> List[str]:
+    """Return the IDs of all registered agents that expose a knowledge getter."""
+    return [agent_id for agent_id, info in AGENT_REGISTRY.items() if info.get("knowledge_getter")]
+
+
+async def load_knowledge_with_report(agent_id: str, concurrency: int) -> Dict[str, Any]:
+    """
+    Load an agent's knowledge base, upserting up to `concurrency` document batches at once.
+
+    Args:
+        agent_id (str): The ID of the agent whose knowledge should be loaded.
+        concurrency (int): Maximum number of document batches embedded and upserted concurrently.
+
+    Returns:
+        Dict[str, Any]: Report with the elapsed time, number of chunks read and embeddings written.
+    """
+    report: Dict[str, Any] = {"agent_id": agent_id, "status": "success", "chunks": 0, "embeddings": 0, "error": None}
+    start = time.perf_counter()
+    try:
+        agent_knowledge: AgentKnowledge = AGENT_REGISTRY[agent_id]["knowledge_getter"]()
+        vector_db = agent_knowledge.vector_db
+        if vector_db is None:
+            raise ValueError("knowledge base has no vector db")
+        if not await vector_db.async_exists():
+            await vector_db.async_create()
+
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        in_flight: Set[asyncio.Task] = set()
+        errors: List[BaseException] = []
+
+        async def upsert(documents) -> None:
+            try:
+                await vector_db.async_upsert(documents=documents)
+            finally:
+                semaphore.release()
+            report["embeddings"] += sum(1 for doc in documents if doc.embedding is not None)
+
+        def finished(task: asyncio.Task) -> None:
+            in_flight.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                errors.append(task.exception())
+
+        try:
+            async for documents in agent_knowledge.async_document_lists:
+                report["chunks"] += len(documents)
+                # Only read on once a slot is free, so at most `concurrency` batches are held and upserted at once
+                await semaphore.acquire()
+                if errors:
+                    raise errors[0]
+                task = asyncio.create_task(upsert(documents))
+                in_flight.add(task)
+                task.add_done_callback(finished)
+            await asyncio.gather(*in_flight)
+            if errors:
+                raise errors[0]
+        finally:
+            for task in in_flight:
+                task.cancel()
+    except Exception as e:
+        logger.error(f"Error loading knowledge base for '{agent_id}': {e}")
+        report["status"] = "error"
+        report["error"] = str(e)
+
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    return report
+
+
+def _load_in_worker(agent_id: str, concurrency: int) -> Dict[str, Any]:
+    """Process pool entrypoint: run one agent's load on a fresh event loop."""
+    return asyncio.run(load_knowledge_with_report(agent_id, concurrency))
+
+
+def load_all_knowledge(processes: int, concurrency: int, report_path: Optional[str] = None) -> int:
+    """
+    Load the knowledge bases of every knowledge-backed agent concurrently across a process pool.
+
+    Args:
+        processes (int): Number of worker processes; each agent is loaded in its own process.
+        concurrency (int): Per-agent cap on concurrently upserted document batches.
+        report_path (Optional[str]): If set, the JSON summary report is also written to this path.
+
+    Returns:
+        int: 0 if every agent loaded successfully, 1 otherwise.
+    """
+    agent_ids = get_knowledge_agents()
+    if not agent_ids:
+        logger.warning("No agents with a registered knowledge base getter were found.")
+        return 0
+
+    logger.info(f"Loading knowledge for {len(agent_ids)} agent(s): {agent_ids}")
+    start = time.perf_counter()
+    reports: List[Dict[str, Any]] = []
+    with ProcessPoolExecutor(max_workers=max(1, min(processes, len(agent_ids)))) as pool:
+        futures = {pool.submit(_load_in_worker, agent_id, concurrency): agent_id for agent_id in agent_ids}
+        for future in as_completed(futures):
+            try:
+                reports.append(future.result())
+            except Exception as e:
+                reports.append({"agent_id": futures[future], "status": "error", "error": str(e)})
+
+    reports.sort(key=lambda r: r["agent_id"])
+    summary = {"total_seconds": round(time.perf_counter() - start, 3), "agents": reports}
+
+    logger.info(f"{'agent_id':<30} {'status':<8} {'seconds':>9} {'chunks':>8} {'embeddings':>11}")
+    for r in reports:
+        logger.info(
+            f"{r['agent_id']:<30} {r['status']:<8} {r.get('seconds', 0):>9} "
+            f"{r.get('chunks', 0):>8} {r.get('embeddings', 0):>11}"
+        )
+    logger.info(f"Loaded {len(reports)} knowledge base(s) in {summary['total_seconds']}s")
+
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump(summary, f, indent=2)
+        logger.info(f"Summary report written to {report_path}")
+
+    return 0 if all(r["status"] == "success" for r in reports) else 1
+
+
 def main():
-    parser = argparse.ArgumentParser(description="Load the knowledge base for a specific agent.")
-    parser.add_argument("agent_id", help="The ID of the agent to load knowledge for.")
+    parser = argparse.ArgumentParser(description="Load the knowledge base for a specific agent or for all agents.")
+    parser.add_argument("agent_id", nargs="?", help="The ID of the agent to load knowledge for.")
+    parser.add_argument("--all", action="store_true", help="Load every agent that has a knowledge base getter.")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="Worker processes used with --all.")
+    parser.add_argument(
+        "--per-agent-concurrency",
+        type=int,
+        default=4,
+        help="Maximum document batches embedded concurrently per agent with --all.",
+    )
+    parser.add_argument("--report", help="Optional path to write the --all JSON summary report.")
     args = parser.parse_args()
 
-    exit_code = asyncio.run(load_knowledge(args.agent_id))
+    if args.all == bool(args.agent_id):
+        parser.error("provide either an agent_id or --all")
+
+    if args.all:
+        exit_code = load_all_knowledge(args.processes, args.per_agent_concurrency, args.report)
+    else:
+        exit_code = asyncio.run(load_knowledge(args.agent_id))
     sys.exit(exit_code)
 
 
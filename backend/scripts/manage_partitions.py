@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Script to inspect, maintain and convert the monthly partitioned session and memory tables.
+
+Commands:
+    status    List the partitions of each table with their estimated rows and size.
+    maintain  Create upcoming partitions and archive expired ones, as the API does periodically.
+    convert   Rebuild existing unpartitioned tables as partitioned tables. Stop the API and workers
+              first: the old table is renamed to `<table>_unpartitioned`, its rows are copied into
+              the new one (with partitions from the month of its oldest row), and it is dropped with
+              `--drop-old` once the copy is done.
+Usage:
+    python scripts/manage_partitions.py status
+    python scripts/manage_partitions.py maintain
+    python scripts/manage_partitions.py convert [--tables agent_sessions team_sessions user_memories] [--drop-old]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+# Ensure the src directory is on the Python path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, os.pardir))
+sys.path.insert(0, os.path.join(project_root, "src"))
+
+from sqlalchemy import Table, text  # noqa: E402
+
+from db.partitions import (  # noqa: E402
+    PARTITION_KEY,
+    PARTITIONED_TABLES,
+    PartitionedTable,
+    create_partitioned_table,
+    forget_layout,
+    is_partitioned,
+    list_partitions,
+    maintain_partitions,
+)
+from db.session import db_engine  # noqa: E402
+from db.storage import CompactPostgresStorage  # noqa: E402
+from memory.db import IndexedPostgresMemoryDb  # noqa: E402
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TABLES = {table.name: table for table in PARTITIONED_TABLES}
+
+
+def _table_definition(table: PartitionedTable) -> Table:
+    """Return the unpartitioned definition of `table`, as the application creates it."""
+    if table.name == "user_memories":
+        return IndexedPostgresMemoryDb(
+            table_name=table.name, schema=table.schema, db_engine=db_engine, partitioned=False
+        ).table
+    mode = "team" if table.name == "team_sessions" else "agent"
+    return CompactPostgresStorage(
+        table_name=table.name, schema=table.schema, db_engine=db_engine, mode=mode, partitioned=False
+    ).table
+
+
+def status() -> Dict[str, Any]:
+    report: Dict[str, Any] = {}
+    for table in PARTITIONED_TABLES:
+        partitioned = is_partitioned(db_engine, table.schema, table.name)
+        if not partitioned:
+            report[table.name] = {"partitioned": partitioned}
+            continue
+        with db_engine.connect() as conn:
+            partitions = list_partitions(conn, table)
+            sizes = {
+                row.relname: {"rows_estimate": int(row.reltuples), "bytes": row.bytes}
+                for row in conn.execute(
+                    text(
+                        "SELECT c.relname, c.reltuples, pg_total_relation_size(c.oid) AS bytes "
+                        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                        "WHERE i.inhparent = to_regclass(:table)"
+                    ),
+                    {"table": table.fullname},
+                )
+            }
+        report[table.name] = {
+            "partitioned": True,
+            "partitions": {
+                name: {"month": month.isoformat() if month else "default", **sizes.get(name, {})}
+                for name, month in sorted(partitions.items(), key=lambda item: str(item[1]))
+            },
+        }
+    return report
+
+
+def convert(table: PartitionedTable, drop_old: bool) -> Dict[str, Any]:
+    """Rebuild `table` as a partitioned table and copy its rows over."""
+    layout = is_partitioned(db_engine, table.schema, table.name)
+    if layout is None:
+        return {"table": table.name, "skipped": "table does not exist"}
+    if layout:
+        return {"table": table.name, "skipped": "already partitioned"}
+
+    definition = _table_definition(table)
+    old_name = f"{table.name}_unpartitioned"
+    old = f"{table.schema}.{old_name}" if table.schema else old_name
+    now = "extract(epoch from now())::bigint" if table.key_type == "epoch" else "now()"
+    start = time.perf_counter()
+    with db_engine.begin() as conn:
+        indexes = (
+            conn.execute(
+                text("SELECT indexname FROM pg_indexes WHERE schemaname = :schema AND tablename = :table"),
+                {"schema": table.schema or "public", "table": table.name},
+            )
+            .scalars()
+            .all()
+        )
+        conn.execute(text(f"ALTER TABLE {table.fullname} RENAME TO {old_name}"))
+        # Free the index names for the indexes of the partitioned table
+        for index in indexes:
+            qualified = f"{table.schema}.{index}" if table.schema else index
+            conn.execute(text(f"ALTER INDEX {qualified} RENAME TO {index}_unpartitioned"))
+        oldest = conn.execute(text(f"SELECT min({PARTITION_KEY}) FROM {old}")).scalar()
+    forget_layout(table.schema, table.name)
+
+    if oldest is None:
+        first_month = None
+    elif table.key_type == "epoch":
+        first_month = datetime.fromtimestamp(oldest, tz=timezone.utc).date()
+    else:
+        first_month = oldest.astimezone(timezone.utc).date()
+    create_partitioned_table(db_engine, definition, table.key_type, first_month=first_month)
+
+    columns = [column.name for column in definition.columns]
+    selected = [f"coalesce({name}, {now})" if name == PARTITION_KEY else name for name in columns]
+    with db_engine.begin() as conn:
+        copied = conn.execute(
+            text(f"INSERT INTO {table.fullname} ({', '.join(columns)}) SELECT {', '.join(selected)} FROM {old}")
+        ).rowcount
+        if drop_old:
+            conn.execute(text(f"DROP TABLE {old}"))
+    with db_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql(f"ANALYZE {table.fullname}")
+    logger.info(f"Converted {table.fullname}: copied {copied} rows")
+    return {
+        "table": table.name,
+        "rows_copied": copied,
+        "first_month": first_month.isoformat() if first_month else None,
+        "old_table": None if drop_old else old,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the monthly partitions of the session and memory tables.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("status", help="List the partitions of each table.")
+    subparsers.add_parser("maintain", help="Create upcoming partitions and archive expired ones.")
+    convert_parser = subparsers.add_parser("convert", help="Rebuild unpartitioned tables as partitioned tables.")
+    convert_parser.add_argument("--tables", nargs="+", choices=sorted(TABLES), default=sorted(TABLES))
+    convert_parser.add_argument("--drop-old", action="store_true", help="Drop the old tables after copying them.")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        result: Any = status()
+    elif args.command == "maintain":
+        result = maintain_partitions(db_engine)
+    else:
+        result = [convert(TABLES[name], args.drop_old) for name in args.tables]
+    print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
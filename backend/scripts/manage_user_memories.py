@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Script to maintain the user_memories table.
+Usage:
+    python scripts/manage_user_memories.py migrate
+    python scripts/manage_user_memories.py backfill-embeddings [--batch-size N]
+    python scripts/manage_user_memories.py compact [--user-id USER_ID] [--model MODEL_ID]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from typing import Optional
+
+# Ensure the src directory is on the Python path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, os.pardir))
+sys.path.insert(0, os.path.join(project_root, "src"))
+
+from agno.embedder.openai import OpenAIEmbedder  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+
+from db.session import db_engine  # noqa: E402
+from llm.clients import get_model  # noqa: E402
+from memory.compaction import acompact_user_memories  # noqa: E402
+from memory.db import IndexedPostgresMemoryDb, migrate_memory_table  # noqa: E402
+from memory.settings import memory_settings  # noqa: E402
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def backfill_embeddings(batch_size: int) -> int:
+    embedder = OpenAIEmbedder(id=memory_settings.embedder_id, dimensions=memory_settings.embedding_dimensions)
+    db = IndexedPostgresMemoryDb(table_name="user_memories", db_engine=db_engine, embedder=embedder)
+    total = 0
+    while True:
+        rows = db.read_memories_without_embedding(limit=batch_size)
+        rows = [row for row in rows if row.memory.get("memory")]
+        if not rows:
+            break
+        for row in rows:
+            db.upsert_memory(row)
+        total += len(rows)
+        logger.info(f"Embedded {total} memories so far")
+    logger.info(f"Backfilled embeddings for {total} memories.")
+    return 0
+
+
+async def compact(user_id: Optional[str], model_id: str) -> int:
+    db = IndexedPostgresMemoryDb(table_name="user_memories", db_engine=db_engine)
+    if user_id:
+        user_ids = [user_id]
+    else:
+        with db.Session() as sess, sess.begin():
+            user_ids = [row[0] for row in sess.execute(select(db.table.c.user_id).distinct()) if row[0]]
+
+    model = get_model(model_id)
+    total = 0
+    for uid in user_ids:
+        total += await acompact_user_memories(db, model, uid)
+    logger.info(f"Compacted {total} memories across {len(user_ids)} user(s).")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the user_memories table.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser(
+        "migrate", help="Add the embedding column and the (user_id, created_at) index to an existing table."
+    )
+
+    backfill_parser = subparsers.add_parser("backfill-embeddings", help="Embed memories that have no embedding.")
+    backfill_parser.add_argument("--batch-size", type=int, default=100)
+
+    compact_parser = subparsers.add_parser("compact", help="Compact old memories into summaries.")
+    compact_parser.add_argument("--user-id", help="Only compact this user's memories.")
+    compact_parser.add_argument("--model", default="gpt-4.1", help="Model used to write the summaries.")
+
+    args = parser.parse_args()
+    if args.command == "migrate":
+        print(json.dumps(migrate_memory_table(db_engine), indent=2))
+        exit_code = 0
+    elif args.command == "backfill-embeddings":
+        exit_code = backfill_embeddings(args.batch_size)
+    else:
+        exit_code = asyncio.run(compact(args.user_id, args.model))
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Script to rewrite the agent and team session tables with a session storage codec.
+
+The `payload` column is first added to tables created before it, then every session is read
+(whatever its current encoding) and written back with `--codec`, keeping its `updated_at`. Reports, per table, the stored bytes per session and the time to load and save a
+sample of sessions before and after the migration; `--dry-run` only reports the current state and
+the size the sample would have with `--codec`.
+Usage:
+    python scripts/migrate_session_storage.py [--codec zstd] [--tables agent_sessions team_sessions]
+                                              [--sample 50] [--dry-run] [--report report.json]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+# Ensure the src directory is on the Python path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, os.pardir))
+sys.path.insert(0, os.path.join(project_root, "src"))
+
+from sqlalchemy import func, select  # noqa: E402
+
+from db.session import db_engine  # noqa: E402
+from db.settings import session_storage_settings  # noqa: E402
+from db.storage import CompactPostgresStorage, add_payload_column, has_payload_column  # noqa: E402
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Session table of each storage mode
+TABLES = {"agent_sessions": "agent", "team_sessions": "team"}
+
+
+def _row_bytes(storage: CompactPostgresStorage) -> Dict[str, Any]:
+    """Return the number of sessions and their average and total stored bytes, TOASTed columns included."""
+    size = func.pg_column_size(storage.table.table_valued())
+    with storage.Session() as sess:
+        count, total = sess.execute(select(func.count(), func.coalesce(func.sum(size), 0))).one()
+    return {"sessions": count, "bytes_total": int(total), "bytes_per_session": round(total / count) if count else 0}
+
+
+def _stored_codec(storage: CompactPostgresStorage, session_id: str) -> str:
+    with storage.Session() as sess:
+        compressed = sess.execute(
+            select(storage.table.c.payload.isnot(None)).where(storage.table.c.session_id == session_id)
+        ).scalar()
+    return "zstd" if compressed else "jsonb"
+
+
+def _timings(
+    storage: CompactPostgresStorage, session_ids: List[str], codec: Optional[str], save: bool = True
+) -> Dict[str, Any]:
+    """
+    Return the average milliseconds to load and, if `save`, to save the sessions of `session_ids`.
+
+    Sessions are saved with `codec`, or with the encoding they are stored with when it is None, so
+    timing the current encoding leaves them as they were.
+    """
+    load_seconds = save_seconds = 0.0
+    for session_id in session_ids:
+        session_codec = codec or (_stored_codec(storage, session_id) if save else None)
+        start = time.perf_counter()
+        session = storage.read(session_id)
+        load_seconds += time.perf_counter() - start
+        if session is None or not save:
+            continue
+        start = time.perf_counter()
+        storage.write(session, codec=session_codec, updated_at=session.updated_at)
+        save_seconds += time.perf_counter() - start
+    count = max(1, len(session_ids))
+    timings = {"load_ms": round(load_seconds / count * 1000, 2)}
+    if save:
+        timings["save_ms"] = round(save_seconds / count * 1000, 2)
+    return timings
+
+
+def migrate_table(table_name: str, codec: str, sample: int, dry_run: bool) -> Dict[str, Any]:
+    added_payload_column = False
+    if not dry_run and not has_payload_column(db_engine, "ai", table_name):
+        added_payload_column = add_payload_column(db_engine, "ai", table_name)
+    storage = CompactPostgresStorage(table_name=table_name, db_engine=db_engine, mode=TABLES[table_name], codec=codec)
+    if not storage.table_exists():
+        logger.info(f"{table_name} does not exist; nothing to migrate")
+        return {"table": table_name, "skipped": "table does not exist"}
+
+    session_ids = storage.get_all_session_ids()
+    sample_ids = session_ids[:sample]
+    report: Dict[str, Any] = {"table": table_name, "codec": codec, "added_payload_column": added_payload_column}
+    report["before"] = {**_row_bytes(storage), **_timings(storage, sample_ids, None, save=not dry_run)}
+
+    if dry_run:
+        sessions = [s for s in (storage.read(session_id) for session_id in sample_ids) if s is not None]
+        encoded = [storage.session_values(s, codec) for s in sessions]
+        sizes = [
+            sum(len(v) if isinstance(v, bytes) else len(json.dumps(v, default=str)) for v in values.values() if v)
+            for values in encoded
+        ]
+        report["projected_bytes_per_session"] = round(sum(sizes) / len(sizes)) if sizes else 0
+        return report
+
+    start = time.perf_counter()
+    migrated = 0
+    for session_id in session_ids:
+        session = storage.read(session_id)
+        if session is None:
+            continue
+        storage.write(session, codec=codec, updated_at=session.updated_at)
+        migrated += 1
+        if migrated % 500 == 0:
+            logger.info(f"Rewrote {migrated}/{len(session_ids)} sessions of {table_name}")
+    report["migrated"] = migrated
+    report["migration_seconds"] = round(time.perf_counter() - start, 2)
+
+    with db_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # Reclaim the space of the old row versions so the sizes below are what new reads pay for
+        conn.exec_driver_sql(f"VACUUM ANALYZE {storage.table.fullname}")
+    report["after"] = {**_row_bytes(storage), **_timings(storage, sample_ids, codec)}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rewrite the session tables with a session storage codec.")
+    parser.add_argument("--codec", choices=["jsonb", "zstd"], default=session_storage_settings.codec)
+    parser.add_argument("--tables", nargs="+", choices=sorted(TABLES), default=sorted(TABLES))
+    parser.add_argument("--sample", type=int, default=50, help="Sessions timed before and after.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report; do not rewrite any session.")
+    parser.add_argument("--report", help="Optional path to write the JSON report.")
+    args = parser.parse_args()
+
+    reports = [migrate_table(table_name, args.codec, args.sample, args.dry_run) for table_name in args.tables]
+    print(json.dumps(reports, indent=2))
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
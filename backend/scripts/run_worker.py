@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Execute background agent and team runs queued in Postgres, separately from the API processes.
+
+Requires RUN_QUEUE_BACKEND=postgres. Set RUN_QUEUE_API_CONCURRENCY=0 on the API to leave all
+background runs to these workers, and scale the number of worker processes independently.
+Usage:
+    python scripts/run_worker.py [--concurrency N]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import sys
+
+from dotenv import load_dotenv
+
+# Ensure the src directory is on the Python path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, os.pardir))
+sys.path.insert(0, os.path.join(project_root, "src"))
+
+load_dotenv()
+
+from memory.worker import memory_worker  # noqa: E402
+from runs.queue import PostgresRunQueue, run_queue  # noqa: E402
+from runs.settings import run_queue_settings  # noqa: E402
+from runs.worker import RunWorkerPool  # noqa: E402
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def serve(concurrency: int) -> None:
+    pool = RunWorkerPool(run_queue, concurrency=concurrency)
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopped.set)
+
+    await pool.start()
+    await stopped.wait()
+    logger.info("Stopping; waiting for running background runs")
+    await pool.stop()
+    await memory_worker.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Execute background runs queued in Postgres.")
+    parser.add_argument("--concurrency", type=int, default=run_queue_settings.worker_concurrency)
+    args = parser.parse_args()
+
+    if not isinstance(run_queue, PostgresRunQueue):
+        parser.error("background runs are only shared with worker processes when RUN_QUEUE_BACKEND=postgres")
+    asyncio.run(serve(args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
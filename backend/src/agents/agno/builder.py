@@ -3,9 +3,9 @@
 from pathlib import Path
 from typing import Optional
 
-from agno.tools.duckduckgo import DuckDuckGoTools
 from agents.base.builder import AgentConfig, BaseAgentBuilder
 from agno.agent import Agent
+from tools.web_search.builder import get_tools as get_web_search_tools
 from .knowledge import get_knowledge
 
 # Load prompts
@@ -18,7 +18,7 @@ cfg = AgentConfig(
     name="Agno Assist",
     description=DESCRIPTION,
     instructions=INSTRUCTIONS,
-    tools=[DuckDuckGoTools()],
+    tools=get_web_search_tools(),
     knowledge=get_knowledge(),
     search_knowledge=True,
 )
@@ -1,13 +1,24 @@
 """Module defining the base agent builder and AgentConfig dataclass for constructing agents."""
 
-from typing import List, Optional, Any
+from datetime import datetime
+from typing import Dict, List, Optional, Any
 from pydantic import BaseModel, Field
 
 from agno.agent import Agent
-from agno.memory.v2.memory import Memory
-from agno.memory.v2.db.postgres import PostgresMemoryDb
-from agno.models.openai import OpenAIChat
-from agno.storage.agent.postgres import PostgresAgentStorage
+from agno.embedder.openai import OpenAIEmbedder
+from agno.models.message import Message
+from agno.run.messages import RunMessages
+from agno.storage.session.agent import AgentSession
+
+from db.storage import CompactPostgresStorage
+from llm.clients import get_model
+from llm.settings import llm_settings
+from memory.db import IndexedPostgresMemoryDb
+from memory.retrieval import BoundedMemory
+from memory.session_compaction import SessionCompactor, session_compactor
+from memory.settings import memory_settings
+from tools.base.memo import ToolCallMemo, add_tool_memo_metrics
+from tools.base.settings import parallel_tool_call_settings, tool_memo_settings
 
 
 class AgentConfig(BaseModel):
@@ -17,6 +28,9 @@ class AgentConfig(BaseModel):
     description: str = Field(..., description="Description of the agent's purpose.")
     instructions: str = Field(..., description="Instructions guiding the agent's behavior.")
     model_id: str = Field("gpt-4.1", description="Language model identifier used by the agent.")
+    memory_model_id: Optional[str] = Field(
+        None, description="Model used for memory management; defaults to LLM_MEMORY_MODEL_ID, then model_id."
+    )
     history_runs: int = Field(3, description="Number of conversation history turns to include.")
     table_prefix: str = Field("", description="Prefix for database table names.")
     enable_memory: bool = Field(True, description="Whether to enable memory for the agent.")
@@ -24,11 +38,35 @@ class AgentConfig(BaseModel):
     debug_mode: bool = Field(False, description="Whether to enable debug mode.")
     knowledge: Optional[Any] = Field(None, description="Additional knowledge source for the agent.")
     search_knowledge: bool = Field(False, description="Whether to search knowledge base during execution.")
+    max_parallel_tool_calls: Optional[int] = Field(
+        None,
+        description="Tool calls of one model turn run at once (0 for no cap); defaults to TOOL_PARALLEL_MAX_CALLS.",
+    )
 
     class Config:
         arbitrary_types_allowed = True
 
 
+class BuiltAgent(Agent):
+    """Agent whose run metrics report its `ToolCallMemo` and whose session may be compacted."""
+
+    session_compactor: Optional[SessionCompactor] = None
+
+    def aggregate_metrics_from_messages(self, messages: List[Message]) -> Dict[str, Any]:
+        return add_tool_memo_metrics(self, super().aggregate_metrics_from_messages(messages))
+
+    def get_run_messages(self, *, session_id: str, **kwargs: Any) -> RunMessages:
+        if self.session_compactor is not None:
+            self.session_compactor.prepare_run(self, session_id)
+        return super().get_run_messages(session_id=session_id, **kwargs)
+
+    def write_to_storage(self, session_id: str, user_id: Optional[str] = None) -> Optional[AgentSession]:
+        session = super().write_to_storage(session_id=session_id, user_id=user_id)
+        if self.session_compactor is not None:
+            self.session_compactor.maybe_compact(self, session_id)
+        return session
+
+
 class BaseAgentBuilder:
     """
     Builder for creating Agent instances based on an AgentConfig.
@@ -48,46 +86,89 @@ class BaseAgentBuilder:
         Returns:
             Agent: The constructed agent instance.
         """
-        from db.session import db_url
+        from db.session import db_engine
 
-        return Agent(
+        memo = ToolCallMemo(tool_memo_settings.ttl_seconds) if tool_memo_settings.enabled else None
+        agent = BuiltAgent(
             name=self.cfg.name,
             agent_id=self.cfg.agent_id,
             description=self.cfg.description,
             instructions=self.cfg.instructions,
             knowledge=self.cfg.knowledge,
             search_knowledge=self.cfg.search_knowledge,
-            model=OpenAIChat(id=self.cfg.model_id),
-            tools=self.cfg.tools,
+            model=get_model(self.cfg.model_id, tool_call_concurrency=self._tool_call_concurrency()),
+            tools=memo.memoize(self.cfg.tools) if memo is not None else self.cfg.tools,
             user_id=self.user_id,
             session_id=self.session_id,
-            storage=PostgresAgentStorage(
+            storage=CompactPostgresStorage(
                 table_name="agent_sessions",
-                db_url=db_url,
+                db_engine=db_engine,
             ),
             add_history_to_messages=True,
             num_history_runs=self.cfg.history_runs,
             read_chat_history=True,
             markdown=self.cfg.markdown,
             memory=self._memory() if self.cfg.enable_memory else None,
-            enable_agentic_memory=self.cfg.enable_memory,
-            add_state_in_messages=True,
-            add_datetime_to_instructions=True,
+            # In deferred mode memories are extracted by memory.worker after the run instead
+            enable_agentic_memory=self.cfg.enable_memory and memory_settings.mode == "inline",
+            add_memory_references=self.cfg.enable_memory,
             debug_mode=self.cfg.debug_mode,
+            **self._prompt_layout(),
         )
+        if memo is not None:
+            memo.attach(agent)
+        if session_compactor.enabled:
+            session_compactor.attach(agent)
+        return agent
+
+    def _tool_call_concurrency(self) -> Optional[int]:
+        """Return the cap on the concurrent tool calls of one model turn, None for no cap."""
+        cap = self.cfg.max_parallel_tool_calls
+        if cap is None:
+            cap = parallel_tool_call_settings.max_calls
+        return cap if cap > 0 else None
 
-    def _memory(self) -> Memory:
+    def _prompt_layout(self) -> Dict[str, Any]:
+        """
+        Return the Agent arguments placing the per-request parts of the prompt, following ``LLM_PROMPT_LAYOUT``.
+
+        In "cache_friendly" layout the system prompt only holds the description, instructions and tool
+        instructions (and user memories, last), so it is identical across a user's requests; the current
+        time is sent as context at the end of the user message instead. State variables such as
+        ``{current_user_id}`` are still resolved in the instructions.
+
+        Returns:
+            Dict[str, Any]: Keyword arguments for the Agent.
+        """
+        if llm_settings.prompt_layout == "default":
+            return {"add_state_in_messages": True, "add_datetime_to_instructions": True}
+        return {
+            "add_state_in_messages": True,
+            "add_datetime_to_instructions": False,
+            # Resolved by agno at the start of each run
+            "context": {"current_time": lambda: datetime.now().astimezone().isoformat(timespec="seconds")},
+            "add_context": True,
+        }
+
+    def _memory(self) -> BoundedMemory:
         """
         Create and return a Memory instance for the agent.
 
+        Memories are read through the indexed memory db, bounded by ``MEMORY_RETRIEVAL``.
+
         Returns:
-            Memory: Configured memory component for the agent.
+            BoundedMemory: Configured memory component for the agent.
         """
-        from db.session import db_url
+        from db.session import db_engine
+
+        embedder = None
+        if memory_settings.retrieval == "vector":
+            embedder = OpenAIEmbedder(id=memory_settings.embedder_id, dimensions=memory_settings.embedding_dimensions)
 
-        return Memory(
-            model=OpenAIChat(id=self.cfg.model_id),
-            db=PostgresMemoryDb(table_name="user_memories", db_url=db_url),
+        memory_model_id = self.cfg.memory_model_id or llm_settings.memory_model_id or self.cfg.model_id
+        return BoundedMemory(
+            model=get_model(memory_model_id, usage_role="memory"),
+            db=IndexedPostgresMemoryDb(table_name="user_memories", db_engine=db_engine, embedder=embedder),
             delete_memories=False,
             clear_memories=False,
         )
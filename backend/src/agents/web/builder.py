@@ -3,9 +3,9 @@
 from pathlib import Path
 from typing import Optional
 
-from agno.tools.duckduckgo import DuckDuckGoTools
 from agents.base.builder import AgentConfig, BaseAgentBuilder
 from agno.agent import Agent
+from tools.web_search.builder import get_tools as get_web_search_tools
 
 # Load prompts
 PROMPT_DIR = Path(__file__).parent / "prompts"
@@ -17,7 +17,7 @@ cfg = AgentConfig(
     name="Web Search Agent",
     description=DESCRIPTION,
     instructions=INSTRUCTIONS,
-    tools=[DuckDuckGoTools()],
+    tools=get_web_search_tools(),
 )
 
 
@@ -3,10 +3,10 @@
 from pathlib import Path
 from typing import Optional
 
-from agno.tools.duckduckgo import DuckDuckGoTools
-from agno.tools.yfinance import YFinanceTools
 from agents.base.builder import AgentConfig, BaseAgentBuilder
 from agno.agent import Agent
+from tools.web_search.builder import get_tools as get_web_search_tools
+from tools.market_data.builder import get_tools as get_market_data_tools
 
 # Load prompts
 PROMPT_DIR = Path(__file__).parent / "prompts"
@@ -18,17 +18,7 @@ cfg = AgentConfig(
     name="YFinance Agent",
     description=DESCRIPTION,
     instructions=INSTRUCTIONS,
-    tools=[
-        DuckDuckGoTools(),
-        YFinanceTools(
-            stock_price=True,
-            analyst_recommendations=True,
-            stock_fundamentals=True,
-            historical_prices=True,
-            company_info=True,
-            company_news=True,
-        ),
-    ],
+    tools=[*get_web_search_tools(), *get_market_data_tools()],
 )
 
 
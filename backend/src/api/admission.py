@@ -0,0 +1,203 @@
+"""Admission control for agent runs.
+
+Every run of ``/agents/{agent_id}/runs`` takes a slot from the process-wide
+``admission_controller`` before the agent is built and gives it back once the response has
+finished (streaming included). A run is admitted when it fits under the global, per-user and
+per-agent concurrency caps; otherwise it waits in a bounded FIFO queue for up to
+``admission_queue_timeout_seconds`` and is rejected with ``AdmissionRejected`` when the queue
+is full or the wait times out. Slots freed by a finished run are handed to waiting runs first; a run
+blocked only by its own per-user or per-agent cap does not hold up runs of other users or agents.
+"""
+
+import asyncio
+import math
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional
+
+from api.settings import api_settings
+
+
+class AdmissionRejected(Exception):
+    """Raised when a run cannot be admitted; `retry_after` is a hint in whole seconds."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Run rejected by admission control ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class AdmissionTicket:
+    controller: "AdmissionController"
+    user_id: Optional[str]
+    agent_id: str
+    admitted_at: float = field(default_factory=time.monotonic)
+    released: bool = False
+
+    def release(self) -> None:
+        """Give the slot back. Safe to call more than once."""
+        if not self.released:
+            self.released = True
+            self.controller._release(self)
+
+
+@dataclass
+class _Waiter:
+    user_id: Optional[str]
+    agent_id: str
+    future: "asyncio.Future[AdmissionTicket]"
+
+
+class AdmissionController:
+    """Concurrency caps with a bounded wait queue. Must be used from the event loop."""
+
+    def __init__(
+        self,
+        max_concurrent_runs: Optional[int],
+        max_runs_per_user: Optional[int],
+        max_runs_per_agent: Optional[int],
+        max_queue_size: int,
+        queue_timeout_seconds: float,
+        retry_after_seconds: int,
+    ):
+        self.max_concurrent_runs = max_concurrent_runs
+        self.max_runs_per_user = max_runs_per_user
+        self.max_runs_per_agent = max_runs_per_agent
+        self.max_queue_size = max_queue_size
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self._active = 0
+        self._active_by_user: Dict[str, int] = defaultdict(int)
+        self._active_by_agent: Dict[str, int] = defaultdict(int)
+        self._waiters: Deque[_Waiter] = deque()
+        self._avg_run_seconds: Optional[float] = None
+        self._metrics: Dict[str, float] = {
+            "admitted": 0,
+            "admitted_after_wait": 0,
+            "rejected_queue_full": 0,
+            "rejected_timeout": 0,
+            "max_queue_depth": 0,
+            "queue_wait_seconds_total": 0.0,
+        }
+
+    def _has_capacity(self, user_id: Optional[str], agent_id: str) -> bool:
+        if self.max_concurrent_runs is not None and self._active >= self.max_concurrent_runs:
+            return False
+        if (
+            user_id is not None
+            and self.max_runs_per_user is not None
+            and self._active_by_user.get(user_id, 0) >= self.max_runs_per_user
+        ):
+            return False
+        if self.max_runs_per_agent is not None and self._active_by_agent.get(agent_id, 0) >= self.max_runs_per_agent:
+            return False
+        return True
+
+    def _admit(self, user_id: Optional[str], agent_id: str) -> AdmissionTicket:
+        self._active += 1
+        if user_id is not None:
+            self._active_by_user[user_id] += 1
+        self._active_by_agent[agent_id] += 1
+        self._metrics["admitted"] += 1
+        return AdmissionTicket(controller=self, user_id=user_id, agent_id=agent_id)
+
+    def _release(self, ticket: AdmissionTicket) -> None:
+        self._active -= 1
+        if ticket.user_id is not None:
+            self._active_by_user[ticket.user_id] -= 1
+            if not self._active_by_user[ticket.user_id]:
+                del self._active_by_user[ticket.user_id]
+        self._active_by_agent[ticket.agent_id] -= 1
+        if not self._active_by_agent[ticket.agent_id]:
+            del self._active_by_agent[ticket.agent_id]
+
+        run_seconds = time.monotonic() - ticket.admitted_at
+        self._avg_run_seconds = (
+            run_seconds if self._avg_run_seconds is None else 0.9 * self._avg_run_seconds + 0.1 * run_seconds
+        )
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        # Admit waiters in FIFO order; a waiter blocked by its own per-user or per-agent cap
+        # does not hold up the waiters behind it.
+        for waiter in list(self._waiters):
+            if waiter.future.done():
+                self._waiters.remove(waiter)
+            elif self._has_capacity(waiter.user_id, waiter.agent_id):
+                self._waiters.remove(waiter)
+                waiter.future.set_result(self._admit(waiter.user_id, waiter.agent_id))
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        self._metrics[f"rejected_{reason}"] += 1
+        retry_after = self._avg_run_seconds if self._avg_run_seconds is not None else self.retry_after_seconds
+        return AdmissionRejected(reason, retry_after=max(1, math.ceil(retry_after)))
+
+    async def acquire(self, user_id: Optional[str], agent_id: str) -> AdmissionTicket:
+        """
+        Wait for a run slot.
+
+        Args:
+            user_id (Optional[str]): The user starting the run; runs without one skip the per-user cap.
+            agent_id (str): The agent being run.
+
+        Returns:
+            AdmissionTicket: The slot, to be released once the run has finished.
+
+        Raises:
+            AdmissionRejected: If the wait queue is full or the wait timed out.
+        """
+        # Earlier waiters that fit get their slot first; waiters still queued are held by a cap
+        # this run may not share, e.g. their own per-user cap, so they do not make it wait
+        self._wake_waiters()
+        if self._has_capacity(user_id, agent_id):
+            return self._admit(user_id, agent_id)
+        if len(self._waiters) >= self.max_queue_size:
+            raise self._reject("queue_full")
+
+        waiter = _Waiter(user_id=user_id, agent_id=agent_id, future=asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        self._metrics["max_queue_depth"] = max(self._metrics["max_queue_depth"], len(self._waiters))
+        start = time.monotonic()
+        try:
+            ticket = await asyncio.wait_for(waiter.future, self.queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            # The slot may have been handed over in the same loop iteration as the timeout fired
+            if not waiter.future.done() or waiter.future.cancelled():
+                raise self._reject("timeout")
+            ticket = waiter.future.result()
+        except asyncio.CancelledError:
+            # The slot may have been handed over just as the wait was cancelled
+            if waiter.future.done() and not waiter.future.cancelled():
+                waiter.future.result().release()
+            raise
+        finally:
+            self._metrics["queue_wait_seconds_total"] += time.monotonic() - start
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        self._metrics["admitted_after_wait"] += 1
+        return ticket
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return a snapshot of the admission counters."""
+        waited = self._metrics["admitted_after_wait"] + self._metrics["rejected_timeout"]
+        return {
+            **self._metrics,
+            "active_runs": self._active,
+            "queue_depth": len(self._waiters),
+            "active_runs_by_agent": dict(self._active_by_agent),
+            "avg_queue_wait_seconds": self._metrics["queue_wait_seconds_total"] / waited if waited else 0.0,
+            "avg_run_seconds": self._avg_run_seconds,
+        }
+
+
+# Create the process-wide AdmissionController
+admission_controller = AdmissionController(
+    max_concurrent_runs=api_settings.admission_max_concurrent_runs,
+    max_runs_per_user=api_settings.admission_max_runs_per_user,
+    max_runs_per_agent=api_settings.admission_max_runs_per_agent,
+    max_queue_size=api_settings.admission_max_queue_size,
+    queue_timeout_seconds=api_settings.admission_queue_timeout_seconds,
+    retry_after_seconds=api_settings.admission_retry_after_seconds,
+)
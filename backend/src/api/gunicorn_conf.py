@@ -0,0 +1,39 @@
+"""
+Gunicorn settings for serving the app with multiple preloaded uvicorn workers.
+Set the number of workers with WEB_CONCURRENCY (default: one per CPU core) rather than --workers,
+so the Postgres pool of each worker is sized for it.
+Usage (from the src directory):
+    gunicorn api.main:app -c python:api.gunicorn_conf
+"""
+
+import os
+
+from api.serving import default_workers, freeze_preloaded_state, reset_after_fork
+from api.settings import api_settings
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = default_workers()
+worker_class = "api.serving.DrainingUvicornWorker"
+# Import the app once in the master and fork the workers from it
+preload_app = True
+timeout = 60
+# Workers drain in-flight runs on SIGTERM (see api.lifecycle) before they are killed
+graceful_timeout = (
+    int(
+        api_settings.shutdown_drain_delay_seconds
+        + api_settings.shutdown_timeout_seconds
+        + api_settings.shutdown_flush_timeout_seconds
+    )
+    + 5
+)
+
+# Read by db.session in the preloaded app to size each worker's share of DB_POOL_MAX_CONNECTIONS
+os.environ.setdefault("WEB_CONCURRENCY", str(workers))
+
+
+def when_ready(server):
+    freeze_preloaded_state()
+
+
+def post_fork(server, worker):
+    reset_after_fork()
@@ -0,0 +1,167 @@
+"""Liveness and readiness of an API worker.
+
+Liveness only says the process answers requests, so a worker is restarted when its event loop is
+stuck but never because a dependency is down. Readiness says whether the worker should receive
+traffic and checks, reporting each check's latency:
+
+- ``database``: ``SELECT 1`` through the shared pool, within ``readiness_db_timeout_seconds``. It is
+  failed without a query while the pool is saturated, since the checkout would hold a thread for the
+  pool's timeout.
+- ``db_pool``: the share of the pool's connections checked out, below ``readiness_max_pool_usage``.
+- ``event_loop``: the lag of a timer on the event loop, below ``readiness_max_loop_lag_seconds``.
+- ``registries``: agents, teams and tools were discovered.
+- ``lifecycle``: the worker is not draining for shutdown.
+
+The result is cached for ``readiness_cache_seconds`` and concurrent probes share one check, so
+frequent probes from several load balancers cost a single query per interval.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+from api.lifecycle import server_lifecycle
+from api.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """Measures how late a periodic timer fires on the event loop."""
+
+    def __init__(self, interval: float = 0.25):
+        self.interval = interval
+        self.lag_seconds = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lag_seconds = max(0.0, loop.time() - expected)
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+class ReadinessChecker:
+    """Runs the readiness checks of this worker and caches their result."""
+
+    def __init__(self, loop_lag: LoopLagMonitor):
+        self.loop_lag = loop_lag
+        self._result: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def _check_database(self, db_pool: Dict[str, Any]) -> Dict[str, Any]:
+        from db.session import db_engine
+
+        if db_pool["saturated"]:
+            return {"ok": False, "latency_ms": 0.0, "error": "pool saturated; query skipped"}
+
+        def select_one() -> None:
+            with db_engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.to_thread(select_one), api_settings.readiness_db_timeout_seconds)
+        except asyncio.TimeoutError:
+            return {"ok": False, "latency_ms": _elapsed_ms(start), "error": "timed out"}
+        except Exception as e:
+            return {"ok": False, "latency_ms": _elapsed_ms(start), "error": str(e)}
+        return {"ok": True, "latency_ms": _elapsed_ms(start)}
+
+    def _check_db_pool(self) -> Dict[str, Any]:
+        from db.session import db_engine
+
+        start = time.perf_counter()
+        pool = db_engine.pool
+        checked_out = pool.checkedout()
+        max_overflow = getattr(pool, "_max_overflow", 0)
+        capacity = pool.size() + max(max_overflow, 0)
+        usage = checked_out / capacity if capacity else 0.0
+        return {
+            "ok": usage < api_settings.readiness_max_pool_usage,
+            "latency_ms": _elapsed_ms(start),
+            "checked_out": checked_out,
+            "capacity": capacity,
+            "usage": round(usage, 3),
+            # A checkout would wait for a connection to be returned (a negative max_overflow is unbounded)
+            "saturated": max_overflow >= 0 and checked_out >= capacity,
+        }
+
+    async def _check_event_loop(self) -> Dict[str, Any]:
+        # The monitor's last measurement, and how long this check waited to be scheduled again
+        start = time.perf_counter()
+        await asyncio.sleep(0)
+        lag = max(self.loop_lag.lag_seconds, time.perf_counter() - start)
+        return {
+            "ok": lag < api_settings.readiness_max_loop_lag_seconds,
+            "latency_ms": _elapsed_ms(start),
+            "lag_ms": round(lag * 1000, 2),
+        }
+
+    def _check_registries(self) -> Dict[str, Any]:
+        from agents.registry import AGENT_REGISTRY
+        from teams.registry import TEAM_REGISTRY
+        from tools.registry import TOOL_REGISTRY
+
+        start = time.perf_counter()
+        counts = {"agents": len(AGENT_REGISTRY), "teams": len(TEAM_REGISTRY), "tools": len(TOOL_REGISTRY)}
+        return {"ok": counts["agents"] > 0, "latency_ms": _elapsed_ms(start), **counts}
+
+    async def _check(self) -> Dict[str, Any]:
+        db_pool = self._check_db_pool()
+        database, event_loop = await asyncio.gather(self._check_database(db_pool), self._check_event_loop())
+        checks = {
+            "database": database,
+            "db_pool": db_pool,
+            "event_loop": event_loop,
+            "registries": self._check_registries(),
+            "lifecycle": {"ok": not server_lifecycle.draining, "draining": server_lifecycle.draining},
+        }
+        for name, check in checks.items():
+            if not check["ok"]:
+                logger.warning(f"Readiness check '{name}' failed: {check}")
+        return {"status": "ready" if all(c["ok"] for c in checks.values()) else "not_ready", "checks": checks}
+
+    async def check(self) -> Dict[str, Any]:
+        """
+        Return the readiness of this worker, checked at most once every `readiness_cache_seconds`.
+
+        Returns:
+            Dict[str, Any]: `status` ("ready" or "not_ready"), the result of each check and `age_seconds`,
+            the age of the cached result.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._result is None or time.monotonic() - self._checked_at >= api_settings.readiness_cache_seconds:
+                self._result = await self._check()
+                self._checked_at = time.monotonic()
+        result = self._result
+        if server_lifecycle.draining and result["status"] == "ready":
+            # Draining must show at once, not after the cache expires
+            checks = {**result["checks"], "lifecycle": {"ok": False, "draining": True}}
+            result = {**result, "status": "not_ready", "checks": checks}
+        return {**result, "age_seconds": round(time.monotonic() - self._checked_at, 3)}
+
+
+# Create the process-wide LoopLagMonitor and ReadinessChecker
+loop_lag_monitor = LoopLagMonitor()
+readiness_checker = ReadinessChecker(loop_lag_monitor)
@@ -0,0 +1,104 @@
+"""Graceful shutdown of an API worker.
+
+On SIGTERM the worker starts draining: readiness on ``/v1/health`` turns to 503 and new runs
+are rejected with a 503, while streams and runs already in progress carry on. After
+``shutdown_drain_delay_seconds`` the signal is passed on to uvicorn, which stops accepting
+connections and waits for open requests; the app's lifespan then calls ``shutdown``:
+
+1. Background run workers stop claiming jobs; streamed and background runs still in progress get
+   until ``shutdown_timeout_seconds`` after draining began to finish and are cancelled after that.
+   A cancelled run is not persisted, since agno writes the session only once a run completes.
+2. Queued memory updates are flushed and running session compactions finish, together within
+   ``shutdown_flush_timeout_seconds``; what is left after that is dropped.
+3. The shared model provider clients and the Postgres pool are closed.
+"""
+
+import asyncio
+import logging
+import signal
+import time
+from typing import Any, Dict, Optional
+
+from api.replay import drain_run_streams
+from api.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+
+class ServerLifecycle:
+    """Draining state of this worker process."""
+
+    def __init__(self):
+        self.draining = False
+        self.draining_since: Optional[float] = None
+        self._metrics: Dict[str, float] = {"runs_rejected_while_draining": 0, "runs_cancelled_on_shutdown": 0}
+
+    def begin_draining(self) -> None:
+        """Report not ready and reject new runs from now on."""
+        from runs.worker import run_worker_pool
+
+        if not self.draining:
+            self.draining = True
+            self.draining_since = time.monotonic()
+            run_worker_pool.stop_claiming()
+            logger.info("Draining: no longer accepting new runs")
+
+    def reject_run(self) -> None:
+        self._metrics["runs_rejected_while_draining"] += 1
+
+    def install_signal_handler(self) -> None:
+        """
+        Begin draining on SIGTERM, passing the signal on to the server's own handler after
+        `shutdown_drain_delay_seconds`. Must be called from the event loop once the server has
+        installed its handlers, i.e. during lifespan startup.
+        """
+        server_handler = signal.getsignal(signal.SIGTERM)
+        if not callable(server_handler):
+            return
+        loop = asyncio.get_running_loop()
+
+        def handle_sigterm(signum: int, frame: Any) -> None:
+            self.begin_draining()
+            loop.call_soon_threadsafe(
+                loop.call_later, api_settings.shutdown_drain_delay_seconds, server_handler, signum, frame
+            )
+
+        signal.signal(signal.SIGTERM, handle_sigterm)
+
+    def remaining_seconds(self) -> float:
+        """Seconds left of `shutdown_timeout_seconds`, counted from the end of the drain delay after draining began."""
+        if self.draining_since is None:
+            return api_settings.shutdown_timeout_seconds
+        elapsed = time.monotonic() - self.draining_since - api_settings.shutdown_drain_delay_seconds
+        return max(0.0, api_settings.shutdown_timeout_seconds - max(0.0, elapsed))
+
+    async def shutdown(self) -> None:
+        """Drain in-flight runs and release the process's resources."""
+        from db.partitions import partition_maintainer
+        from db.session import db_engine
+        from llm.clients import close_model_clients
+        from memory.session_compaction import session_compactor
+        from memory.worker import memory_worker
+        from runs.worker import run_worker_pool
+        from tools.base.executor import tool_executor
+
+        self.begin_draining()
+        partition_maintainer.stop()
+        await run_worker_pool.stop(timeout=self.remaining_seconds())
+        self._metrics["runs_cancelled_on_shutdown"] += await drain_run_streams(self.remaining_seconds())
+        flush_deadline = time.monotonic() + api_settings.shutdown_flush_timeout_seconds
+        await memory_worker.stop(timeout=api_settings.shutdown_flush_timeout_seconds)
+        await session_compactor.stop(timeout=max(0.0, flush_deadline - time.monotonic()))
+        # Runs have finished or been cancelled; calls still waiting for a thread have nobody to return to
+        tool_executor.shutdown()
+        await close_model_clients()
+        db_engine.dispose()
+        logger.info(f"Shut down: {self._metrics}")
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return the draining state and counters."""
+        return {**self._metrics, "draining": self.draining}
+
+
+# Create the process-wide ServerLifecycle
+server_lifecycle = ServerLifecycle()
@@ -1,3 +1,7 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
@@ -13,7 +17,39 @@ logging.basicConfig(level=level)
 logging.getLogger("uvicorn.error").setLevel(level)
 logging.getLogger("uvicorn.access").setLevel(level)
 
+from api.health import loop_lag_monitor  # noqa: E402
+from api.lifecycle import server_lifecycle  # noqa: E402
 from api.routes.v1_router import v1_router  # noqa: E402
+from db.partitions import partition_maintainer  # noqa: E402
+from db.settings import partition_settings  # noqa: E402
+from memory.db import warm_memory_table  # noqa: E402
+from runs.worker import run_worker_pool  # noqa: E402
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Start the background components, and drain in-flight runs before the process exits"""
+
+    server_lifecycle.install_signal_handler()
+    loop_lag_monitor.start()
+    # Read the memory table's columns and layout once, instead of on the first agent build of each worker
+    from db.session import db_engine
+
+    try:
+        await asyncio.to_thread(warm_memory_table, db_engine)
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"Could not read the memory table at startup: {e}")
+    # Execute background runs on this process, when it takes part in running them
+    if run_worker_pool.concurrency > 0:
+        await run_worker_pool.start()
+    # Create upcoming partitions and archive expired ones while the API runs
+    if partition_settings.enabled:
+        partition_maintainer.start()
+    try:
+        yield
+    finally:
+        await server_lifecycle.shutdown()
+        loop_lag_monitor.stop()
 
 
 def create_app() -> FastAPI:
@@ -26,6 +62,7 @@ def create_app() -> FastAPI:
         docs_url="/docs" if api_settings.docs_enabled else None,
         redoc_url="/redoc" if api_settings.docs_enabled else None,
         openapi_url="/openapi.json" if api_settings.docs_enabled else None,
+        lifespan=lifespan,
     )
 
     # Add v1 router
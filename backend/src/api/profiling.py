@@ -0,0 +1,160 @@
+"""Opt-in per-request profiling for agent runs.
+
+A profiled request is sampled from start (builder construction) to the end of the response
+(streaming included) and the report is stored under ``ApiSettings.profiling_dir`` keyed by
+request id. pyinstrument is used when installed, since it attributes time per async task;
+otherwise cProfile is used, which also counts whatever else ran on the event loop meanwhile.
+Neither can run two profilers at once in a process, so a request that would overlap a profiled
+one is not profiled.
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+
+from fastapi import Request
+
+from api.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    from pyinstrument import Profiler as _PyinstrumentProfiler
+except ImportError:
+    _PyinstrumentProfiler = None
+
+_recent_profiles: Deque[float] = deque()
+_rate_lock = threading.Lock()
+# Held by the profile running in this process, if any
+_active_lock = threading.Lock()
+
+
+class RequestProfile:
+    """Profiler for a single request; `stop` writes the report to the profiling directory."""
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self._profiler = _PyinstrumentProfiler(async_mode="enabled") if _PyinstrumentProfiler else cProfile.Profile()
+        self._stopped = False
+
+    def start(self) -> Optional["RequestProfile"]:
+        """Start profiling; return None, without profiling, if another profile is running or the profiler fails."""
+        if not _active_lock.acquire(blocking=False):
+            logger.debug(f"Another request is being profiled; not profiling request '{self.request_id}'")
+            self._stopped = True
+            return None
+        try:
+            if isinstance(self._profiler, cProfile.Profile):
+                self._profiler.enable()
+            else:
+                self._profiler.start()
+        except Exception as e:
+            _active_lock.release()
+            self._stopped = True
+            logger.warning(f"Could not start profiling request '{self.request_id}': {e}")
+            return None
+        return self
+
+    def stop(self) -> Optional[Path]:
+        """Stop profiling and store the report. Safe to call more than once."""
+        if self._stopped:
+            return None
+        self._stopped = True
+
+        try:
+            if isinstance(self._profiler, cProfile.Profile):
+                self._profiler.disable()
+            else:
+                self._profiler.stop()
+        finally:
+            _active_lock.release()
+
+        profiles_dir = Path(api_settings.profiling_dir)
+        profiles_dir.mkdir(parents=True, exist_ok=True)
+        if isinstance(self._profiler, cProfile.Profile):
+            stream = io.StringIO()
+            pstats.Stats(self._profiler, stream=stream).sort_stats("cumulative").print_stats(100)
+            path = profiles_dir / f"{self.request_id}.txt"
+            path.write_text(stream.getvalue())
+        else:
+            path = profiles_dir / f"{self.request_id}.html"
+            path.write_text(self._profiler.output_html())
+
+        _prune_reports(profiles_dir)
+        logger.info(f"Stored profile for request '{self.request_id}' at {path}")
+        return path
+
+
+def _within_rate_limit() -> bool:
+    now = time.monotonic()
+    with _rate_lock:
+        while _recent_profiles and now - _recent_profiles[0] > 60:
+            _recent_profiles.popleft()
+        if len(_recent_profiles) >= api_settings.profiling_max_per_minute:
+            return False
+        _recent_profiles.append(now)
+        return True
+
+
+def _prune_reports(profiles_dir: Path) -> None:
+    reports = sorted(profiles_dir.iterdir(), key=lambda p: p.stat().st_mtime)
+    for path in reports[: max(0, len(reports) - api_settings.profiling_max_reports)]:
+        path.unlink(missing_ok=True)
+
+
+def start_request_profile(request: Request, request_id: str) -> Optional[RequestProfile]:
+    """
+    Start profiling the request if profiling is enabled and it is requested or sampled.
+
+    Args:
+        request (Request): The incoming request, checked for the profiling header.
+        request_id (str): Identifier the report is stored under.
+
+    Returns:
+        Optional[RequestProfile]: The running profile, or None if the request is not profiled.
+    """
+    if not api_settings.profiling_enabled:
+        return None
+    requested = request.headers.get(api_settings.profiling_header, "").lower() in ("1", "true", "yes")
+    if not requested and random.random() >= api_settings.profiling_sample_rate:
+        return None
+    if not _within_rate_limit():
+        logger.debug(f"Profiling rate limit reached; not profiling request '{request_id}'")
+        return None
+    return RequestProfile(request_id).start()
+
+
+def list_profiles() -> List[Dict[str, object]]:
+    """Return metadata for the stored profile reports, newest first."""
+    profiles_dir = Path(api_settings.profiling_dir)
+    if not profiles_dir.is_dir():
+        return []
+    reports = sorted(profiles_dir.iterdir(), key=lambda p: p.stat().st_mtime, reverse=True)
+    return [
+        {
+            "request_id": path.stem,
+            "format": path.suffix.lstrip("."),
+            "size_bytes": path.stat().st_size,
+            "created_at": path.stat().st_mtime,
+        }
+        for path in reports
+    ]
+
+
+def get_profile_path(request_id: str) -> Optional[Path]:
+    """Return the report path for `request_id`, if one is stored."""
+    profiles_dir = Path(api_settings.profiling_dir)
+    for suffix in (".html", ".txt"):
+        path = profiles_dir / f"{request_id}{suffix}"
+        # Guard against path traversal through the request id
+        if os.path.dirname(path.resolve()) == str(profiles_dir.resolve()) and path.is_file():
+            return path
+    return None
@@ -0,0 +1,433 @@
+"""Resumable streaming of agent runs.
+
+A streamed run is produced by its own task into a ``RunStream`` registered under the run's
+request id, and every connection to the run is only a subscriber reading from it. Each SSE
+event carries an ``id:`` (its sequence number in the run), so a client whose connection dropped
+can reconnect to ``/agents/{agent_id}/runs/{request_id}/stream`` with ``Last-Event-ID`` and
+receive the events it missed followed by the live stream, without starting a new model call.
+
+The newest ``stream_replay_max_events`` events of a run are kept in memory until
+``stream_replay_ttl_seconds`` after it finished. With ``stream_replay_spill`` every event is
+also written to Postgres, so older events and runs produced by another worker can be replayed
+too. A run that has no subscriber for ``stream_resume_grace_seconds`` is cancelled, unless it
+runs in the background (see ``runs.worker``) and is followed with ``follow_run_stream``.
+Without the spill, a subscriber that falls further behind than the buffer receives an
+``event: error`` with ``replay_unavailable`` and its stream ends.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from contextlib import ExitStack
+from typing import AsyncGenerator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import BigInteger, Column, DateTime, Index, MetaData, String, Table, Text, delete, func, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Engine
+
+from api.settings import api_settings
+from api.streaming import RUN_OUTCOMES
+
+logger = logging.getLogger(__name__)
+
+# Events are written to the spill in batches of this size, or after this many seconds
+SPILL_BATCH_SIZE = 50
+SPILL_INTERVAL_SECONDS = 0.5
+
+# Structure: {request_id: RunStream}
+RUN_STREAM_REGISTRY: Dict[str, "RunStream"] = {}
+
+
+class ReplaySpill:
+    """Write-behind copy of streamed events in Postgres."""
+
+    def __init__(self, db_engine: Engine, table_name: str = "run_stream_events", schema: Optional[str] = "ai"):
+        self.db_engine = db_engine
+        self.table = Table(
+            table_name,
+            MetaData(schema=schema),
+            Column("request_id", String, primary_key=True),
+            Column("seq", BigInteger, primary_key=True),
+            Column("agent_id", String, nullable=False),
+            Column("data", Text, nullable=False),
+            Column("created_at", DateTime(timezone=True), server_default=func.now(), nullable=False),
+            Index(f"{table_name}_created_at_idx", "created_at"),
+        )
+        self._created = False
+        self._last_pruned = 0.0
+
+    def _ensure_table(self) -> None:
+        if not self._created:
+            if self.table.schema:
+                with self.db_engine.begin() as conn:
+                    conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {self.table.schema};"))
+            self.table.create(self.db_engine, checkfirst=True)
+            self._created = True
+
+    def write(self, request_id: str, agent_id: str, events: List[Tuple[int, str]]) -> None:
+        self._ensure_table()
+        with self.db_engine.begin() as conn:
+            conn.execute(
+                postgresql.insert(self.table).on_conflict_do_nothing(),
+                [{"request_id": request_id, "seq": seq, "agent_id": agent_id, "data": data} for seq, data in events],
+            )
+
+    def read(
+        self, request_id: str, from_seq: int, to_seq: Optional[int] = None
+    ) -> Tuple[Optional[str], List[Tuple[int, str]]]:
+        """Return the run's agent id (None if nothing is stored) and its events in [from_seq, to_seq)."""
+        self._ensure_table()
+        query = select(self.table.c.seq, self.table.c.data, self.table.c.agent_id).where(
+            self.table.c.request_id == request_id, self.table.c.seq >= from_seq
+        )
+        if to_seq is not None:
+            query = query.where(self.table.c.seq < to_seq)
+        with self.db_engine.connect() as conn:
+            rows = conn.execute(query.order_by(self.table.c.seq)).all()
+        agent_id = rows[0].agent_id if rows else None
+        return agent_id, [(row.seq, row.data) for row in rows]
+
+    def delete(self, request_id: str) -> None:
+        """Delete all events of a run, e.g. before it is run again."""
+        self._ensure_table()
+        with self.db_engine.begin() as conn:
+            conn.execute(delete(self.table).where(self.table.c.request_id == request_id))
+
+    def prune(self, older_than_seconds: int) -> None:
+        """Delete events older than `older_than_seconds`, at most once a minute."""
+        if time.monotonic() - self._last_pruned < 60:
+            return
+        self._last_pruned = time.monotonic()
+        self._ensure_table()
+        with self.db_engine.begin() as conn:
+            conn.execute(
+                delete(self.table).where(
+                    self.table.c.created_at < func.now() - func.make_interval(0, 0, 0, 0, 0, 0, older_than_seconds)
+                )
+            )
+
+
+_spill: Optional[ReplaySpill] = None
+
+
+def get_replay_spill(force: bool = False) -> Optional[ReplaySpill]:
+    """Return the Postgres spill if `stream_replay_spill` is enabled, or `force` is set."""
+    global _spill
+    if (api_settings.stream_replay_spill or force) and _spill is None:
+        from db.session import db_engine
+
+        _spill = ReplaySpill(db_engine)
+    return _spill
+
+
+class ReplayUnavailable(Exception):
+    """Raised when the events after the client's Last-Event-ID are no longer stored."""
+
+
+def _format_event(seq: int, data: str) -> str:
+    return f"id: {seq}\n{data}"
+
+
+def _replay_unavailable_event(request_id: str, seq: int, first_seq: int) -> str:
+    payload = {
+        "error": "replay_unavailable",
+        "detail": f"Events from {seq} of run '{request_id}' are no longer buffered; the oldest buffered event is {first_seq}",
+    }
+    return f"event: error\ndata: {json.dumps(payload)}\n\n"
+
+
+class RunStream:
+    """Events of one streamed run, produced by a background task and read by any number of subscribers."""
+
+    def __init__(
+        self,
+        request_id: str,
+        agent_id: str,
+        spill: Optional[ReplaySpill] = None,
+        cancel_when_abandoned: bool = True,
+    ):
+        self.request_id = request_id
+        self.agent_id = agent_id
+        self.events: Deque[str] = deque()
+        # Sequence number of events[0] and of the next event
+        self.first_seq = 0
+        self.next_seq = 0
+        self.done = False
+        # Set if the run raised
+        self.error: Optional[str] = None
+        self.finished_at: Optional[float] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+        self._abandon_handle: Optional[asyncio.TimerHandle] = None
+        # RUN_OUTCOMES key counted if the run is cancelled
+        self._cancel_outcome = "cancelled_on_disconnect"
+        self._cancel_when_abandoned = cancel_when_abandoned
+        self._spill = spill or get_replay_spill()
+        self._unspilled: List[Tuple[int, str]] = []
+        self._last_spilled = time.monotonic()
+        self._spill_task: Optional[asyncio.Task] = None
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def start(self, stream: AsyncGenerator[str, None], cleanup: ExitStack) -> None:
+        """Produce `stream` into the buffer in a background task, closing `cleanup` once it ends."""
+        self.task = asyncio.get_running_loop().create_task(self._produce(stream, cleanup))
+        # A client that disconnects before it ever subscribes leaves no subscription to start the grace period
+        if self.subscribers == 0:
+            self._abandon_after_grace()
+
+    async def _produce(self, stream: AsyncGenerator[str, None], cleanup: ExitStack) -> None:
+        with cleanup:
+            try:
+                async for chunk in stream:
+                    self._append(chunk)
+                RUN_OUTCOMES["completed"] += 1
+            except asyncio.CancelledError:
+                RUN_OUTCOMES[self._cancel_outcome] += 1
+                logger.info(f"Cancelled run '{self.request_id}' ({self._cancel_outcome})")
+            except Exception as e:
+                self.error = str(e) or type(e).__name__
+                logger.error(f"Streamed run '{self.request_id}' failed: {e}", exc_info=True)
+            finally:
+                await stream.aclose()
+                self.done = True
+                self.finished_at = time.monotonic()
+                if self._abandon_handle is not None:
+                    self._abandon_handle.cancel()
+                await self._flush_spill()
+                self._notify()
+                if self._spill is not None:
+                    try:
+                        await asyncio.to_thread(self._spill.prune, api_settings.stream_replay_ttl_seconds)
+                    except Exception as e:
+                        logger.warning(f"Could not prune replayed events: {e}")
+
+    def _append(self, chunk: str) -> None:
+        seq = self.next_seq
+        self.events.append(chunk)
+        self.next_seq += 1
+        if len(self.events) > api_settings.stream_replay_max_events:
+            self.events.popleft()
+            self.first_seq += 1
+        if self._spill is not None:
+            self._unspilled.append((seq, chunk))
+            due = (
+                len(self._unspilled) >= SPILL_BATCH_SIZE
+                or time.monotonic() - self._last_spilled >= SPILL_INTERVAL_SECONDS
+            )
+            if due and (self._spill_task is None or self._spill_task.done()):
+                self._last_spilled = time.monotonic()
+                self._spill_task = asyncio.get_running_loop().create_task(self._flush_spill())
+        self._notify()
+
+    async def _flush_spill(self) -> None:
+        if self._spill_task is not None and self._spill_task is not asyncio.current_task():
+            await asyncio.shield(self._spill_task)
+        if self._spill is None or not self._unspilled:
+            return
+        events, self._unspilled = self._unspilled, []
+        try:
+            await asyncio.to_thread(self._spill.write, self.request_id, self.agent_id, events)
+        except Exception as e:
+            logger.warning(f"Could not spill {len(events)} event(s) of run '{self.request_id}': {e}")
+
+    def check_replayable(self, after_seq: Optional[int]) -> None:
+        """Raise ReplayUnavailable if the events after `after_seq` cannot be replayed."""
+        if after_seq is not None and after_seq + 1 < self.first_seq and self._spill is None:
+            raise ReplayUnavailable(
+                f"Events after {after_seq} of run '{self.request_id}' are no longer buffered; "
+                f"the oldest buffered event is {self.first_seq}"
+            )
+
+    async def subscribe(self, after_seq: Optional[int] = None) -> AsyncGenerator[str, None]:
+        """
+        Yield the run's SSE events after `after_seq` (from the start if None), then follow it live.
+
+        Args:
+            after_seq (Optional[int]): The last event id the client received.
+
+        Yields:
+            str: SSE events with their `id:` field.
+        """
+        self.subscribers += 1
+        if self._abandon_handle is not None:
+            self._abandon_handle.cancel()
+            self._abandon_handle = None
+        seq = 0 if after_seq is None else after_seq + 1
+        try:
+            while True:
+                changed = self._changed
+                if seq < self.first_seq:
+                    # The events from `seq` were evicted from the buffer, possibly while a slow client was reading
+                    if self._spill is None:
+                        yield _replay_unavailable_event(self.request_id, seq, self.first_seq)
+                        return
+                    await self._flush_spill()
+                    to_seq = self.first_seq
+                    _, events = await asyncio.to_thread(self._spill.read, self.request_id, seq, to_seq)
+                    for event_seq, data in events:
+                        yield _format_event(event_seq, data)
+                    seq = max(seq, to_seq)
+                    continue
+                while self.first_seq <= seq < self.next_seq:
+                    yield _format_event(seq, self.events[seq - self.first_seq])
+                    seq += 1
+                if seq < self.first_seq:
+                    continue
+                if self.done:
+                    return
+                await changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0:
+                self._abandon_after_grace()
+
+    def _abandon_after_grace(self) -> None:
+        if not self.done and self._cancel_when_abandoned:
+            if self._abandon_handle is not None:
+                self._abandon_handle.cancel()
+            self._abandon_handle = asyncio.get_running_loop().call_later(
+                api_settings.stream_resume_grace_seconds, self._cancel_if_abandoned
+            )
+
+    def cancel(self, outcome: str) -> None:
+        """Cancel the run if it is still in progress, counting it under the RUN_OUTCOMES key `outcome`."""
+        if self.task is not None and not self.task.done():
+            self._cancel_outcome = outcome
+            self.task.cancel()
+
+    def _cancel_if_abandoned(self) -> None:
+        self._abandon_handle = None
+        if self.subscribers == 0:
+            self.cancel("cancelled_on_disconnect")
+
+
+def _prune_registry() -> None:
+    now = time.monotonic()
+    for request_id, run_stream in list(RUN_STREAM_REGISTRY.items()):
+        if run_stream.finished_at is not None and now - run_stream.finished_at > api_settings.stream_replay_ttl_seconds:
+            del RUN_STREAM_REGISTRY[request_id]
+
+
+def start_run_stream(
+    request_id: str,
+    agent_id: str,
+    stream: AsyncGenerator[str, None],
+    cleanup: ExitStack,
+    spill: Optional[ReplaySpill] = None,
+    cancel_when_abandoned: bool = True,
+) -> RunStream:
+    """
+    Start producing a streamed run in the background and register it for replay.
+
+    Args:
+        request_id (str): The run's request id, used to resume it.
+        agent_id (str): The agent producing the run.
+        stream (AsyncGenerator[str, None]): The run's SSE events (without `id:` fields).
+        cleanup (ExitStack): Closed once the run has finished.
+        spill (Optional[ReplaySpill]): Where to also write the events; defaults to `get_replay_spill()`.
+        cancel_when_abandoned (bool): Cancel the run once no client has been subscribed for
+            `stream_resume_grace_seconds`, counted from the start until the first client subscribes.
+
+    Returns:
+        RunStream: The registered run.
+    """
+    _prune_registry()
+    run_stream = RunStream(request_id, agent_id, spill=spill, cancel_when_abandoned=cancel_when_abandoned)
+    RUN_STREAM_REGISTRY[request_id] = run_stream
+    run_stream.start(stream, cleanup)
+    return run_stream
+
+
+async def drain_run_streams(timeout: float) -> int:
+    """
+    Wait up to `timeout` seconds for the streamed runs in progress to finish, then cancel the rest.
+
+    Returns:
+        int: The number of runs that had to be cancelled.
+    """
+    running = {
+        run_stream.task: run_stream
+        for run_stream in RUN_STREAM_REGISTRY.values()
+        if run_stream.task is not None and not run_stream.task.done()
+    }
+    if not running:
+        return 0
+    logger.info(f"Waiting up to {timeout:.0f}s for {len(running)} streamed run(s) to finish")
+    _, pending = await asyncio.wait(running, timeout=max(timeout, 0.0))
+    for task in pending:
+        running[task].cancel("cancelled_on_shutdown")
+    await asyncio.gather(*pending, return_exceptions=True)
+    return len(pending)
+
+
+async def replay_spilled_run(
+    request_id: str, agent_id: str, after_seq: Optional[int]
+) -> Optional[AsyncGenerator[str, None]]:
+    """
+    Return a stream of a run's events from Postgres, for runs not buffered by this process.
+
+    Returns:
+        Optional[AsyncGenerator[str, None]]: The events after `after_seq`, or None if the run of
+        `agent_id` is not stored.
+    """
+    spill = get_replay_spill()
+    if spill is None:
+        return None
+    # Read from the last received event too, so a fully received run is still recognised
+    stored_agent_id, events = await asyncio.to_thread(spill.read, request_id, after_seq or 0)
+    if stored_agent_id != agent_id:
+        return None
+
+    async def replay() -> AsyncGenerator[str, None]:
+        for seq, data in events:
+            if after_seq is None or seq > after_seq:
+                yield _format_event(seq, data)
+
+    return replay()
+
+
+async def follow_run_stream(
+    request_id: str,
+    after_seq: Optional[int],
+    is_finished: Callable[[], Awaitable[bool]],
+    spill: Optional[ReplaySpill],
+    poll_interval: float,
+) -> AsyncGenerator[str, None]:
+    """
+    Follow a run that may not have started yet or is produced by another process.
+
+    Subscribes to the run as soon as it is registered in this process; until then its events are
+    polled from `spill` every `poll_interval` seconds, until `is_finished` returns True.
+
+    Args:
+        request_id (str): The run's request id.
+        after_seq (Optional[int]): The last event id the client received.
+        is_finished (Callable[[], Awaitable[bool]]): Whether the run has finished, or will never run.
+        spill (Optional[ReplaySpill]): Where events of runs in other processes are read from.
+        poll_interval (float): Seconds between polls.
+
+    Yields:
+        str: SSE events with their `id:` field.
+    """
+    while True:
+        run_stream = RUN_STREAM_REGISTRY.get(request_id)
+        if run_stream is not None:
+            async for event in run_stream.subscribe(after_seq):
+                yield event
+            return
+        # Check before reading, so the events written before the run finished are not missed
+        finished = await is_finished()
+        if spill is not None:
+            _, events = await asyncio.to_thread(spill.read, request_id, 0 if after_seq is None else after_seq + 1)
+            for seq, data in events:
+                yield _format_event(seq, data)
+                after_seq = seq
+        if finished:
+            return
+        await asyncio.sleep(poll_interval)
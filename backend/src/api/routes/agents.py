@@ -1,16 +1,14 @@
-from enum import Enum
 from logging import getLogger
 import json
 import time
-import uuid
-
 from typing import AsyncGenerator, List, Optional
 
 from agno.agent import Agent
-from fastapi import APIRouter, HTTPException, status
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from fastapi import APIRouter, Header, HTTPException, Request, Response, status
 from agents.selector import get_agent, get_available_agents
+from api.routes.run_handlers import RunRequest, handle_resume, handle_run
+from memory.retrieval import set_memory_query
+from memory.worker import defer_memory_update
 
 logger = getLogger(__name__)
 
@@ -21,11 +19,6 @@ logger = getLogger(__name__)
 agents_router = APIRouter(prefix="/agents", tags=["Agents"])
 
 
-class Model(str, Enum):
-    gpt_4_1 = "gpt-4.1"
-    o4_mini = "o4-mini"
-
-
 @agents_router.get("", response_model=List[str])
 async def list_agents():
     """
@@ -58,8 +51,11 @@ async def chat_response_streamer(
 
     created_ts = int(time.time())
     run_response = await agent.arun(message, stream=True)
+    content_parts: List[str] = []
 
     async for chunk in run_response:
+        if isinstance(chunk.content, str):
+            content_parts.append(chunk.content)
         payload = {
             "id": request_id,
             "object": "chat.completion.chunk",
@@ -93,75 +89,50 @@ async def chat_response_streamer(
     # OpenAI terminates the stream with a single [DONE] sentinel
     yield "data: [DONE]\n\n"
 
-
-class RunRequest(BaseModel):
-    """Request model for an running an agent"""
-
-    message: str
-    stream: bool = True
-    model: Model = Model.gpt_4_1
-    user_id: Optional[str] = None
-    session_id: Optional[str] = None
+    # The response has finished streaming; queue memory extraction if it is deferred
+    defer_memory_update(agent, message, "".join(content_parts))
 
 
 @agents_router.post("/{agent_id}/runs", status_code=status.HTTP_200_OK)
-async def create_agent_run(agent_id, body: RunRequest):
+async def create_agent_run(agent_id, body: RunRequest, request: Request, response: Response):
     """
     Sends a message to a specific agent and returns the response.
 
     Args:
         agent_id: The ID of the agent to interact with
         body: Request parameters including the message
+        request: The incoming request, checked for the profiling header and watched for disconnects
+        response: The outgoing response, used to return the request id header
 
     Returns:
-        Either a streaming response or the complete agent response
+        Either a streaming response, the complete agent response or, for background runs, the run id
     """
     logger.debug(f"RunRequest: {body}")
+    if agent_id not in get_available_agents():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Agent '{agent_id}' not found")
 
-    try:
-        agent: Agent = get_agent(
-            model_id=body.model.value,
-            agent_id=agent_id,
-            user_id=body.user_id,
-            session_id=body.session_id,
-        )
-    except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
-
-    if body.stream:
-        request_id = str(uuid.uuid4())
-        return StreamingResponse(
-            chat_response_streamer(
-                agent=agent,
-                message=body.message,
-                model_id=body.model.value,
-                request_id=request_id,
-            ),
-            media_type="text/event-stream",
-        )
-
-    # ---------- Non-streaming / blocking variant ----------
-    response = await agent.arun(body.message, stream=False)
-
-    # Compose an OpenAI "chat.completion" payload.
-    completion_payload = {
-        "id": str(uuid.uuid4()),
-        "object": "chat.completion",
-        "created": int(time.time()),
-        "model": body.model.value,
-        "choices": [
-            {
-                "message": {"role": "assistant", "content": response.content},
-                "index": 0,
-                "finish_reason": "stop",
-            }
-        ],
-        # Usage stats are optional – include `null` values if not available.
-        "usage": {
-            "prompt_tokens": None,
-            "completion_tokens": None,
-            "total_tokens": None,
-        },
-    }
+    def build(model_id: str) -> Agent:
+        agent = get_agent(model_id=model_id, agent_id=agent_id, user_id=body.user_id, session_id=body.session_id)
+        set_memory_query(agent, body.message)
+        return agent
+
+    return await handle_run("agent", agent_id, body, request, response, build, chat_response_streamer)
+
+
+@agents_router.get("/{agent_id}/runs/{request_id}/stream")
+async def resume_agent_run(
+    agent_id: str, request_id: str, request: Request, last_event_id: Optional[str] = Header(None)
+):
+    """
+    Resumes a streamed run after a dropped connection.
+
+    Args:
+        agent_id: The ID of the agent producing the run
+        request_id: The run's `X-Request-Id`
+        request: The incoming request, watched for disconnects
+        last_event_id: The `id` of the last event the client received; the run is replayed from the start if omitted
 
-    return completion_payload
+    Returns:
+        A streaming response with the events after `Last-Event-ID`, followed by the live run
+    """
+    return await handle_resume("agent", agent_id, request_id, request, last_event_id)
@@ -1,4 +1,8 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from api.health import readiness_checker
+from api.lifecycle import server_lifecycle
 
 ######################################################
 ## Routes for the API Health
@@ -9,8 +13,25 @@ health_router = APIRouter(tags=["Health"])
 
 @health_router.get("/health")
 def get_health():
-    """Check the health of the Api"""
+    """Check the health of the Api; 503 while the worker is draining for shutdown"""
 
+    if server_lifecycle.draining:
+        return JSONResponse(status_code=503, content={"status": "draining"})
     return {
         "status": "success",
     }
+
+
+@health_router.get("/health/live")
+def get_liveness():
+    """Check that the worker answers requests, without touching its dependencies"""
+
+    return {"status": "alive"}
+
+
+@health_router.get("/health/ready")
+async def get_readiness():
+    """Check that the worker can serve runs; 503 with the failing checks otherwise"""
+
+    result = await readiness_checker.check()
+    return JSONResponse(status_code=200 if result["status"] == "ready" else 503, content=result)
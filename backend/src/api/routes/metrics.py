@@ -0,0 +1,44 @@
+from fastapi import APIRouter
+
+from api.admission import admission_controller
+from api.lifecycle import server_lifecycle
+from api.streaming import RUN_OUTCOMES
+from db.partitions import partition_maintainer
+from llm.clients import TOOL_CALL_TURN_TOTALS
+from llm.scheduler import model_scheduler
+from llm.usage import model_usage
+from memory.session_compaction import session_compactor
+from memory.worker import memory_worker
+from runs.worker import run_worker_pool
+from tools.base.executor import tool_executor
+from tools.base.memo import TOOL_MEMO_TOTALS
+from tools.market_data.builder import market_data_metrics
+from tools.web_search.builder import web_search_metrics
+
+######################################################
+## Routes for the API Metrics
+######################################################
+
+metrics_router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@metrics_router.get("")
+def get_metrics():
+    """Return runtime metrics of the background components"""
+
+    return {
+        "admission": admission_controller.metrics(),
+        "lifecycle": server_lifecycle.metrics(),
+        "runs": dict(RUN_OUTCOMES),
+        "run_queue": run_worker_pool.metrics(),
+        "memory_worker": memory_worker.metrics(),
+        "session_compaction": session_compactor.metrics(),
+        "models": model_usage.snapshot(),
+        "model_scheduler": model_scheduler.metrics(),
+        "market_data": market_data_metrics(),
+        "web_search": web_search_metrics(),
+        "tool_memo": dict(TOOL_MEMO_TOTALS),
+        "tool_executor": tool_executor.metrics(),
+        "tool_call_turns": dict(TOOL_CALL_TURN_TOTALS),
+        "partitions": partition_maintainer.metrics(),
+    }
@@ -0,0 +1,42 @@
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import FileResponse
+
+from api.profiling import get_profile_path, list_profiles
+from api.settings import api_settings
+
+######################################################
+## Routes for the Request Profiles
+######################################################
+
+
+def verify_profiling_token(authorization: Optional[str] = Header(None)) -> None:
+    """Require `Authorization: Bearer <PROFILING_TOKEN>`; the routes are hidden while no token is set."""
+    if not api_settings.profiling_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    expected = f"Bearer {api_settings.profiling_token}"
+    if authorization is None or not secrets.compare_digest(authorization, expected):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid profiling token")
+
+
+profiles_router = APIRouter(prefix="/profiles", tags=["Profiles"], dependencies=[Depends(verify_profiling_token)])
+
+
+@profiles_router.get("")
+def get_profiles():
+    """List stored profile reports, newest first"""
+
+    return list_profiles()
+
+
+@profiles_router.get("/{request_id}")
+def download_profile(request_id: str):
+    """Download the profile report of a request"""
+
+    path = get_profile_path(request_id)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No profile for request '{request_id}'")
+    media_type = "text/html" if path.suffix == ".html" else "text/plain"
+    return FileResponse(path, media_type=media_type, filename=path.name)
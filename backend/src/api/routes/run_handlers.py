@@ -0,0 +1,208 @@
+import time
+import uuid
+from contextlib import ExitStack
+from enum import Enum
+from logging import getLogger
+from typing import Any, AsyncGenerator, Callable, Literal, Optional
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+from api.admission import AdmissionRejected, admission_controller
+from api.lifecycle import server_lifecycle
+from api.profiling import start_request_profile
+from api.replay import RUN_STREAM_REGISTRY, ReplayUnavailable, replay_spilled_run, start_run_stream
+from api.settings import api_settings
+from api.streaming import ClientDisconnected, cancel_on_disconnect, run_until_disconnect
+from llm.routing import route_model
+from memory.worker import defer_memory_update
+from runs.queue import RunJob, run_queue
+
+logger = getLogger(__name__)
+
+######################################################
+## Run handling shared by the Agent and Team routes
+######################################################
+
+
+class Model(str, Enum):
+    gpt_4_1 = "gpt-4.1"
+    o4_mini = "o4-mini"
+
+
+class RunRequest(BaseModel):
+    """Request model for an running an agent"""
+
+    message: str
+    stream: bool = True
+    model: Model = Model.gpt_4_1
+    user_id: Optional[str] = None
+    session_id: Optional[str] = None
+    # Queue the run and return its id at once; follow it on /runs/{run_id}
+    background: bool = False
+
+
+async def handle_run(
+    kind: Literal["agent", "team"],
+    target_id: str,
+    body: RunRequest,
+    request: Request,
+    response: Response,
+    build: Callable[[str], Any],
+    streamer: Callable[[Any, str, str, str], AsyncGenerator[str, None]],
+):
+    """
+    Runs an agent or team, as a stream, a blocking call or a background job.
+
+    Args:
+        kind: "agent" or "team"
+        target_id: The ID of the agent or team to run
+        body: Request parameters including the message
+        request: The incoming request, checked for the profiling header and watched for disconnects
+        response: The outgoing response, used to return the request id header
+        build: Builds the agent or team with the routed model id; raises ValueError if it is unknown
+        streamer: Yields the SSE events of a run from (runner, message, model_id, request_id)
+
+    Returns:
+        Either a streaming response, the complete response or, for background runs, the run id
+    """
+    if server_lifecycle.draining:
+        server_lifecycle.reject_run()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The server is shutting down",
+            headers={"Retry-After": str(api_settings.admission_retry_after_seconds)},
+        )
+
+    request_id = str(uuid.uuid4())
+    # Cleanup once the run has finished; handed over to the stream for streaming responses
+    cleanup = ExitStack()
+    profile = start_request_profile(request, request_id)
+    if profile:
+        cleanup.callback(profile.stop)
+    model_id = route_model(target_id, body.message, body.model.value)
+
+    with cleanup:
+        if body.background:
+            # Background runs are bounded by the run workers rather than admission control
+            job = await run_queue.submit(
+                RunJob(
+                    id=request_id,
+                    kind=kind,
+                    target_id=target_id,
+                    message=body.message,
+                    model_id=model_id,
+                    user_id=body.user_id,
+                    session_id=body.session_id,
+                )
+            )
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content={"run_id": job.id, "status": job.status},
+                headers={"X-Request-Id": request_id},
+            )
+
+        try:
+            ticket = await admission_controller.acquire(user_id=body.user_id, agent_id=target_id)
+        except AdmissionRejected as e:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=str(e),
+                headers={"Retry-After": str(e.retry_after)},
+            )
+        cleanup.callback(ticket.release)
+
+        try:
+            runner = build(model_id)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+        if body.stream:
+            stream = streamer(runner, body.message, model_id, request_id)
+            # The run is produced in the background so the client can resume it after a dropped connection
+            run_stream = start_run_stream(request_id, target_id, stream, cleanup.pop_all())
+            return StreamingResponse(
+                cancel_on_disconnect(request, run_stream.subscribe()),
+                media_type="text/event-stream",
+                headers={"X-Request-Id": request_id},
+            )
+
+        # ---------- Non-streaming / blocking variant ----------
+        try:
+            run_response = await run_until_disconnect(request, runner.arun(body.message, stream=False))
+        except ClientDisconnected:
+            # Nobody is left to read the response; 499 is the conventional "client closed request"
+            return Response(status_code=499)
+
+    content = run_response.content if isinstance(run_response.content, str) else None
+    defer_memory_update(runner, body.message, content)
+    response.headers["X-Request-Id"] = request_id
+
+    # Compose an OpenAI "chat.completion" payload.
+    return {
+        "id": request_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model_id,
+        "choices": [
+            {
+                "message": {"role": "assistant", "content": run_response.content},
+                "index": 0,
+                "finish_reason": "stop",
+            }
+        ],
+        # Usage stats are optional – include `null` values if not available.
+        "usage": {
+            "prompt_tokens": None,
+            "completion_tokens": None,
+            "total_tokens": None,
+        },
+    }
+
+
+async def handle_resume(
+    kind: Literal["agent", "team"],
+    target_id: str,
+    request_id: str,
+    request: Request,
+    last_event_id: Optional[str],
+) -> StreamingResponse:
+    """
+    Resumes a streamed agent or team run after a dropped connection.
+
+    Args:
+        kind: "agent" or "team"
+        target_id: The ID of the agent or team producing the run
+        request_id: The run's `X-Request-Id`
+        request: The incoming request, watched for disconnects
+        last_event_id: The `id` of the last event the client received; the run is replayed from the start if None
+
+    Returns:
+        A streaming response with the events after `Last-Event-ID`, followed by the live run
+    """
+    try:
+        after_seq = int(last_event_id) if last_event_id is not None else None
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Last-Event-ID must be an event id")
+
+    run_stream = RUN_STREAM_REGISTRY.get(request_id)
+    if run_stream is not None and run_stream.agent_id == target_id:
+        try:
+            run_stream.check_replayable(after_seq)
+        except ReplayUnavailable as e:
+            raise HTTPException(status_code=status.HTTP_410_GONE, detail=str(e))
+        stream = run_stream.subscribe(after_seq)
+    else:
+        stream = await replay_spilled_run(request_id, target_id, after_seq)
+        if stream is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Run '{request_id}' of {kind} '{target_id}' not found or expired",
+            )
+
+    return StreamingResponse(
+        cancel_on_disconnect(request, stream),
+        media_type="text/event-stream",
+        headers={"X-Request-Id": request_id},
+    )
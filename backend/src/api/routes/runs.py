@@ -0,0 +1,67 @@
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+
+from api.replay import follow_run_stream, get_replay_spill
+from api.streaming import cancel_on_disconnect
+from runs.queue import PostgresRunQueue, run_queue
+from runs.settings import run_queue_settings
+from runs.worker import run_is_finished
+
+######################################################
+## Routes for Background Runs
+######################################################
+
+runs_router = APIRouter(prefix="/runs", tags=["Runs"])
+
+
+@runs_router.get("/{run_id}")
+async def get_run(run_id: str):
+    """
+    Returns the status of a background run and, once it has finished, its result.
+
+    Args:
+        run_id: The `run_id` returned when the run was queued
+
+    Returns:
+        The run with its `status` ("queued", "running", "completed" or "failed"), `content` and `error`
+    """
+    job = await run_queue.get(run_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Run '{run_id}' not found or expired")
+    return job.to_dict()
+
+
+@runs_router.get("/{run_id}/events")
+async def stream_run_events(run_id: str, request: Request, last_event_id: Optional[str] = Header(None)):
+    """
+    Streams the events of a background run, waiting for it to start if it is still queued.
+
+    Args:
+        run_id: The `run_id` returned when the run was queued
+        request: The incoming request, watched for disconnects
+        last_event_id: The `id` of the last event the client received; the run is streamed from the start if omitted
+
+    Returns:
+        A streaming response with the run's events after `Last-Event-ID`, followed by the live run
+    """
+    try:
+        after_seq = int(last_event_id) if last_event_id is not None else None
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Last-Event-ID must be an event id")
+    if await run_queue.get(run_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Run '{run_id}' not found or expired")
+
+    stream = follow_run_stream(
+        run_id,
+        after_seq,
+        lambda: run_is_finished(run_id),
+        spill=get_replay_spill(force=isinstance(run_queue, PostgresRunQueue)),
+        poll_interval=run_queue_settings.poll_interval_seconds,
+    )
+    return StreamingResponse(
+        cancel_on_disconnect(request, stream),
+        media_type="text/event-stream",
+        headers={"X-Request-Id": run_id},
+    )
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import time
+from logging import getLogger
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from agno.run.response import RunEvent
+from agno.team import Team
+from fastapi import APIRouter, Header, HTTPException, Request, Response, status
+
+from api.routes.run_handlers import RunRequest, handle_resume, handle_run
+from memory.worker import defer_memory_update
+from teams.selector import get_available_teams, get_team
+from teams.streaming import ToolCallTracker, forward_member_events
+
+logger = getLogger(__name__)
+
+######################################################
+## Routes for the Team Interface
+######################################################
+
+teams_router = APIRouter(prefix="/teams", tags=["Teams"])
+
+
+@teams_router.get("", response_model=List[str])
+async def list_teams():
+    """
+    Returns a list of all available team IDs.
+
+    Returns:
+        List[str]: List of team identifiers
+    """
+    return get_available_teams()
+
+
+def _sse(payload: Dict[str, Any], event: Optional[str] = None) -> str:
+    data = f"data: {json.dumps(payload, ensure_ascii=False, default=str)}\n\n"
+    return f"event: {event}\n{data}" if event else data
+
+
+async def team_response_streamer(
+    team: Team,
+    message: str,
+    model_id: str,
+    request_id: str,
+) -> AsyncGenerator[str, None]:
+    """Yield the leader's tokens and the members' progress of a team run as SSE events.
+
+    The leader's tokens are OpenAI-compatible *chat.completion.chunk* payloads, as for agent runs.
+    Tool calls of the leader (such as delegating a task to a member) and the members' events
+    (`member_started`, `member_tool_call_started`, `member_tool_call_completed`, `member_response`,
+    `member_completed`) are sent as ``event: team`` with a *team.run.event* payload, as they happen.
+
+    Args:
+        team: The team instance to run.
+        message: The user message that kicked off the run.
+        model_id: Identifier of the model the team was built with.
+        request_id: Unique identifier for this request – reused across chunks.
+
+    Yields:
+        A string already formatted as a Server-Sent Event.
+    """
+
+    created_ts = int(time.time())
+    # Member events are emitted from inside the leader's tool calls, while the leader stream is
+    # waiting on them, so the leader is consumed by a task and both are read from one queue
+    events: asyncio.Queue = asyncio.Queue()
+    content_parts: List[str] = []
+
+    def team_event(event: Dict[str, Any]) -> None:
+        payload = {"id": request_id, "object": "team.run.event", "created": created_ts, "model": model_id, **event}
+        events.put_nowait(_sse(payload, event="team"))
+
+    async def run_leader() -> None:
+        tracker = ToolCallTracker()
+        try:
+            run_response = await team.arun(message, stream=True, stream_intermediate_steps=True)
+            async for chunk in run_response:
+                event = getattr(chunk.event, "value", chunk.event)
+                if event == RunEvent.tool_call_started.value:
+                    for tool in tracker.started(chunk.tools):
+                        team_event({"type": "leader_tool_call_started", "tool": tool})
+                elif event == RunEvent.tool_call_completed.value:
+                    for tool in tracker.completed(chunk.tools):
+                        team_event({"type": "leader_tool_call_completed", "tool": tool})
+                elif event == RunEvent.run_response.value and isinstance(chunk.content, str):
+                    content_parts.append(chunk.content)
+                    payload = {
+                        "id": request_id,
+                        "object": "chat.completion.chunk",
+                        "created": created_ts,
+                        "model": model_id,
+                        "choices": [{"delta": {"content": chunk.content}, "index": 0, "finish_reason": None}],
+                    }
+                    events.put_nowait(_sse(payload))
+        finally:
+            events.put_nowait(None)
+
+    forward_member_events(team, team_event)
+    leader = asyncio.get_running_loop().create_task(run_leader())
+    try:
+        while (event := await events.get()) is not None:
+            yield event
+        # Raises if the leader failed
+        await leader
+    finally:
+        if not leader.done():
+            leader.cancel()
+            await asyncio.gather(leader, return_exceptions=True)
+
+    # Emit the final chunk announcing completion
+    final_payload = {
+        "id": request_id,
+        "object": "chat.completion.chunk",
+        "created": created_ts,
+        "model": model_id,
+        "choices": [{"delta": {}, "index": 0, "finish_reason": "stop"}],
+    }
+    yield _sse(final_payload)
+    # OpenAI terminates the stream with a single [DONE] sentinel
+    yield "data: [DONE]\n\n"
+
+    # The response has finished streaming; queue memory extraction if it is deferred
+    defer_memory_update(team, message, "".join(content_parts))  # type: ignore[arg-type]
+
+
+@teams_router.post("/{team_id}/runs", status_code=status.HTTP_200_OK)
+async def create_team_run(team_id: str, body: RunRequest, request: Request, response: Response):
+    """
+    Sends a message to a specific team and returns the response.
+
+    Args:
+        team_id: The ID of the team to run
+        body: Request parameters including the message
+        request: The incoming request, checked for the profiling header and watched for disconnects
+        response: The outgoing response, used to return the request id header
+
+    Returns:
+        Either a stream of the leader's tokens and the members' events, the complete team response or,
+        for background runs, the run id
+    """
+    logger.debug(f"TeamRunRequest: {body}")
+    if team_id not in get_available_teams():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Team '{team_id}' not found")
+
+    def build(model_id: str) -> Team:
+        return get_team(team_id, model_id=model_id, user_id=body.user_id, session_id=body.session_id)
+
+    return await handle_run("team", team_id, body, request, response, build, team_response_streamer)
+
+
+@teams_router.get("/{team_id}/runs/{request_id}/stream")
+async def resume_team_run(team_id: str, request_id: str, request: Request, last_event_id: Optional[str] = Header(None)):
+    """
+    Resumes a streamed team run after a dropped connection.
+
+    Args:
+        team_id: The ID of the team producing the run
+        request_id: The run's `X-Request-Id`
+        request: The incoming request, watched for disconnects
+        last_event_id: The `id` of the last event the client received; the run is replayed from the start if omitted
+
+    Returns:
+        A streaming response with the events after `Last-Event-ID`, followed by the live run
+    """
+    return await handle_resume("team", team_id, request_id, request, last_event_id)
@@ -2,10 +2,18 @@ from fastapi import APIRouter
 
 from api.routes.agents import agents_router
 from api.routes.health import health_router
+from api.routes.metrics import metrics_router
+from api.routes.profiles import profiles_router
+from api.routes.runs import runs_router
+from api.routes.teams import teams_router
 from api.routes.playground import playground_router
 
 
 v1_router = APIRouter(prefix="/v1")
 v1_router.include_router(health_router)
+v1_router.include_router(metrics_router)
+v1_router.include_router(profiles_router)
 v1_router.include_router(agents_router)
+v1_router.include_router(teams_router)
+v1_router.include_router(runs_router)
 v1_router.include_router(playground_router)
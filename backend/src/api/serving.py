@@ -0,0 +1,89 @@
+"""Multi-process serving with a preloaded app.
+
+With ``uvicorn --workers`` every worker process imports the app itself, so the agent and team
+registries, the playground and all settings are built once per worker and held in as many
+copies. Under gunicorn with ``preload_app`` (``api/gunicorn_conf.py``) the app is imported once
+in the master process and the workers are forked from it, sharing those pages copy-on-write.
+
+Before forking, ``freeze_preloaded_state`` moves the preloaded objects out of the garbage
+collector's generations, so collections in the workers do not touch (and thereby copy) them.
+After forking, ``reset_after_fork`` drops the state that must not be shared between processes:
+connections of the Postgres pool and HTTP clients of the model provider registry. Everything
+else that holds sockets or asyncio objects is created lazily inside the worker.
+"""
+
+import gc
+import logging
+import math
+import os
+from typing import Any, Dict
+
+from uvicorn.workers import UvicornWorker
+
+from api.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+
+class DrainingUvicornWorker(UvicornWorker):
+    """Uvicorn worker that waits at most `shutdown_timeout_seconds` for open requests on shutdown."""
+
+    CONFIG_KWARGS = {
+        **UvicornWorker.CONFIG_KWARGS,
+        "timeout_graceful_shutdown": math.ceil(api_settings.shutdown_timeout_seconds),
+    }
+
+
+def default_workers() -> int:
+    """Return the number of worker processes to run: WEB_CONCURRENCY, or one per CPU core."""
+    return int(os.environ.get("WEB_CONCURRENCY") or os.cpu_count() or 1)
+
+
+def freeze_preloaded_state() -> None:
+    """Keep the preloaded module state out of future garbage collections. Call in the master before forking."""
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Froze {gc.get_freeze_count()} preloaded objects before forking workers")
+
+
+def reset_after_fork() -> None:
+    """Drop process-bound resources inherited from the master. Call in each worker right after forking."""
+    from db.session import db_engine
+    from llm.clients import MODEL_CLIENT_REGISTRY
+
+    # The master's connections stay open for the master; the worker opens its own
+    db_engine.dispose(close=False)
+    MODEL_CLIENT_REGISTRY.clear()
+
+
+def serve(app: Any, host: str, port: int, workers: int, **options: Any) -> None:
+    """
+    Serve an already imported `app` with gunicorn, forking `workers` uvicorn workers from this process.
+
+    Export WEB_CONCURRENCY before importing the app, so its Postgres pool is sized for `workers`.
+
+    Args:
+        app (Any): The ASGI app.
+        host (str): The interface to bind.
+        port (int): The port to bind.
+        workers (int): The number of worker processes.
+        **options: Further gunicorn settings.
+    """
+    from gunicorn.app.base import BaseApplication
+
+    import api.gunicorn_conf as conf
+
+    class PreloadedApplication(BaseApplication):
+        def load_config(self) -> None:
+            settings: Dict[str, Any] = {
+                name: getattr(conf, name)
+                for name in ("worker_class", "preload_app", "timeout", "graceful_timeout", "when_ready", "post_fork")
+            }
+            settings.update(bind=f"{host}:{port}", workers=workers, **options)
+            for name, value in settings.items():
+                self.cfg.set(name, value)
+
+        def load(self) -> Any:
+            return app
+
+    PreloadedApplication().run()
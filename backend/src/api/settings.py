@@ -22,6 +22,53 @@ class ApiSettings(BaseSettings):
 
     log_level: str = "info"
 
+    # Per-request profiling of agent runs. When enabled, a request is profiled if it sends the
+    # profiling header or is picked by `profiling_sample_rate`, at most `profiling_max_per_minute` times.
+    profiling_enabled: bool = False
+    profiling_header: str = "X-Profile"
+    profiling_sample_rate: float = 0.0
+    profiling_max_per_minute: int = 6
+    profiling_dir: str = "/tmp/backend-profiles"
+    profiling_max_reports: int = 100
+    # Bearer token protecting the /profiles endpoints; they are disabled while unset.
+    profiling_token: Optional[str] = None
+
+    # Admission control for agent runs. Unset caps are unlimited; runs over a cap wait in a queue of
+    # `admission_max_queue_size` for up to `admission_queue_timeout_seconds` before getting a 429.
+    admission_max_concurrent_runs: Optional[int] = None
+    admission_max_runs_per_user: Optional[int] = None
+    admission_max_runs_per_agent: Optional[int] = None
+    admission_max_queue_size: int = 100
+    admission_queue_timeout_seconds: float = 10.0
+    # Retry-After sent with a 429 until the average run duration is known.
+    admission_retry_after_seconds: int = 5
+
+    # Streamed runs are buffered for replay, so a client can resume a dropped stream with Last-Event-ID.
+    # The newest `stream_replay_max_events` events of a run are kept for `stream_replay_ttl_seconds`
+    # after it finished; a run without any connected client is cancelled after `stream_resume_grace_seconds`.
+    stream_replay_max_events: int = 2000
+    stream_replay_ttl_seconds: int = 300
+    stream_resume_grace_seconds: float = 15.0
+    # Also write streamed events to Postgres, to replay evicted events and runs streamed by another worker.
+    stream_replay_spill: bool = False
+
+    # Graceful shutdown. After SIGTERM the process reports not ready and rejects new runs with a 503 but keeps
+    # serving for `shutdown_drain_delay_seconds`, so load balancers stop routing to it; then in-flight runs get up
+    # to `shutdown_timeout_seconds` to finish before they are cancelled, and queued memory updates and session
+    # compactions get up to `shutdown_flush_timeout_seconds` after that. Keep the sum below the time the process
+    # manager waits before killing the worker (gunicorn's graceful_timeout is derived from it).
+    shutdown_drain_delay_seconds: float = 0.0
+    shutdown_timeout_seconds: float = 25.0
+    shutdown_flush_timeout_seconds: float = 10.0
+
+    # Readiness probe (/health/ready). Checks are cached for `readiness_cache_seconds`; the worker is not ready
+    # while Postgres does not answer within `readiness_db_timeout_seconds`, more than `readiness_max_pool_usage`
+    # of its pool is checked out or the event loop lags by `readiness_max_loop_lag_seconds` or more.
+    readiness_cache_seconds: float = 2.0
+    readiness_db_timeout_seconds: float = 2.0
+    readiness_max_pool_usage: float = 0.9
+    readiness_max_loop_lag_seconds: float = 0.5
+
     @field_validator("cors_origin_list", mode="before")
     def set_cors_origin_list(cls, cors_origin_list, info: FieldValidationInfo):
         valid_cors = cors_origin_list or []
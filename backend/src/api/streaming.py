@@ -0,0 +1,106 @@
+"""Cancellation of agent runs whose client has gone away.
+
+Starlette only notices a disconnected client when it next writes to it, and never for a
+request that is still waiting on ``agent.arun``, so a run would otherwise keep calling the
+model and its tools until it finishes. ``cancel_on_disconnect`` and ``run_until_disconnect``
+watch the request for ``http.disconnect`` and cancel the stream or run as soon as it arrives.
+Streamed runs are produced in the background by ``api.replay`` and only the client's
+subscription is cancelled on disconnect; the run itself is cancelled once no client has been
+subscribed for ``stream_resume_grace_seconds``, leaving time to resume the stream.
+
+Cancellation is raised inside agno's run, so the in-flight model request is aborted,
+pending async tool calls and team member runs are cancelled, and no further model or tool
+calls are made. Synchronous tools already running in a worker thread finish in the background
+but their results are discarded.
+
+A cancelled run is not persisted: agno writes the session to storage only once a run has
+completed, so the session history stays as it was before the run and no memories are queued.
+"""
+
+import asyncio
+import logging
+from typing import AsyncGenerator, Awaitable, Dict, TypeVar
+
+from fastapi import Request
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Counts of streamed and blocking runs by outcome
+RUN_OUTCOMES: Dict[str, int] = {"completed": 0, "cancelled_on_disconnect": 0, "cancelled_on_shutdown": 0}
+
+
+class ClientDisconnected(Exception):
+    """Raised by `run_until_disconnect` when the client went away before the run finished."""
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _cancel(task: "asyncio.Future") -> None:
+    task.cancel()
+    try:
+        await task
+    except (asyncio.CancelledError, StopAsyncIteration):
+        pass
+    except Exception as e:
+        logger.debug(f"Run raised while being cancelled: {e}")
+
+
+async def cancel_on_disconnect(request: Request, stream: AsyncGenerator[str, None]) -> AsyncGenerator[str, None]:
+    """
+    Pass `stream` through, cancelling it as soon as the client disconnects.
+
+    Args:
+        request (Request): The request whose client is watched.
+        stream (AsyncGenerator[str, None]): The SSE stream sent to the client.
+
+    Yields:
+        str: The chunks of `stream`, until it ends or the client disconnects.
+    """
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(request))
+    next_chunk = None
+    try:
+        while True:
+            next_chunk = asyncio.ensure_future(stream.__anext__())
+            await asyncio.wait({next_chunk, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if not next_chunk.done():
+                logger.debug("Client disconnected; closing the stream")
+                return
+            try:
+                chunk = next_chunk.result()
+            except StopAsyncIteration:
+                return
+            yield chunk
+    finally:
+        disconnected.cancel()
+        # Also reached when the response itself is torn down mid-chunk
+        if next_chunk is not None and not next_chunk.done():
+            await _cancel(next_chunk)
+        await stream.aclose()
+
+
+async def run_until_disconnect(request: Request, run: Awaitable[T]) -> T:
+    """
+    Await `run`, cancelling it if the client disconnects first.
+
+    Raises:
+        ClientDisconnected: If the client disconnected before `run` completed.
+    """
+    task = asyncio.ensure_future(run)
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(request))
+    try:
+        await asyncio.wait({task, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        disconnected.cancel()
+        if not task.done():
+            logger.info("Client disconnected; cancelling the run")
+            RUN_OUTCOMES["cancelled_on_disconnect"] += 1
+            await _cancel(task)
+    if task.cancelled():
+        raise ClientDisconnected()
+    RUN_OUTCOMES["completed"] += 1
+    return task.result()
@@ -0,0 +1,360 @@
+"""Monthly range partitions of the session and memory tables, and their retention.
+
+With ``DB_PARTITIONS_ENABLED=true``, ``agent_sessions``, ``team_sessions`` and ``user_memories`` are
+created partitioned by month of ``created_at`` (agno's epoch seconds for sessions, a timestamp for
+memories), with a ``DEFAULT`` partition catching rows outside the created months. Postgres requires
+the partition key in every unique index, so their primary keys become ``(id, created_at)``; the
+storage classes write to partitioned tables with an update-then-insert under an advisory lock
+instead of ``ON CONFLICT``. Lookups by id probe the id index of each partition.
+
+``maintain_partitions`` creates the partitions of the current and next ``months_ahead`` months and
+archives partitions older than ``retention_months``: detached and kept as standalone tables,
+exported to Parquet and dropped, or dropped. The API runs it every ``maintenance_interval_seconds``
+(one worker at a time, through an advisory lock); ``scripts/manage_partitions.py`` runs it on
+demand and converts existing tables.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import DateTime, Index, Integer, LargeBinary, MetaData, Table, text
+from sqlalchemy.engine import Connection, Engine
+
+from db.settings import partition_settings
+
+logger = logging.getLogger(__name__)
+
+PARTITION_KEY = "created_at"
+_PARTITION_NAME = re.compile(r"_p(\d{4})_(\d{2})$")
+# Key of the advisory lock held while maintaining partitions
+_MAINTENANCE_LOCK = 7_240_417
+# Layout of the tables this process has looked at: {(schema, table_name): partitioned}
+_LAYOUTS: Dict[Tuple[Optional[str], str], bool] = {}
+
+
+@dataclass(frozen=True)
+class PartitionedTable:
+    """A table that can be range-partitioned by month of `created_at`."""
+
+    name: str
+    # "epoch" for agno's bigint seconds, "timestamptz" for timestamp columns
+    key_type: str
+    schema: Optional[str] = "ai"
+
+    @property
+    def fullname(self) -> str:
+        return f"{self.schema}.{self.name}" if self.schema else self.name
+
+
+PARTITIONED_TABLES = (
+    PartitionedTable("agent_sessions", "epoch"),
+    PartitionedTable("team_sessions", "epoch"),
+    PartitionedTable("user_memories", "timestamptz"),
+)
+
+
+def add_months(month: date, months: int) -> date:
+    """Return the first day of the month `months` after the month of `month`."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _bound(table: PartitionedTable, month: date) -> str:
+    start = datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+    if table.key_type == "epoch":
+        return str(int(start.timestamp()))
+    return f"'{start.isoformat()}'"
+
+
+def _qualified(table: PartitionedTable, name: str) -> str:
+    return f"{table.schema}.{name}" if table.schema else name
+
+
+def partition_name(table: PartitionedTable, month: date) -> str:
+    return f"{table.name}_p{month.year:04d}_{month.month:02d}"
+
+
+def partitioned_table(table: Table) -> Table:
+    """
+    Return a copy of `table` range-partitioned by `created_at`, with `created_at` added to its primary key.
+
+    Args:
+        table (Table): The unpartitioned table definition, e.g. agno's session table.
+
+    Returns:
+        Table: The definition of the partitioned parent table.
+    """
+    columns = []
+    for column in table.columns:
+        column = column._copy()
+        if column.name == PARTITION_KEY:
+            column.primary_key = True
+            column.nullable = False
+        columns.append(column)
+    partitioned = Table(
+        table.name, MetaData(schema=table.schema), *columns, postgresql_partition_by=f"RANGE ({PARTITION_KEY})"
+    )
+    existing = {index.name for index in partitioned.indexes}
+    for index in table.indexes:
+        if index.name not in existing and len(index.columns) > 1:
+            Index(index.name, *[partitioned.c[column.name] for column in index.columns])
+    return partitioned
+
+
+def is_partitioned(engine: Engine, schema: Optional[str], table_name: str) -> Optional[bool]:
+    """Return whether a table is partitioned, or None if it does not exist; remembered once it exists."""
+    key = (schema, table_name)
+    if key not in _LAYOUTS:
+        with engine.connect() as conn:
+            kind = conn.execute(
+                text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+                {"table": f"{schema}.{table_name}" if schema else table_name},
+            ).scalar()
+        if kind is None:
+            return None
+        _LAYOUTS[key] = kind == "p"
+    return _LAYOUTS[key]
+
+
+def forget_layout(schema: Optional[str], table_name: str) -> None:
+    """Look the layout of a table up again next time, e.g. after it was created or converted."""
+    _LAYOUTS.pop((schema, table_name), None)
+
+
+def upsert_partitioned(
+    conn: Connection, table: Table, key: str, values: Dict[str, Any], updates: Dict[str, Any]
+) -> None:
+    """
+    Update the row of a partitioned `table` whose `key` column equals `values[key]`, or insert `values`.
+
+    ``ON CONFLICT`` needs a unique index on `key` alone, which a table partitioned by another column cannot
+    have; a transaction-scoped advisory lock on the key keeps concurrent writers from inserting it twice.
+    """
+    conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:lock))"), {"lock": f"{table.fullname}:{values[key]}"})
+    result = conn.execute(table.update().where(table.c[key] == values[key]).values(**updates))
+    if result.rowcount == 0:
+        conn.execute(table.insert().values(**values))
+
+
+def list_partitions(conn: Connection, table: PartitionedTable) -> Dict[str, Optional[date]]:
+    """Return the partitions of `table` with the month each holds (None for the default partition)."""
+    rows = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:table)"
+        ),
+        {"table": table.fullname},
+    ).scalars()
+    partitions: Dict[str, Optional[date]] = {}
+    for name in rows:
+        match = _PARTITION_NAME.search(name)
+        partitions[name] = date(int(match.group(1)), int(match.group(2)), 1) if match else None
+    return partitions
+
+
+def create_partitioned_table(engine: Engine, table: Table, key_type: str, first_month: Optional[date] = None) -> None:
+    """
+    Create `table` partitioned by month, with a default partition and the partitions of the coming months.
+
+    Args:
+        engine (Engine): The database engine.
+        table (Table): The unpartitioned table definition.
+        key_type (str): "epoch" or "timestamptz", the type of `created_at`.
+        first_month (Optional[date]): First month to create a partition for. Defaults to the current month.
+    """
+    if table.schema:
+        with engine.begin() as conn:
+            conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {table.schema};"))
+    partitioned_table(table).create(engine, checkfirst=True)
+    spec = PartitionedTable(table.name, key_type, table.schema)
+    default = _qualified(spec, f"{table.name}_default")
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {default} PARTITION OF {spec.fullname} DEFAULT"))
+    forget_layout(table.schema, table.name)
+    ensure_partitions(engine, spec, first_month=first_month)
+
+
+def ensure_partitions(
+    engine: Engine, table: PartitionedTable, first_month: Optional[date] = None, months_ahead: Optional[int] = None
+) -> List[str]:
+    """
+    Create the missing partitions of `table` from `first_month` (the current month) to `months_ahead` months ahead.
+
+    Returns:
+        List[str]: The names of the partitions created.
+    """
+    today = datetime.now(timezone.utc).date().replace(day=1)
+    month = (first_month or today).replace(day=1)
+    last = add_months(today, partition_settings.months_ahead if months_ahead is None else months_ahead)
+    created = []
+    with engine.connect() as conn:
+        existing = list_partitions(conn, table)
+    while month <= last:
+        name = partition_name(table, month)
+        if name not in existing:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(
+                        text(
+                            f"CREATE TABLE IF NOT EXISTS {_qualified(table, name)} PARTITION OF {table.fullname} "
+                            f"FOR VALUES FROM ({_bound(table, month)}) TO ({_bound(table, add_months(month, 1))})"
+                        )
+                    )
+                created.append(name)
+            except Exception as e:
+                # e.g. the default partition already holds rows of that month
+                logger.warning(f"Could not create partition {name}: {e}")
+        month = add_months(month, 1)
+    if created:
+        logger.info(f"Created partitions {', '.join(created)}")
+    return created
+
+
+def _export_parquet(engine: Engine, table: PartitionedTable, name: str, archive_dir: str) -> str:
+    """Write the rows of partition `name` to `archive_dir/<table>/<name>.parquet` and return the path."""
+    import json
+
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("DB_PARTITIONS_ARCHIVE_MODE=parquet requires the 'pyarrow' package")
+
+    reflected = Table(name, MetaData(schema=table.schema), autoload_with=engine)
+    fields = []
+    for column in reflected.columns:
+        if isinstance(column.type, Integer):
+            fields.append(pa.field(column.name, pa.int64()))
+        elif isinstance(column.type, DateTime):
+            fields.append(pa.field(column.name, pa.timestamp("us", tz="UTC")))
+        elif isinstance(column.type, LargeBinary):
+            fields.append(pa.field(column.name, pa.binary()))
+        else:
+            # JSONB, text and vectors are archived as text
+            fields.append(pa.field(column.name, pa.string()))
+    schema = pa.schema(fields)
+
+    os.makedirs(os.path.join(archive_dir, table.name), exist_ok=True)
+    path = os.path.join(archive_dir, table.name, f"{name}.parquet")
+    with engine.connect().execution_options(stream_results=True, yield_per=10_000) as conn:
+        with pq.ParquetWriter(path, schema) as writer:
+            for rows in conn.execute(reflected.select()).partitions():
+                batch = []
+                for row in rows:
+                    record = {}
+                    for field in schema:
+                        value = row._mapping[field.name]
+                        if field.type == pa.string() and value is not None and not isinstance(value, str):
+                            value = json.dumps(value, default=str)
+                        record[field.name] = value
+                    batch.append(record)
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+    return path
+
+
+def archive_partition(engine: Engine, table: PartitionedTable, name: str, mode: str, archive_dir: str) -> str:
+    """
+    Detach partition `name` from `table`, then export and/or drop it following `mode`.
+
+    Returns:
+        str: Where the partition's rows went: the detached table or the Parquet file.
+    """
+    destination = _qualified(table, name)
+    if mode == "parquet":
+        destination = _export_parquet(engine, table, name, archive_dir)
+    with engine.begin() as conn:
+        conn.execute(text(f"ALTER TABLE {table.fullname} DETACH PARTITION {_qualified(table, name)}"))
+        if mode in ("parquet", "drop"):
+            conn.execute(text(f"DROP TABLE {_qualified(table, name)}"))
+    logger.info(f"Archived partition {name} of {table.fullname} ({mode}): {destination}")
+    return destination
+
+
+def maintain_partitions(engine: Engine) -> Dict[str, Any]:
+    """
+    Create upcoming partitions and archive expired ones of every partitioned table.
+
+    Returns:
+        Dict[str, Any]: The partitions created and archived per table; empty if another process held the lock.
+    """
+    report: Dict[str, Any] = {}
+    with engine.connect() as lock_conn:
+        if not lock_conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": _MAINTENANCE_LOCK}).scalar():
+            return report
+        try:
+            for table in PARTITIONED_TABLES:
+                if not is_partitioned(engine, table.schema, table.name):
+                    continue
+                with engine.connect() as conn:
+                    partitions = list_partitions(conn, table)
+                created = ensure_partitions(engine, table)
+                archived = []
+                if partition_settings.retention_months is not None:
+                    current = datetime.now(timezone.utc).date().replace(day=1)
+                    cutoff = add_months(current, -partition_settings.retention_months)
+                    for name, month in sorted(partitions.items(), key=lambda item: item[1] or date.max):
+                        if month is not None and add_months(month, 1) <= cutoff:
+                            archived.append(
+                                archive_partition(
+                                    engine, table, name, partition_settings.archive_mode, partition_settings.archive_dir
+                                )
+                            )
+                report[table.name] = {"created": created, "archived": archived}
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _MAINTENANCE_LOCK})
+            lock_conn.commit()
+    return report
+
+
+class PartitionMaintainer:
+    """Runs `maintain_partitions` periodically on the event loop of an API worker."""
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._metrics: Dict[str, Any] = {
+            "runs": 0,
+            "errors": 0,
+            "partitions_created": 0,
+            "partitions_archived": 0,
+            "last_run_at": None,
+        }
+
+    def start(self) -> None:
+        if self.interval_seconds > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        from db.session import db_engine
+
+        while True:
+            try:
+                report = await asyncio.to_thread(maintain_partitions, db_engine)
+                self._metrics["runs"] += 1
+                self._metrics["last_run_at"] = time.time()
+                for table_report in report.values():
+                    self._metrics["partitions_created"] += len(table_report["created"])
+                    self._metrics["partitions_archived"] += len(table_report["archived"])
+            except Exception as e:
+                self._metrics["errors"] += 1
+                logger.error(f"Partition maintenance failed: {e}", exc_info=True)
+            await asyncio.sleep(self.interval_seconds)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return the maintenance counters."""
+        return {**self._metrics, "enabled": partition_settings.enabled}
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+# Create the process-wide PartitionMaintainer
+partition_maintainer = PartitionMaintainer(partition_settings.maintenance_interval_seconds)
@@ -3,11 +3,20 @@ from typing import Generator
 from sqlalchemy.engine import Engine, create_engine
 from sqlalchemy.orm import Session, sessionmaker
 
+from db.settings import db_settings, worker_count
 from db.url import get_db_url
 
-# Create SQLAlchemy Engine using a database URL
+# Create SQLAlchemy Engine using a database URL, shared by everything in this process that uses Postgres
 db_url: str = get_db_url()
-db_engine: Engine = create_engine(db_url, pool_pre_ping=True)
+pool_size, max_overflow = db_settings.limits(worker_count())
+db_engine: Engine = create_engine(
+    db_url,
+    pool_pre_ping=True,
+    pool_size=pool_size,
+    max_overflow=max_overflow,
+    pool_timeout=db_settings.timeout_seconds,
+    pool_recycle=db_settings.recycle_seconds,
+)
 
 # Create a SessionLocal class
 SessionLocal: sessionmaker[Session] = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
@@ -0,0 +1,80 @@
+import os
+from typing import Literal, Optional, Tuple
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class DbSettings(BaseSettings):
+    """Postgres connection pool settings that are set using environment variables prefixed with ``DB_POOL_``."""
+
+    model_config = SettingsConfigDict(env_prefix="DB_POOL_")
+
+    # Every worker process has its own pool of up to `size` + `max_overflow` connections, so a host running
+    # WEB_CONCURRENCY workers opens up to WEB_CONCURRENCY * (size + max_overflow) connections; keep that below
+    # the server's max_connections, or set `max_connections` to have it split between the workers.
+    size: int = 5
+    max_overflow: int = 10
+    # Connections available to all worker processes of this host together.
+    max_connections: Optional[int] = None
+
+    # Seconds a request waits for a connection before failing.
+    timeout_seconds: float = 30.0
+    # Connections older than this are replaced, so they are not dropped by the server or a proxy first.
+    recycle_seconds: int = 1800
+
+    def limits(self, workers: int) -> Tuple[int, int]:
+        """Return the (pool size, max overflow) of one of `workers` worker processes."""
+        if self.max_connections is None:
+            return self.size, self.max_overflow
+        per_worker = max(1, self.max_connections // max(1, workers))
+        size = min(self.size, per_worker)
+        return size, max(0, min(self.max_overflow, per_worker - size))
+
+
+def worker_count() -> int:
+    """Return the number of worker processes serving the app, as exported in WEB_CONCURRENCY."""
+    return int(os.environ.get("WEB_CONCURRENCY") or 1)
+
+
+class SessionStorageSettings(BaseSettings):
+    """Agent and team session storage settings, set using environment variables prefixed with ``SESSION_STORAGE_``."""
+
+    model_config = SettingsConfigDict(env_prefix="SESSION_STORAGE_")
+
+    # How sessions are written: "jsonb" keeps agno's JSONB columns; "zstd" stores the memory (runs), agent/team
+    # data and extra data as one compressed payload. Rows written either way are read back either way.
+    codec: Literal["jsonb", "zstd"] = "jsonb"
+    # zstd compression level (1-22); zlib levels (1-9) when the `zstandard` package is not installed.
+    compression_level: int = 3
+    # Cut the results of tool calls stored in session runs to this many characters (kept in full when unset).
+    tool_output_max_chars: Optional[int] = None
+
+
+class PartitionSettings(BaseSettings):
+    """Table partitioning settings that are set using environment variables prefixed with ``DB_PARTITIONS_``."""
+
+    model_config = SettingsConfigDict(env_prefix="DB_PARTITIONS_")
+
+    # Create agent_sessions, team_sessions and user_memories, when they do not exist yet, range-partitioned by
+    # month of created_at. Existing tables keep their layout until converted with scripts/manage_partitions.py.
+    enabled: bool = False
+    # Months of partitions kept created ahead of the current one.
+    months_ahead: int = 3
+    # Archive partitions whose month ended more than this many months ago (kept forever when unset).
+    retention_months: Optional[int] = None
+    # "detach" keeps archived partitions as standalone tables, "parquet" exports them to `archive_dir` and drops
+    # them (requires `pyarrow`), "drop" drops them.
+    archive_mode: Literal["detach", "parquet", "drop"] = "detach"
+    archive_dir: str = "archive"
+    # Seconds between partition maintenance runs while the API is up (never run by the API when 0).
+    maintenance_interval_seconds: float = 3600.0
+
+
+# Create DbSettings object
+db_settings = DbSettings()
+
+# Create SessionStorageSettings object
+session_storage_settings = SessionStorageSettings()
+
+# Create PartitionSettings object
+partition_settings = PartitionSettings()
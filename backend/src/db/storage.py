@@ -0,0 +1,294 @@
+"""Postgres storage of agent and team sessions with an optional compact encoding.
+
+agno stores a session as JSONB columns, and most of a row is the ``memory`` column: every run with
+its full messages, tool call payloads and per-message metrics, plus the tool schemas repeated in
+``agent_data``/``team_data``. ``CompactPostgresStorage`` keeps agno's table and adds a nullable
+``payload`` column. With ``SESSION_STORAGE_CODEC=zstd`` the memory, agent/team data and extra data
+are written there as one compressed JSON document and the JSONB columns are left empty; the small
+``session_data`` column (session name and state) stays JSONB. Reads decode whichever form a row has,
+so existing rows keep working and ``scripts/migrate_session_storage.py`` rewrites them in place. Tables
+created before the payload column existed are written as JSONB until that script has added it.
+Tables partitioned by ``db.partitions`` are created and written through the same class.
+
+The payload starts with a byte naming its compression: zstd when the ``zstandard`` package is
+installed, zlib otherwise. ``orjson`` is used for the JSON when installed.
+"""
+
+import json
+import logging
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from agno.storage.postgres import PostgresStorage
+from agno.storage.session import Session
+from agno.storage.session.agent import AgentSession
+from agno.storage.session.team import TeamSession
+from agno.storage.session.workflow import WorkflowSession
+from sqlalchemy import Column, LargeBinary, Table, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Engine
+
+from db.partitions import create_partitioned_table, is_partitioned, upsert_partitioned
+from db.settings import partition_settings, session_storage_settings
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# First byte of a payload, naming its compression
+ZSTD_JSON = b"\x01"
+ZLIB_JSON = b"\x02"
+
+# Whether each session table has the payload column, as read once per process
+_HAS_PAYLOAD: Dict[Tuple[Optional[str], str], bool] = {}
+_warned_missing_zstd = False
+
+
+def _dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, default=str)
+    return json.dumps(value, default=str, separators=(",", ":")).encode()
+
+
+def _loads(data: bytes) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def encode_payload(value: Dict[str, Any], level: Optional[int] = None) -> bytes:
+    """Return `value` as compressed JSON, prefixed with the byte naming its compression."""
+    global _warned_missing_zstd
+    level = level if level is not None else session_storage_settings.compression_level
+    if zstandard is not None:
+        return ZSTD_JSON + zstandard.ZstdCompressor(level=level).compress(_dumps(value))
+    if not _warned_missing_zstd:
+        _warned_missing_zstd = True
+        logger.warning("The 'zstandard' package is not installed; compressing session payloads with zlib.")
+    return ZLIB_JSON + zlib.compress(_dumps(value), min(level, 9))
+
+
+def decode_payload(payload: bytes) -> Dict[str, Any]:
+    """Return the value of a payload written by `encode_payload`."""
+    payload = bytes(payload)
+    kind, body = payload[:1], payload[1:]
+    if kind == ZSTD_JSON:
+        if zstandard is None:
+            raise RuntimeError("Reading this session requires the 'zstandard' package")
+        return _loads(zstandard.ZstdDecompressor().decompress(body))
+    if kind == ZLIB_JSON:
+        return _loads(zlib.decompress(body))
+    raise ValueError(f"Unknown session payload encoding {kind!r}")
+
+
+def _qualified(schema: Optional[str], table_name: str) -> str:
+    return f"{schema}.{table_name}" if schema else table_name
+
+
+def has_payload_column(engine: Engine, schema: Optional[str], table_name: str) -> bool:
+    """Return whether the session table has the payload column; a table yet to be created will have it."""
+    key = (schema, table_name)
+    if key not in _HAS_PAYLOAD:
+        with engine.connect() as conn:
+            columns = set(
+                conn.execute(
+                    text(
+                        "SELECT attname FROM pg_attribute "
+                        "WHERE attrelid = to_regclass(:table) AND attnum > 0 AND NOT attisdropped"
+                    ),
+                    {"table": _qualified(schema, table_name)},
+                ).scalars()
+            )
+        _HAS_PAYLOAD[key] = not columns or "payload" in columns
+        if not _HAS_PAYLOAD[key]:
+            logger.warning(
+                f"{_qualified(schema, table_name)} has no payload column; sessions are stored as JSONB until "
+                "`scripts/migrate_session_storage.py` is run"
+            )
+    return _HAS_PAYLOAD[key]
+
+
+def add_payload_column(engine: Engine, schema: Optional[str] = "ai", table_name: str = "agent_sessions") -> bool:
+    """
+    Add the payload column to a session table created by agno's PostgresStorage.
+
+    Returns:
+        bool: False if the table does not exist; it is created with the column.
+    """
+    table = _qualified(schema, table_name)
+    with engine.begin() as conn:
+        if conn.execute(text("SELECT to_regclass(:table)"), {"table": table}).scalar() is None:
+            return False
+        # Adding a nullable column is quick, but waits for the table lock behind long transactions
+        conn.execute(text("SET LOCAL lock_timeout = '10s'"))
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS payload BYTEA"))
+    _HAS_PAYLOAD.pop((schema, table_name), None)
+    return True
+
+
+def strip_tool_outputs(value: Any, max_chars: int) -> Any:
+    """Return `value` with the content of every tool message longer than `max_chars` cut to `max_chars`."""
+    if isinstance(value, list):
+        return [strip_tool_outputs(item, max_chars) for item in value]
+    if not isinstance(value, dict):
+        return value
+    stripped = {key: strip_tool_outputs(item, max_chars) for key, item in value.items()}
+    content = stripped.get("content")
+    if stripped.get("role") == "tool" and isinstance(content, str) and len(content) > max_chars:
+        stripped["content"] = f"{content[:max_chars]}... [{len(content) - max_chars} characters not stored]"
+    return stripped
+
+
+class CompactPostgresStorage(PostgresStorage):
+    """PostgresStorage that can store the large columns of a session as one compressed payload."""
+
+    def __init__(
+        self,
+        table_name: str,
+        schema: Optional[str] = "ai",
+        db_url: Optional[str] = None,
+        db_engine: Optional[Engine] = None,
+        mode: Optional[str] = "agent",
+        codec: Optional[str] = None,
+        partitioned: Optional[bool] = None,
+    ):
+        self.codec = codec or session_storage_settings.codec
+        # None follows the existing table, or DB_PARTITIONS_ENABLED for a table yet to be created
+        self._partitioned = partitioned
+        super().__init__(table_name=table_name, schema=schema, db_url=db_url, db_engine=db_engine, mode=mode)
+
+    @property
+    def _data_column(self) -> str:
+        return f"{self.mode}_data"
+
+    @property
+    def _large_columns(self) -> List[str]:
+        return ["memory", self._data_column, "extra_data"]
+
+    def get_table_v1(self) -> Table:
+        table = super().get_table_v1()
+        if "payload" not in table.c and has_payload_column(self.db_engine, self.schema, self.table_name):
+            table.append_column(Column("payload", LargeBinary, nullable=True))
+        return table
+
+    @property
+    def partitioned(self) -> bool:
+        """Whether the table is (or will be created) partitioned by month of `created_at`."""
+        if self._partitioned is None:
+            layout = is_partitioned(self.db_engine, self.schema, self.table_name)
+            if layout is None:
+                return partition_settings.enabled
+            self._partitioned = layout
+        return self._partitioned
+
+    def create(self) -> None:
+        if not self.partitioned or self.table_exists():
+            super().create()
+            return
+        create_partitioned_table(self.db_engine, self.get_table(), key_type="epoch")
+
+    def session_from_row(self, row: Any) -> Optional[Session]:
+        """Return the session of a table row, decoding its payload if it has one."""
+        data = dict(row._mapping)
+        payload = data.pop("payload", None)
+        if payload is not None:
+            data.update(decode_payload(payload))
+        if self.mode == "agent":
+            return AgentSession.from_dict(data)
+        if self.mode == "team":
+            return TeamSession.from_dict(data)
+        return WorkflowSession.from_dict(data)
+
+    def session_values(self, session: Session, codec: Optional[str] = None) -> Dict[str, Any]:
+        """Return the column values storing `session` with `codec`, by default the storage's."""
+        values: Dict[str, Any] = {
+            "session_id": session.session_id,
+            "user_id": session.user_id,
+            f"{self.mode}_id": getattr(session, f"{self.mode}_id"),
+            "session_data": session.session_data,
+        }
+        if self.mode in ("agent", "team"):
+            values["team_session_id"] = getattr(session, "team_session_id", None)
+        large = {column: getattr(session, column) for column in self._large_columns}
+        if session_storage_settings.tool_output_max_chars is not None and large["memory"]:
+            large["memory"] = strip_tool_outputs(large["memory"], session_storage_settings.tool_output_max_chars)
+        if (codec or self.codec) == "zstd":
+            values.update({column: None for column in large}, payload=encode_payload(large))
+        else:
+            values.update(large, payload=None)
+        return values
+
+    def read(self, session_id: str, user_id: Optional[str] = None) -> Optional[Session]:
+        try:
+            with self.Session() as sess:
+                stmt = select(self.table).where(self.table.c.session_id == session_id)
+                if user_id:
+                    stmt = stmt.where(self.table.c.user_id == user_id)
+                row = sess.execute(stmt).fetchone()
+            return self.session_from_row(row) if row is not None else None
+        except Exception as e:
+            if "does not exist" in str(e):
+                logger.debug(f"Table does not exist: {self.table.name}; creating it for future transactions")
+                self.create()
+            else:
+                logger.warning(f"Could not read session '{session_id}' from {self.table.name}: {e}")
+        return None
+
+    def get_all_sessions(self, user_id: Optional[str] = None, entity_id: Optional[str] = None) -> List[Session]:
+        try:
+            with self.Session() as sess:
+                stmt = select(self.table)
+                if user_id is not None:
+                    stmt = stmt.where(self.table.c.user_id == user_id)
+                if entity_id is not None:
+                    stmt = stmt.where(self.table.c[f"{self.mode}_id"] == entity_id)
+                rows = sess.execute(stmt.order_by(self.table.c.created_at.desc())).fetchall()
+            return [session for session in (self.session_from_row(row) for row in rows) if session is not None]
+        except Exception as e:
+            logger.debug(f"Could not read sessions from {self.table.name}: {e}; creating it for future transactions")
+            self.create()
+        return []
+
+    def write(self, session: Session, codec: Optional[str] = None, updated_at: Optional[int] = None) -> None:
+        """
+        Insert or update `session`.
+
+        Args:
+            session (Session): The session to store.
+            codec (Optional[str]): "jsonb" or "zstd"; defaults to the storage's codec. Tables without
+                the payload column are always written as "jsonb".
+            updated_at (Optional[int]): The `updated_at` to store on update, defaults to now.
+        """
+        has_payload = "payload" in self.table.c
+        values = self.session_values(session, codec if has_payload else "jsonb")
+        if not has_payload:
+            del values["payload"]
+        updates = {
+            **{column: value for column, value in values.items() if column != "session_id"},
+            "updated_at": updated_at if updated_at is not None else int(time.time()),
+        }
+        with self.Session() as sess, sess.begin():
+            if self.partitioned:
+                upsert_partitioned(sess.connection(), self.table, "session_id", values, updates)
+                return
+            stmt = postgresql.insert(self.table).values(**values)
+            sess.execute(stmt.on_conflict_do_update(index_elements=["session_id"], set_=updates))
+
+    def upsert(self, session: Session, create_and_retry: bool = True) -> Optional[Session]:
+        try:
+            self.write(session)
+        except Exception as e:
+            if create_and_retry and not self.table_exists():
+                logger.debug(f"Table does not exist: {self.table.name}; creating it and retrying the upsert")
+                self.create()
+                return self.upsert(session, create_and_retry=False)
+            logger.warning(f"Could not upsert session '{session.session_id}' into {self.table.name}: {e}")
+            return None
+        return self.read(session_id=session.session_id)
@@ -0,0 +1 @@
+"""Shared language-model plumbing used by the agent and team builders."""
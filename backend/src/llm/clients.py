@@ -0,0 +1,284 @@
+"""Process-wide registry of model provider HTTP clients.
+
+Every agent, memory manager and team leader built by this backend gets its model from
+``get_model``. The returned ``PooledOpenAIChat`` resolves its OpenAI clients from a shared
+registry keyed by provider, model id and client settings (base URL, credentials, timeout, retries,
+headers and ``client_params``), so requests reuse warm keep-alive connections
+instead of paying a TCP/TLS handshake on every run. Calls to models with configured rate limits
+are scheduled through ``llm.scheduler.model_scheduler``.
+
+agno runs the tool calls the model makes in one turn concurrently, without a limit, and adds their
+results to the conversation in the order the model made them. ``tool_call_concurrency`` caps how many
+of one turn's calls run at the same time, so an agent fanning out over many searches does not
+occupy every tool thread or hit an upstream API all at once. Calls of the synchronous tools
+``BaseToolBuilder`` registered with ``tools.base.executor.tool_executor`` run on its thread pool, with
+the tool's timeout, instead of agno's ``asyncio.to_thread``.
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import itertools
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from inspect import iscoroutinefunction
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+from agno.exceptions import AgentRunException
+from agno.models.message import Message
+from agno.models.openai import OpenAIChat
+from agno.models.response import ModelResponse
+from agno.tools.function import FunctionCall
+from agno.utils.timer import Timer
+from openai import AsyncOpenAI, OpenAI
+
+from llm.scheduler import BATCH_PRIORITY, INTERACTIVE_PRIORITY, estimate_tokens, model_scheduler
+from llm.settings import llm_settings
+from llm.usage import model_usage
+from tools.base.executor import ToolTimeoutError, tool_executor
+
+logger = logging.getLogger(__name__)
+
+# Structure: {(provider, model_id, settings_digest): {'client': OpenAI, 'async_client': AsyncOpenAI}}
+MODEL_CLIENT_REGISTRY: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+_registry_lock = threading.Lock()
+
+# Tool call turns of every model in this process; "capped_turns" made more calls than their model's cap
+TOOL_CALL_TURN_TOTALS: Dict[str, int] = {"turns": 0, "calls": 0, "max_calls_per_turn": 0, "capped_turns": 0}
+
+
+def _http_client_kwargs() -> Dict[str, Any]:
+    """Return the keyword arguments shared by the sync and async httpx clients."""
+    http2 = llm_settings.http2 and importlib.util.find_spec("h2") is not None
+    if llm_settings.http2 and not http2:
+        logger.warning("LLM_HTTP2 is enabled but the 'h2' package is not installed; using HTTP/1.1 keep-alive.")
+    return {
+        "http2": http2,
+        "timeout": llm_settings.timeout,
+        "limits": httpx.Limits(
+            max_connections=llm_settings.max_connections,
+            max_keepalive_connections=llm_settings.max_keepalive_connections,
+            keepalive_expiry=llm_settings.keepalive_expiry,
+        ),
+    }
+
+
+def _client_key(model: OpenAIChat, client_params: Dict[str, Any]) -> Tuple[str, str, str]:
+    """Return the registry key of a model: its provider, id and a digest of its effective client settings."""
+    settings = json.dumps(client_params, sort_keys=True, default=repr)
+    return model.provider, model.id, hashlib.sha256(settings.encode()).hexdigest()
+
+
+def _get_clients(model: OpenAIChat) -> Dict[str, Any]:
+    """Return the shared client pair for the model's provider, id and client settings, creating it on first use."""
+    client_params = model._get_client_params()
+    key = _client_key(model, client_params)
+    clients = MODEL_CLIENT_REGISTRY.get(key)
+    if clients is not None:
+        return clients
+
+    with _registry_lock:
+        clients = MODEL_CLIENT_REGISTRY.get(key)
+        if clients is None:
+            if model_scheduler.limit_for(model.id) is not None:
+                # Rate-limited calls are retried by the scheduler, which paces them against the shared budget
+                client_params["max_retries"] = 0
+            http_kwargs = _http_client_kwargs()
+            clients = {
+                "client": OpenAI(**client_params, http_client=httpx.Client(**http_kwargs)),
+                "async_client": AsyncOpenAI(**client_params, http_client=httpx.AsyncClient(**http_kwargs)),
+            }
+            MODEL_CLIENT_REGISTRY[key] = clients
+            logger.info(f"Created shared model client for provider '{key[0]}' and model '{key[1]}'")
+    return clients
+
+
+@dataclass
+class PooledOpenAIChat(OpenAIChat):
+    """OpenAIChat that draws its clients from the process-wide registry instead of creating its own.
+
+    The lookup happens on every call, so copies made by agno (e.g. the memory manager's
+    deep copy of the model) keep sharing the same connection pool. Every call's latency and
+    token usage is recorded in ``llm.usage.model_usage`` under `usage_role`, and calls to
+    rate-limited models wait for budget from ``llm.scheduler.model_scheduler``.
+    """
+
+    # What the model is used for, e.g. "agent", "memory" or "leader"
+    usage_role: str = "agent"
+    # Tool calls of one turn run at the same time; None runs them all at once. Separate turns, e.g. of
+    # concurrent runs sharing the model, each get their own cap.
+    tool_call_concurrency: Optional[int] = None
+    # Structure: {id(function_call): slots of its turn}, for turns making more calls than `tool_call_concurrency`
+    _tool_call_slots: Dict[int, asyncio.Semaphore] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def get_client(self) -> OpenAI:
+        return _get_clients(self)["client"]
+
+    def get_async_client(self) -> AsyncOpenAI:
+        return _get_clients(self)["async_client"]
+
+    def _priority(self) -> int:
+        return BATCH_PRIORITY if self.usage_role in llm_settings.batch_usage_roles else INTERACTIVE_PRIORITY
+
+    def _estimate_tokens(self, messages: List[Message]) -> int:
+        return estimate_tokens(messages, self.max_completion_tokens or self.max_tokens)
+
+    async def arun_function_calls(
+        self, function_calls: List[FunctionCall], function_call_results: List[Message]
+    ) -> AsyncIterator[ModelResponse]:
+        totals = TOOL_CALL_TURN_TOTALS
+        totals["turns"] += 1
+        totals["calls"] += len(function_calls)
+        totals["max_calls_per_turn"] = max(totals["max_calls_per_turn"], len(function_calls))
+        if self.tool_call_concurrency is not None and len(function_calls) > self.tool_call_concurrency:
+            totals["capped_turns"] += 1
+            # Created by the turn, on the loop running it
+            slots = asyncio.Semaphore(self.tool_call_concurrency)
+            self._tool_call_slots.update((id(function_call), slots) for function_call in function_calls)
+        try:
+            async for response in super().arun_function_calls(function_calls, function_call_results):
+                yield response
+        finally:
+            for function_call in function_calls:
+                self._tool_call_slots.pop(id(function_call), None)
+
+    async def _arun_function_call(self, function_call: FunctionCall) -> Any:
+        slots = self._tool_call_slots.get(id(function_call))
+        if slots is None:
+            return await self._run_function_call(function_call)
+        async with slots:
+            return await self._run_function_call(function_call)
+
+    async def _run_function_call(self, function_call: FunctionCall) -> Any:
+        timeout = tool_executor.offloaded_timeout(function_call.function.entrypoint)
+        hooks = function_call.function.tool_hooks or []
+        if timeout is None or any(iscoroutinefunction(hook) for hook in hooks):
+            return await super()._arun_function_call(function_call)
+
+        # agno would run the synchronous call with asyncio.to_thread, on the default executor
+        timer = Timer()
+        timer.start()
+        success: Any = False
+        try:
+            success = await tool_executor.run(
+                function_call.execute, (), {}, timeout=timeout, name=function_call.function.name
+            )
+        except ToolTimeoutError as e:
+            function_call.error = str(e)
+        except AgentRunException as e:
+            success = e
+        timer.stop()
+        return success, timer, function_call
+
+    def invoke(self, messages: List[Message]) -> Any:
+        for attempt in itertools.count():
+            reservation = model_scheduler.acquire_sync(self.id, self._estimate_tokens(messages))
+            start = time.perf_counter()
+            try:
+                response = super().invoke(messages)
+            except Exception as e:
+                model_usage.record(self.id, self.usage_role, time.perf_counter() - start, error=True)
+                delay = model_scheduler.backoff(self.id, e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            model_usage.record(self.id, self.usage_role, time.perf_counter() - start, usage=response.usage)
+            reservation.settle(response.usage)
+            return response
+
+    async def ainvoke(self, messages: List[Message]) -> Any:
+        for attempt in itertools.count():
+            reservation = await model_scheduler.acquire(self.id, self._estimate_tokens(messages), self._priority())
+            start = time.perf_counter()
+            try:
+                response = await super().ainvoke(messages)
+            except Exception as e:
+                model_usage.record(self.id, self.usage_role, time.perf_counter() - start, error=True)
+                delay = model_scheduler.backoff(self.id, e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            model_usage.record(self.id, self.usage_role, time.perf_counter() - start, usage=response.usage)
+            reservation.settle(response.usage)
+            return response
+
+    def invoke_stream(self, messages: List[Message]) -> Iterator[Any]:
+        for attempt in itertools.count():
+            reservation = model_scheduler.acquire_sync(self.id, self._estimate_tokens(messages))
+            start = time.perf_counter()
+            first_token, usage, error = None, None, True
+            try:
+                for chunk in super().invoke_stream(messages):
+                    if first_token is None:
+                        first_token = time.perf_counter() - start
+                    if chunk.usage is not None:
+                        usage = chunk.usage
+                    yield chunk
+                error = False
+                return
+            except Exception as e:
+                # Only retry if nothing has been streamed to the caller yet
+                delay = model_scheduler.backoff(self.id, e, attempt) if first_token is None else None
+                if delay is None:
+                    raise
+                time.sleep(delay)
+            finally:
+                model_usage.record(self.id, self.usage_role, time.perf_counter() - start, usage, first_token, error)
+                reservation.settle(usage)
+
+    async def ainvoke_stream(self, messages: List[Message]) -> AsyncIterator[Any]:
+        for attempt in itertools.count():
+            reservation = await model_scheduler.acquire(self.id, self._estimate_tokens(messages), self._priority())
+            start = time.perf_counter()
+            first_token, usage, error = None, None, True
+            try:
+                async for chunk in super().ainvoke_stream(messages):
+                    if first_token is None:
+                        first_token = time.perf_counter() - start
+                    if chunk.usage is not None:
+                        usage = chunk.usage
+                    yield chunk
+                error = False
+                return
+            except Exception as e:
+                # Only retry if nothing has been streamed to the caller yet
+                delay = model_scheduler.backoff(self.id, e, attempt) if first_token is None else None
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+            finally:
+                model_usage.record(self.id, self.usage_role, time.perf_counter() - start, usage, first_token, error)
+                reservation.settle(usage)
+
+
+def get_model(model_id: str, usage_role: str = "agent", **kwargs: Any) -> OpenAIChat:
+    """
+    Return a chat model backed by the shared client for `model_id`.
+
+    Args:
+        model_id (str): The model identifier, e.g. "gpt-4.1".
+        usage_role (str): Label under which the model's latency and token usage are recorded.
+        **kwargs: Additional OpenAIChat parameters.
+
+    Returns:
+        OpenAIChat: A model instance reusing the process-wide HTTP connection pool.
+    """
+    if llm_settings.base_url and "base_url" not in kwargs:
+        kwargs["base_url"] = llm_settings.base_url
+    return PooledOpenAIChat(id=model_id, usage_role=usage_role, **kwargs)
+
+
+async def close_model_clients() -> None:
+    """Close every shared client and empty the registry."""
+    with _registry_lock:
+        clients = list(MODEL_CLIENT_REGISTRY.values())
+        MODEL_CLIENT_REGISTRY.clear()
+    for pair in clients:
+        pair["client"].close()
+        await pair["async_client"].close()
@@ -0,0 +1,29 @@
+"""Per-request model routing policy."""
+
+from llm.settings import llm_settings
+
+
+def route_model(agent_id: str, message: str, requested_model_id: str) -> str:
+    """
+    Return the model to run `agent_id` with for `message`.
+
+    The first rule in ``LLM_ROUTING_RULES`` whose conditions all match wins; without a match
+    the requested model is used.
+
+    Args:
+        agent_id (str): The agent handling the run.
+        message (str): The user message of the run.
+        requested_model_id (str): The model requested by the client.
+
+    Returns:
+        str: The model identifier to use.
+    """
+    for rule in llm_settings.routing_rules:
+        if rule.agent_ids is not None and agent_id not in rule.agent_ids:
+            continue
+        if rule.min_message_chars is not None and len(message) < rule.min_message_chars:
+            continue
+        if rule.max_message_chars is not None and len(message) > rule.max_message_chars:
+            continue
+        return rule.model_id
+    return requested_model_id
@@ -0,0 +1,345 @@
+"""Rate-limit-aware scheduling of model calls.
+
+Models listed in ``LlmSettings.rate_limits`` get a requests-per-minute and tokens-per-minute
+token bucket. Before each call ``PooledOpenAIChat`` reserves one request and an estimate of the
+call's tokens from ``model_scheduler``, waiting when the bucket is empty; waiting calls are
+served interactive first, then batch (``LlmSettings.batch_usage_roles``), then in arrival
+order. The reservation is corrected with the provider's reported usage once the call returns.
+
+A 429 from the provider pauses the model's bucket for the provider's Retry-After (or an
+exponential backoff) and empties it, so the queued calls resume at the refill rate instead of
+retrying in a burst. With ``rate_limit_backend="postgres"`` the buckets live in the
+``ai.llm_rate_limits`` table and are shared by every worker using the database.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from agno.exceptions import ModelProviderError
+from agno.models.message import Message
+from sqlalchemy import Column, Float, MetaData, String, Table, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Engine
+
+from llm.settings import RateLimit, llm_settings
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE_PRIORITY = 0
+BATCH_PRIORITY = 1
+
+
+def estimate_tokens(messages: List[Message], max_completion_tokens: Optional[int] = None) -> int:
+    """Estimate the tokens a call will use: ~4 characters per prompt token plus the completion budget."""
+    prompt_chars = sum(len(str(message.content or "")) for message in messages)
+    return prompt_chars // 4 + (max_completion_tokens or llm_settings.rate_limit_completion_tokens)
+
+
+def _take(state: Dict[str, float], limit: RateLimit, tokens: int, now: float) -> float:
+    """
+    Refill the bucket `state` up to `now` and take one request and `tokens` from it.
+
+    Returns:
+        float: 0 if the budget was taken, otherwise the seconds until it will be available.
+    """
+    if state["paused_until"] > now:
+        return state["paused_until"] - now
+
+    elapsed = max(0.0, now - state["updated_at"])
+    state["updated_at"] = now
+    wait = 0.0
+    for key, per_minute, amount in (
+        ("requests", limit.requests_per_minute, 1),
+        ("tokens", limit.tokens_per_minute, min(tokens, limit.tokens_per_minute or tokens)),
+    ):
+        if per_minute is None:
+            continue
+        rate = per_minute / 60
+        state[key] = min(float(per_minute), state[key] + elapsed * rate)
+        if state[key] < amount:
+            wait = max(wait, (amount - state[key]) / rate)
+    if wait > 0:
+        return wait
+
+    state["requests"] -= 1
+    state["tokens"] -= tokens
+    return 0.0
+
+
+def _full_bucket(limit: RateLimit, now: float) -> Dict[str, float]:
+    return {
+        "requests": float(limit.requests_per_minute or 0),
+        "tokens": float(limit.tokens_per_minute or 0),
+        "updated_at": now,
+        "paused_until": 0.0,
+    }
+
+
+class LocalRateBudget:
+    """Token buckets kept in process memory."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Dict[str, float]] = {}
+
+    def try_take(self, model_id: str, limit: RateLimit, tokens: int) -> float:
+        now = time.time()
+        with self._lock:
+            state = self._buckets.setdefault(model_id, _full_bucket(limit, now))
+            return _take(state, limit, tokens, now)
+
+    def adjust(self, model_id: str, tokens: int) -> None:
+        with self._lock:
+            if model_id in self._buckets:
+                self._buckets[model_id]["tokens"] -= tokens
+
+    def pause(self, model_id: str, until: float) -> None:
+        with self._lock:
+            if model_id in self._buckets:
+                state = self._buckets[model_id]
+                state.update(requests=0.0, tokens=0.0, updated_at=until, paused_until=max(state["paused_until"], until))
+
+
+class PostgresRateBudget:
+    """Token buckets stored in Postgres, one row per model, shared by every worker.
+
+    Token corrections and pauses are applied in the same transaction as the process's next
+    take for the model, so settling a call does not cost an extra round trip.
+    """
+
+    def __init__(self, db_engine: Engine, table_name: str = "llm_rate_limits", schema: Optional[str] = "ai"):
+        self.db_engine = db_engine
+        self.table = Table(
+            table_name,
+            MetaData(schema=schema),
+            Column("model_id", String, primary_key=True),
+            Column("requests", Float, nullable=False),
+            Column("tokens", Float, nullable=False),
+            Column("updated_at", Float, nullable=False),
+            Column("paused_until", Float, nullable=False),
+        )
+        self._lock = threading.Lock()
+        self._created = False
+        self._pending_tokens: Dict[str, int] = {}
+        self._pending_pause: Dict[str, float] = {}
+
+    def _ensure_table(self) -> None:
+        if not self._created:
+            if self.table.schema:
+                with self.db_engine.begin() as conn:
+                    conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {self.table.schema};"))
+            self.table.create(self.db_engine, checkfirst=True)
+            self._created = True
+
+    def try_take(self, model_id: str, limit: RateLimit, tokens: int) -> float:
+        with self._lock:
+            pending_tokens = self._pending_tokens.pop(model_id, 0)
+            pause_until = self._pending_pause.pop(model_id, None)
+        self._ensure_table()
+
+        now = time.time()
+        with self.db_engine.begin() as conn:
+            conn.execute(
+                postgresql.insert(self.table)
+                .values(model_id=model_id, **_full_bucket(limit, now))
+                .on_conflict_do_nothing(index_elements=["model_id"])
+            )
+            row = conn.execute(select(self.table).where(self.table.c.model_id == model_id).with_for_update()).one()
+            state = {key: row._mapping[key] for key in ("requests", "tokens", "updated_at", "paused_until")}
+            state["tokens"] -= pending_tokens
+            if pause_until is not None:
+                state.update(requests=0.0, tokens=0.0, updated_at=pause_until)
+                state["paused_until"] = max(state["paused_until"], pause_until)
+            wait = _take(state, limit, tokens, now)
+            conn.execute(self.table.update().where(self.table.c.model_id == model_id).values(**state))
+        return wait
+
+    def adjust(self, model_id: str, tokens: int) -> None:
+        with self._lock:
+            self._pending_tokens[model_id] = self._pending_tokens.get(model_id, 0) + tokens
+
+    def pause(self, model_id: str, until: float) -> None:
+        with self._lock:
+            self._pending_pause[model_id] = max(self._pending_pause.get(model_id, 0.0), until)
+
+
+@dataclass
+class Reservation:
+    """Budget taken for one model call."""
+
+    scheduler: Optional["ModelCallScheduler"]
+    model_id: str
+    tokens: int = 0
+
+    def settle(self, usage: Optional[Any]) -> None:
+        """Correct the reserved tokens with the usage the provider reported, if any."""
+        total_tokens = getattr(usage, "total_tokens", None)
+        if self.scheduler is not None and total_tokens is not None:
+            self.scheduler.budget.adjust(self.model_id, total_tokens - self.tokens)
+
+
+@dataclass
+class _ModelQueue:
+    # Heap of [priority, sequence, tokens] entries; the head is the next call to be served
+    waiters: List[List[int]] = field(default_factory=list)
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def notify(self) -> None:
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+class ModelCallScheduler:
+    """Serves model calls from per-model token buckets, highest priority first."""
+
+    def __init__(self, budget: Any):
+        self.budget = budget
+        self._queues: Dict[str, _ModelQueue] = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, float]] = {}
+
+    def limit_for(self, model_id: str) -> Optional[RateLimit]:
+        """Return the configured rate limit of `model_id`, or None if its calls are not scheduled."""
+        return llm_settings.rate_limits.get(model_id) or llm_settings.rate_limits.get("*")
+
+    def _record(self, model_id: str, **values: float) -> None:
+        with self._lock:
+            entry = self._metrics.setdefault(
+                model_id, {"calls": 0, "delayed_calls": 0, "wait_seconds_total": 0.0, "rate_limited": 0, "retries": 0}
+            )
+            for key, value in values.items():
+                entry[key] += value
+
+    async def _try_take(self, model_id: str, limit: RateLimit, tokens: int) -> float:
+        if isinstance(self.budget, PostgresRateBudget):
+            return await asyncio.to_thread(self.budget.try_take, model_id, limit, tokens)
+        return self.budget.try_take(model_id, limit, tokens)
+
+    async def acquire(self, model_id: str, tokens: int, priority: int = INTERACTIVE_PRIORITY) -> Reservation:
+        """
+        Wait until `model_id` has budget for one request of `tokens` tokens and reserve it.
+
+        Args:
+            model_id (str): The model being called.
+            tokens (int): Estimated tokens of the call, see `estimate_tokens`.
+            priority (int): INTERACTIVE_PRIORITY or BATCH_PRIORITY; lower is served first.
+
+        Returns:
+            Reservation: The reserved budget, to be settled with the call's usage.
+        """
+        limit = self.limit_for(model_id)
+        if limit is None:
+            return Reservation(scheduler=None, model_id=model_id)
+
+        queue = self._queues.setdefault(model_id, _ModelQueue())
+        entry = [priority, next(self._sequence), tokens]
+        heapq.heappush(queue.waiters, entry)
+        start = time.monotonic()
+        try:
+            while True:
+                changed = queue.changed
+                if queue.waiters[0] is entry:
+                    delay = await self._try_take(model_id, limit, tokens)
+                    if delay <= 0:
+                        break
+                else:
+                    delay = None
+                try:
+                    await asyncio.wait_for(changed.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            queue.waiters.remove(entry)
+            heapq.heapify(queue.waiters)
+            queue.notify()
+
+        waited = time.monotonic() - start
+        self._record(model_id, calls=1, delayed_calls=int(waited > 0.01), wait_seconds_total=waited)
+        return Reservation(scheduler=self, model_id=model_id, tokens=tokens)
+
+    def acquire_sync(self, model_id: str, tokens: int) -> Reservation:
+        """Blocking variant of `acquire` for synchronous model calls; these are served in arrival order."""
+        limit = self.limit_for(model_id)
+        if limit is None:
+            return Reservation(scheduler=None, model_id=model_id)
+
+        start = time.monotonic()
+        while (delay := self.budget.try_take(model_id, limit, tokens)) > 0:
+            time.sleep(delay)
+        waited = time.monotonic() - start
+        self._record(model_id, calls=1, delayed_calls=int(waited > 0.01), wait_seconds_total=waited)
+        return Reservation(scheduler=self, model_id=model_id, tokens=tokens)
+
+    def backoff(self, model_id: str, error: Exception, attempt: int) -> Optional[float]:
+        """
+        Handle a failed call: on a provider 429, pause the model's bucket and return how long to wait
+        before retrying.
+
+        Args:
+            model_id (str): The model that was called.
+            error (Exception): The error raised by the call.
+            attempt (int): Zero-based attempt number of the failed call.
+
+        Returns:
+            Optional[float]: Seconds to wait before retrying, or None if the call should not be retried.
+        """
+        if self.limit_for(model_id) is None:
+            return None
+        if not isinstance(error, ModelProviderError) or error.status_code != 429:
+            return None
+        self._record(model_id, rate_limited=1)
+        if attempt >= llm_settings.rate_limit_max_retries:
+            return None
+
+        delay = _retry_after(error)
+        if delay is None:
+            delay = min(60.0, 2.0**attempt)
+        self.budget.pause(model_id, time.time() + delay)
+        self._record(model_id, retries=1)
+        # Jitter keeps the retries of calls that failed together from landing together
+        return delay * random.uniform(1.0, 1.5)
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Return a snapshot of the scheduling counters per model."""
+        with self._lock:
+            snapshot = {model_id: dict(entry) for model_id, entry in self._metrics.items()}
+        for model_id, entry in snapshot.items():
+            queue = self._queues.get(model_id)
+            entry["queue_depth"] = len(queue.waiters) if queue else 0
+            entry["avg_wait_seconds"] = entry["wait_seconds_total"] / entry["calls"] if entry["calls"] else 0.0
+        return snapshot
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Return the provider's Retry-After in seconds from the OpenAI error behind `error`, if sent."""
+    response = getattr(error.__cause__, "response", None)
+    if response is None:
+        return None
+    try:
+        if "retry-after-ms" in response.headers:
+            return float(response.headers["retry-after-ms"]) / 1000
+        if "retry-after" in response.headers:
+            return float(response.headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+def _create_budget() -> Any:
+    if llm_settings.rate_limit_backend == "postgres":
+        from db.session import db_engine
+
+        return PostgresRateBudget(db_engine)
+    return LocalRateBudget()
+
+
+# Create the process-wide ModelCallScheduler
+model_scheduler = ModelCallScheduler(_create_budget())
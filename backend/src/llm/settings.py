@@ -0,0 +1,75 @@
+from typing import Dict, List, Literal, Optional
+
+from pydantic import BaseModel
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class RoutingRule(BaseModel):
+    """Route runs matching every set condition to `model_id`."""
+
+    model_id: str
+    agent_ids: Optional[List[str]] = None
+    min_message_chars: Optional[int] = None
+    max_message_chars: Optional[int] = None
+
+
+class RateLimit(BaseModel):
+    """Provider rate limits for a model; unset limits are not enforced."""
+
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+
+
+class LlmSettings(BaseSettings):
+    """Model provider client settings that are set using environment variables prefixed with ``LLM_``."""
+
+    model_config = SettingsConfigDict(env_prefix="LLM_")
+
+    # Override the provider endpoint, e.g. to point at a local OpenAI-compatible stub server.
+    base_url: Optional[str] = None
+
+    # Negotiate HTTP/2 when the `h2` package is installed, otherwise fall back to HTTP/1.1 keep-alive.
+    http2: bool = True
+
+    # Connection pool limits for each shared (provider, model) HTTP client.
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+
+    # Request timeout in seconds.
+    timeout: float = 60.0
+
+    # Defaults for memory management and team leader models when the agent/team config leaves them unset.
+    # Unset means the run's model is reused.
+    memory_model_id: Optional[str] = None
+    leader_model_id: Optional[str] = None
+
+    # Per-request routing policy applied to agent runs, first matching rule wins. Set as JSON, e.g.
+    # LLM_ROUTING_RULES='[{"model_id": "gpt-4.1-mini", "max_message_chars": 200}]'
+    routing_rules: List[RoutingRule] = []
+
+    # Provider rate limits per model id, "*" applies to models without their own entry. Calls to a model
+    # with limits are scheduled through `llm.scheduler`. Set as JSON, e.g.
+    # LLM_RATE_LIMITS='{"gpt-4.1": {"requests_per_minute": 500, "tokens_per_minute": 30000}}'
+    rate_limits: Dict[str, RateLimit] = {}
+
+    # "local" keeps the budget per process; "postgres" shares it between workers through a table.
+    rate_limit_backend: Literal["local", "postgres"] = "local"
+
+    # Completion tokens reserved per call when the model sets no max_tokens; corrected once usage is known.
+    rate_limit_completion_tokens: int = 1000
+
+    # Retries of rate-limited (429) calls, spaced by the provider's Retry-After or exponential backoff.
+    rate_limit_max_retries: int = 3
+
+    # Usage roles scheduled behind interactive calls when waiting for budget.
+    batch_usage_roles: List[str] = ["memory", "session_summary"]
+
+    # "cache_friendly" keeps each agent's system prompt byte-stable across a user's requests so the provider's
+    # prefix cache covers it and the session history after it: the current time moves from the system prompt
+    # to a <context> block at the end of the user message. "default" keeps agno's layout.
+    prompt_layout: Literal["default", "cache_friendly"] = "default"
+
+
+# Create LlmSettings object
+llm_settings = LlmSettings()
@@ -0,0 +1,80 @@
+"""Process-wide per-model latency and token usage counters."""
+
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+
+class ModelUsageTracker:
+    """Accumulates call counts, latency and token usage per (model_id, role)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._usage: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    def record(
+        self,
+        model_id: str,
+        role: str,
+        seconds: float,
+        usage: Optional[Any] = None,
+        time_to_first_token: Optional[float] = None,
+        error: bool = False,
+    ) -> None:
+        """
+        Record one model call.
+
+        Args:
+            model_id (str): The model that served the call.
+            role (str): What the call was for, e.g. "agent", "memory" or "leader".
+            seconds (float): Wall-clock duration of the call.
+            usage (Optional[Any]): The provider's usage object (OpenAI ``CompletionUsage``), if returned.
+            time_to_first_token (Optional[float]): Seconds until the first streamed chunk, for streaming calls.
+            error (bool): Whether the call failed.
+        """
+        details = getattr(usage, "prompt_tokens_details", None)
+        with self._lock:
+            entry = self._usage.setdefault(
+                (model_id, role),
+                {
+                    "calls": 0,
+                    "errors": 0,
+                    "seconds_total": 0.0,
+                    "input_tokens": 0,
+                    "output_tokens": 0,
+                    "cached_tokens": 0,
+                    "streams": 0,
+                    "time_to_first_token_total": 0.0,
+                },
+            )
+            entry["calls"] += 1
+            entry["errors"] += int(error)
+            entry["seconds_total"] += seconds
+            if usage is not None:
+                entry["input_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+                entry["output_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+                entry["cached_tokens"] += getattr(details, "cached_tokens", 0) or 0
+            if time_to_first_token is not None:
+                entry["streams"] += 1
+                entry["time_to_first_token_total"] += time_to_first_token
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Return the counters as ``{model_id: {role: {...}}}`` with averages filled in."""
+        result: Dict[str, Dict[str, Dict[str, float]]] = {}
+        with self._lock:
+            for (model_id, role), entry in self._usage.items():
+                result.setdefault(model_id, {})[role] = {
+                    **entry,
+                    "avg_seconds": entry["seconds_total"] / entry["calls"] if entry["calls"] else 0.0,
+                    "avg_time_to_first_token": (
+                        entry["time_to_first_token_total"] / entry["streams"] if entry["streams"] else 0.0
+                    ),
+                    # Share of prompt tokens served from the provider's prompt cache
+                    "cached_token_ratio": (
+                        entry["cached_tokens"] / entry["input_tokens"] if entry["input_tokens"] else 0.0
+                    ),
+                }
+        return result
+
+
+# Create the process-wide ModelUsageTracker
+model_usage = ModelUsageTracker()
@@ -0,0 +1 @@
+"""User memory infrastructure shared by the agent builders and API routes."""
@@ -0,0 +1,74 @@
+"""Compaction of old user memories into summary memories."""
+
+import logging
+from datetime import datetime, timezone
+
+from agno.memory.v2.db.schema import MemoryRow
+from agno.memory.v2.schema import UserMemory
+from agno.models.base import Model
+from agno.models.message import Message
+
+from memory.db import IndexedPostgresMemoryDb
+from memory.settings import memory_settings
+
+logger = logging.getLogger(__name__)
+
+COMPACTION_PROMPT = (
+    "You compact long-term memories about a user. Merge the memories below into a short list of "
+    "standalone facts, keeping preferences, personal details and ongoing goals, dropping duplicates "
+    "and anything superseded by a later memory. Reply with one fact per line and nothing else."
+)
+
+
+async def acompact_user_memories(db: IndexedPostgresMemoryDb, model: Model, user_id: str) -> int:
+    """
+    Replace all but the newest `compaction_keep_recent` memories of a user with summary memories.
+
+    Old memories are summarized `compaction_batch_size` at a time; each summary is stored as a
+    memory with the "summary" topic and the memories it replaces are deleted.
+
+    Args:
+        db (IndexedPostgresMemoryDb): The memory db holding the user's memories.
+        model (Model): The model used to write the summaries.
+        user_id (str): The user whose memories should be compacted.
+
+    Returns:
+        int: The number of memories that were compacted away.
+    """
+    older = db.read_older_memories(user_id=user_id, keep_recent=memory_settings.compaction_keep_recent)
+    batch_size = max(2, memory_settings.compaction_batch_size)
+    compacted = 0
+    for start in range(0, len(older), batch_size):
+        batch = older[start : start + batch_size]
+        if len(batch) < 2:
+            break
+        facts = "\n".join(f"- {row.memory.get('memory', '')}" for row in batch)
+        response = await model.aresponse(
+            messages=[Message(role="system", content=COMPACTION_PROMPT), Message(role="user", content=facts)]
+        )
+        if not response.content:
+            logger.warning(f"Empty compaction summary for user '{user_id}'; keeping original memories")
+            continue
+
+        summary = UserMemory(
+            memory=response.content.strip(), topics=["summary"], last_updated=datetime.now(timezone.utc)
+        )
+        row = MemoryRow(user_id=user_id, memory=summary.to_dict())
+        summary.memory_id = row.id
+        row.memory = summary.to_dict()
+        db.upsert_memory(row)
+        for old in batch:
+            db.delete_memory(old.id)  # type: ignore
+        compacted += len(batch)
+
+    if compacted:
+        logger.info(f"Compacted {compacted} memories for user '{user_id}'")
+    return compacted
+
+
+async def amaybe_compact_user_memories(db: IndexedPostgresMemoryDb, model: Model, user_id: str) -> int:
+    """Compact a user's memories when compaction is enabled and they exceed the threshold."""
+    threshold = memory_settings.compaction_threshold
+    if threshold is None or db.count_memories(user_id) <= threshold:
+        return 0
+    return await acompact_user_memories(db, model, user_id)
@@ -0,0 +1,260 @@
+"""Postgres user-memory storage with indexed, bounded retrieval.
+
+``IndexedPostgresMemoryDb`` keeps agno's ``user_memories`` layout and adds a composite
+``(user_id, created_at)`` index plus a nullable pgvector ``embedding`` column, so the prompt
+can be built from the top-k memories of a user instead of every memory they have ever had.
+The table can also be partitioned by month of ``created_at``, see ``db.partitions``.
+
+Tables created before the embedding column existed are altered by ``migrate_memory_table``
+(``scripts/manage_user_memories.py migrate``), never on the request path: until then the table is
+read without embeddings, and vector retrieval falls back to the newest memories. Whether the table has
+the column is read once per process, at API startup (``warm_memory_table``), so building an agent's
+memory does no database round trip.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from agno.embedder.base import Embedder
+from agno.memory.v2.db.postgres import PostgresMemoryDb
+from agno.memory.v2.db.schema import MemoryRow
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import Column, DateTime, Index, MetaData, String, Table, create_engine, func, inspect, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from db.partitions import create_partitioned_table, forget_layout, is_partitioned, upsert_partitioned
+from db.settings import partition_settings
+from memory.settings import memory_settings
+
+logger = logging.getLogger(__name__)
+
+# Whether each memory table has the embedding column, read once per process
+_HAS_EMBEDDING: Dict[Tuple[Optional[str], str], bool] = {}
+
+
+def _qualified(schema: Optional[str], table_name: str) -> str:
+    return f"{schema}.{table_name}" if schema else table_name
+
+
+def has_embedding_column(engine: Engine, schema: Optional[str], table_name: str) -> bool:
+    """Return whether the memory table has the embedding column; a table yet to be created will have it."""
+    key = (schema, table_name)
+    if key not in _HAS_EMBEDDING:
+        with engine.connect() as conn:
+            columns = set(
+                conn.execute(
+                    text(
+                        "SELECT attname FROM pg_attribute "
+                        "WHERE attrelid = to_regclass(:table) AND attnum > 0 AND NOT attisdropped"
+                    ),
+                    {"table": _qualified(schema, table_name)},
+                ).scalars()
+            )
+        _HAS_EMBEDDING[key] = not columns or "embedding" in columns
+        if not _HAS_EMBEDDING[key]:
+            logger.warning(
+                f"{_qualified(schema, table_name)} has no embedding column; memories are stored without "
+                "embeddings until `scripts/manage_user_memories.py migrate` is run"
+            )
+    return _HAS_EMBEDDING[key]
+
+
+def migrate_memory_table(
+    engine: Engine, schema: Optional[str] = "ai", table_name: str = "user_memories"
+) -> Dict[str, Any]:
+    """
+    Add the embedding column and the `(user_id, created_at)` index to an existing memory table.
+
+    The index is built with ``CREATE INDEX CONCURRENTLY`` so writes continue meanwhile; partitioned
+    tables are created with it. Run while the application is up, e.g. as a deploy step.
+    """
+    table = _qualified(schema, table_name)
+    partitioned = is_partitioned(engine, schema, table_name)
+    if partitioned is None:
+        return {"table": table, "skipped": "table does not exist"}
+    with engine.begin() as conn:
+        # Adding a nullable column is quick, but waits for the table lock behind long transactions
+        conn.execute(text("SET LOCAL lock_timeout = '10s'"))
+        conn.execute(
+            text(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS embedding vector({memory_settings.embedding_dimensions})"
+            )
+        )
+    index = f"{table_name}_user_id_created_at_idx"
+    if not partitioned:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index} ON {table} (user_id, created_at DESC)"
+            )
+    _HAS_EMBEDDING[(schema, table_name)] = True
+    forget_layout(schema, table_name)
+    return {"table": table, "embedding_column": True, "index": index if not partitioned else "created with the table"}
+
+
+def warm_memory_table(engine: Engine, schema: Optional[str] = "ai", table_name: str = "user_memories") -> None:
+    """Read the memory table's embedding column and layout into the process caches, e.g. at startup."""
+    has_embedding_column(engine, schema, table_name)
+    is_partitioned(engine, schema, table_name)
+
+
+class IndexedPostgresMemoryDb(PostgresMemoryDb):
+    """PostgresMemoryDb with a user/recency index, optional embeddings and top-k reads."""
+
+    def __init__(
+        self,
+        table_name: str,
+        schema: Optional[str] = "ai",
+        db_url: Optional[str] = None,
+        db_engine: Optional[Engine] = None,
+        embedder: Optional[Embedder] = None,
+        partitioned: Optional[bool] = None,
+    ):
+        self.embedder = embedder
+        # None follows the existing table, or DB_PARTITIONS_ENABLED for a table yet to be created
+        self._partitioned = partitioned
+        # agno's constructor inspects the engine, which connects; a memory db is built for every agent
+        if db_engine is None and db_url is not None:
+            db_engine = create_engine(db_url)
+        if db_engine is None:
+            raise ValueError("Must provide either db_url or db_engine")
+        self.table_name: str = table_name
+        self.schema: Optional[str] = schema
+        self.db_url: Optional[str] = db_url
+        self.db_engine: Engine = db_engine
+        self.metadata: MetaData = MetaData(schema=self.schema)
+        self.Session: scoped_session = scoped_session(sessionmaker(bind=self.db_engine))
+        self.table: Table = self.get_table()
+
+    @property
+    def inspector(self) -> Any:
+        return inspect(self.db_engine)
+
+    def get_table(self) -> Table:
+        embedding = (
+            [Column("embedding", Vector(memory_settings.embedding_dimensions), nullable=True)]
+            if has_embedding_column(self.db_engine, self.schema, self.table_name)
+            else []
+        )
+        return Table(
+            self.table_name,
+            self.metadata,
+            Column("id", String, primary_key=True),
+            Column("user_id", String, index=True),
+            Column("memory", postgresql.JSONB, server_default=text("'{}'::jsonb")),
+            *embedding,
+            Column("created_at", DateTime(timezone=True), server_default=text("now()")),
+            Column("updated_at", DateTime(timezone=True), onupdate=text("now()")),
+            Index(f"{self.table_name}_user_id_created_at_idx", "user_id", "created_at"),
+            extend_existing=True,
+        )
+
+    @property
+    def has_embeddings(self) -> bool:
+        """Whether memories are stored with embeddings: an embedder is set and the table has the column."""
+        return self.embedder is not None and "embedding" in self.table.c
+
+    @property
+    def partitioned(self) -> bool:
+        """Whether the table is (or will be created) partitioned by month of `created_at`."""
+        if self._partitioned is None:
+            layout = is_partitioned(self.db_engine, self.schema, self.table_name)
+            if layout is None:
+                return partition_settings.enabled
+            self._partitioned = layout
+        return self._partitioned
+
+    def create(self) -> None:
+        if not self.partitioned or self.table_exists():
+            super().create()
+            return
+        create_partitioned_table(self.db_engine, self.get_table(), key_type="timestamptz")
+
+    def _embed(self, memory: MemoryRow) -> Optional[List[float]]:
+        content = memory.memory.get("memory") if memory.memory else None
+        if not self.has_embeddings or not content:
+            return None
+        return self.embedder.get_embedding(content)  # type: ignore[union-attr]
+
+    def upsert_memory(self, memory: MemoryRow, create_and_retry: bool = True) -> None:
+        """Create or update a memory, storing its embedding when an embedder is configured."""
+        embedding = self._embed(memory)
+        try:
+            with self.Session() as sess, sess.begin():
+                values = dict(id=memory.id, user_id=memory.user_id, memory=memory.memory)
+                if "embedding" in self.table.c:
+                    values["embedding"] = embedding
+                if self.partitioned:
+                    updates = {column: value for column, value in values.items() if column != "id"}
+                    upsert_partitioned(sess.connection(), self.table, "id", values, updates)
+                    return None
+                stmt = postgresql.insert(self.table).values(**values)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["id"],
+                    set_={column: stmt.excluded[column] for column in values if column != "id"},
+                )
+                sess.execute(stmt)
+        except Exception as e:
+            logger.debug(f"Exception upserting into table {self.table.name}: {e}")
+            self.create()
+            if create_and_retry:
+                return self.upsert_memory(memory, create_and_retry=False)
+        return None
+
+    def search_memories(self, user_id: str, query: str, limit: int) -> List[MemoryRow]:
+        """
+        Return the `limit` memories of a user most relevant to `query`.
+
+        Relevance is the cosine similarity to the query, halved every `recency_half_life_days`
+        of memory age. Falls back to the newest memories without an embedder or embedding column.
+        """
+        if not self.has_embeddings:
+            return self.read_memories(user_id=user_id, limit=limit)
+
+        query_embedding = self.embedder.get_embedding(query)  # type: ignore[union-attr]
+        age_days = func.extract("epoch", func.now() - self.table.c.created_at) / 86400.0
+        score = (1 - self.table.c.embedding.cosine_distance(query_embedding)) * func.power(
+            0.5, age_days / memory_settings.recency_half_life_days
+        )
+        stmt = (
+            select(self.table.c.id, self.table.c.user_id, self.table.c.memory)
+            .where(self.table.c.user_id == user_id, self.table.c.embedding.isnot(None))
+            .order_by(score.desc())
+            .limit(limit)
+        )
+        with self.Session() as sess, sess.begin():
+            rows = sess.execute(stmt).fetchall()
+        return [MemoryRow.model_validate(row) for row in rows]
+
+    def count_memories(self, user_id: str) -> int:
+        """Return how many memories a user has."""
+        stmt = select(func.count()).select_from(self.table).where(self.table.c.user_id == user_id)
+        with self.Session() as sess, sess.begin():
+            return sess.execute(stmt).scalar_one()
+
+    def read_older_memories(self, user_id: str, keep_recent: int) -> List[MemoryRow]:
+        """Return a user's memories except the newest `keep_recent`, oldest first."""
+        newest = (
+            select(self.table.c.id)
+            .where(self.table.c.user_id == user_id)
+            .order_by(self.table.c.created_at.desc())
+            .limit(keep_recent)
+        )
+        stmt = (
+            select(self.table)
+            .where(self.table.c.user_id == user_id, self.table.c.id.not_in(newest))
+            .order_by(self.table.c.created_at.asc())
+        )
+        with self.Session() as sess, sess.begin():
+            rows = sess.execute(stmt).fetchall()
+        return [MemoryRow.model_validate(row) for row in rows]
+
+    def read_memories_without_embedding(self, limit: int) -> List[MemoryRow]:
+        """Return up to `limit` memories that have no embedding yet."""
+        if "embedding" not in self.table.c:
+            return []
+        stmt = select(self.table).where(self.table.c.embedding.is_(None)).limit(limit)
+        with self.Session() as sess, sess.begin():
+            rows = sess.execute(stmt).fetchall()
+        return [MemoryRow.model_validate(row) for row in rows]
@@ -0,0 +1,41 @@
+"""Bounded user-memory retrieval for the agent prompt."""
+
+from typing import List, Optional
+
+from agno.agent import Agent
+from agno.memory.v2.memory import Memory
+from agno.memory.v2.schema import UserMemory
+
+from memory.db import IndexedPostgresMemoryDb
+from memory.settings import memory_settings
+
+
+class BoundedMemory(Memory):
+    """Memory whose prompt-facing reads return at most `retrieval_limit` memories.
+
+    Only ``get_user_memories`` (used to build the system prompt) is bounded; memory
+    extraction still sees every memory so it can update or deduplicate them.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The message of the current run, used to rank memories in "vector" retrieval
+        self.query: Optional[str] = None
+
+    def get_user_memories(self, user_id: Optional[str] = None, refresh_from_db: bool = True) -> List[UserMemory]:
+        if memory_settings.retrieval == "all" or not isinstance(self.db, IndexedPostgresMemoryDb):
+            return super().get_user_memories(user_id=user_id, refresh_from_db=refresh_from_db)
+
+        user_id = user_id or "default"
+        limit = memory_settings.retrieval_limit
+        if memory_settings.retrieval == "vector" and self.query:
+            rows = self.db.search_memories(user_id=user_id, query=self.query, limit=limit)
+        else:
+            rows = self.db.read_memories(user_id=user_id, limit=limit)
+        return [UserMemory.from_dict({**row.memory, "memory_id": row.id}) for row in rows]
+
+
+def set_memory_query(agent: Agent, message: str) -> None:
+    """Let the agent's memory rank user memories against the message of the upcoming run."""
+    if isinstance(agent.memory, BoundedMemory):
+        agent.memory.query = message
@@ -0,0 +1,287 @@
+"""Compaction of long agent sessions into a rolling summary.
+
+``num_history_runs`` only truncates a session, so everything before the last few runs is lost to the
+agent. With ``MEMORY_SESSION_COMPACTION_THRESHOLD_TOKENS`` set, agents built by ``BaseAgentBuilder``
+instead see a summary of the earlier runs, followed by every run it does not cover yet. Once those
+runs hold more than the threshold, ``session_compactor`` folds all but the newest
+``session_compaction_keep_recent_runs`` of them into the summary, in the background and with
+``MEMORY_SESSION_SUMMARY_MODEL_ID``, so the prompt of each turn stays bounded.
+
+Summaries are stored in the ``session_summaries`` table next to the agent sessions, with the number
+of runs they cover; the session itself keeps every run.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set
+
+from agno.agent import Agent
+from agno.memory.v2.memory import Memory
+from agno.models.message import Message
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, Text, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Engine
+
+from llm.clients import get_model
+from memory.settings import memory_settings
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a user and an assistant. Update the summary "
+    "below with the new exchanges: keep the user's goals, questions, decisions, facts and figures the "
+    "assistant found, and open tasks; drop small talk and anything superseded. Write it as compact notes "
+    "in the third person and reply with the updated summary only."
+)
+
+# Characters of each tool result kept in the transcript given to the summary model
+_TOOL_RESULT_CHARS = 1000
+
+
+@dataclass
+class SessionSummaryState:
+    """The summary of a session and the number of its runs, from the first, that it covers."""
+
+    summary: str
+    compacted_runs: int
+
+
+class SessionSummaryDb:
+    """Postgres table of the rolling summary of each session."""
+
+    def __init__(self, db_engine: Engine, table_name: str = "session_summaries", schema: Optional[str] = "ai"):
+        self.db_engine = db_engine
+        self.table = Table(
+            table_name,
+            MetaData(schema=schema),
+            Column("session_id", String, primary_key=True),
+            Column("summary", Text, nullable=False),
+            Column("compacted_runs", Integer, nullable=False),
+            Column("updated_at", DateTime(timezone=True), server_default=text("now()"), nullable=False),
+        )
+        self._created = False
+
+    def _ensure_table(self) -> None:
+        if not self._created:
+            if self.table.schema:
+                with self.db_engine.begin() as conn:
+                    conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {self.table.schema};"))
+            self.table.create(self.db_engine, checkfirst=True)
+            self._created = True
+
+    def read(self, session_id: str) -> Optional[SessionSummaryState]:
+        """Return the summary of `session_id`, if it has one."""
+        self._ensure_table()
+        with self.db_engine.connect() as conn:
+            row = conn.execute(
+                select(self.table.c.summary, self.table.c.compacted_runs).where(self.table.c.session_id == session_id)
+            ).first()
+        return SessionSummaryState(summary=row.summary, compacted_runs=row.compacted_runs) if row else None
+
+    def upsert(self, session_id: str, state: SessionSummaryState) -> None:
+        """Store `state`, unless the stored summary already covers as many runs."""
+        self._ensure_table()
+        statement = postgresql.insert(self.table).values(
+            session_id=session_id, summary=state.summary, compacted_runs=state.compacted_runs
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[self.table.c.session_id],
+            set_={
+                "summary": statement.excluded.summary,
+                "compacted_runs": statement.excluded.compacted_runs,
+                "updated_at": text("now()"),
+            },
+            # Another worker may have compacted the session further in the meantime
+            where=self.table.c.compacted_runs < statement.excluded.compacted_runs,
+        )
+        with self.db_engine.begin() as conn:
+            conn.execute(statement)
+
+
+def _session_runs(agent: Agent, session_id: str) -> List[Any]:
+    if not isinstance(agent.memory, Memory) or not agent.memory.runs:
+        return []
+    return agent.memory.runs.get(session_id, [])
+
+
+def _run_messages(run: Any) -> List[Message]:
+    """Return the messages a run added to the conversation, without its system prompt and history."""
+    return [m for m in run.messages or [] if m.role != "system" and not m.from_history]
+
+
+def _estimate_tokens(runs: List[Any]) -> int:
+    # ~4 characters per token, as in llm.scheduler.estimate_tokens
+    return sum(len(str(m.content or "")) for run in runs for m in _run_messages(run)) // 4
+
+
+def _transcript(runs: List[Any]) -> str:
+    lines = []
+    for run in runs:
+        for message in _run_messages(run):
+            content = str(message.content or "")
+            if message.role == "tool":
+                content = content[:_TOOL_RESULT_CHARS]
+            elif message.role == "assistant" and message.tool_calls and not content:
+                content = "Calls " + ", ".join(c.get("function", {}).get("name", "a tool") for c in message.tool_calls)
+            if content:
+                lines.append(f"{message.role}: {content}")
+    return "\n".join(lines)
+
+
+class SessionCompactor:
+    """Prepares the history of compacted sessions and compacts sessions in the background."""
+
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self._db: Optional[SessionSummaryDb] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Sessions with a compaction queued or running in this process
+        self._in_flight: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._metrics: Dict[str, float] = {
+            "compactions": 0,
+            "compactions_failed": 0,
+            "compactions_skipped_in_flight": 0,
+            "runs_compacted": 0,
+            "compaction_seconds_total": 0.0,
+            "summary_reads_failed": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return memory_settings.session_compaction_threshold_tokens is not None
+
+    @property
+    def db(self) -> SessionSummaryDb:
+        if self._db is None:
+            from db.session import db_engine
+
+            self._db = SessionSummaryDb(db_engine)
+        return self._db
+
+    def attach(self, agent: Agent) -> None:
+        """Compact the sessions of `agent`, an agent built with storage and history."""
+        agent.session_compactor = self
+        agent.session_summary = None
+
+    def prepare_run(self, agent: Agent, session_id: str) -> None:
+        """
+        Point the history of `agent`'s next run at its session summary and the runs after it.
+
+        Called once the session has been read from storage, before the run's messages are built.
+        """
+        try:
+            state = self.db.read(session_id)
+        except Exception as e:
+            self._metrics["summary_reads_failed"] += 1
+            logger.warning(f"Could not read the summary of session '{session_id}': {e}")
+            state = None
+        agent.session_summary = state
+
+        runs = _session_runs(agent, session_id)
+        compacted = min(state.compacted_runs, len(runs)) if state else 0
+        recent = min(len(runs) - compacted, memory_settings.session_compaction_max_history_runs)
+        # agno reads num_history_runs=0 as "every run"
+        agent.add_history_to_messages = recent > 0
+        agent.num_history_runs = max(recent, 1)
+        if state is not None:
+            agent.add_messages = [
+                Message(
+                    role="system",
+                    content=(
+                        "Here is a summary of the earlier part of this conversation:\n\n"
+                        f"<summary_of_previous_interactions>\n{state.summary}\n</summary_of_previous_interactions>"
+                    ),
+                    # Keeps the summary out of the history of later runs
+                    from_history=True,
+                )
+            ]
+
+    def maybe_compact(self, agent: Agent, session_id: str) -> bool:
+        """
+        Queue compaction of `agent`'s session if its runs after the summary exceed the threshold.
+
+        Called after the session was written to storage; does nothing outside of an event loop.
+
+        Returns:
+            bool: True if a compaction was queued.
+        """
+        threshold = memory_settings.session_compaction_threshold_tokens
+        runs = _session_runs(agent, session_id)
+        state: Optional[SessionSummaryState] = getattr(agent, "session_summary", None)
+        compacted = min(state.compacted_runs, len(runs)) if state else 0
+        keep_recent = max(1, memory_settings.session_compaction_keep_recent_runs)
+        if threshold is None or len(runs) - compacted <= keep_recent:
+            return False
+        if _estimate_tokens(runs[compacted:]) <= threshold:
+            return False
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        if session_id in self._in_flight:
+            self._metrics["compactions_skipped_in_flight"] += 1
+            return False
+
+        upto = len(runs) - keep_recent
+        transcript = _transcript(runs[compacted:upto])
+        self._in_flight.add(session_id)
+        task = loop.create_task(self._compact(session_id, state, transcript, upto, upto - compacted))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _compact(
+        self, session_id: str, state: Optional[SessionSummaryState], transcript: str, upto: int, new_runs: int
+    ) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        try:
+            async with self._semaphore:
+                start = time.perf_counter()
+                try:
+                    model = get_model(memory_settings.session_summary_model_id, usage_role="session_summary")
+                    previous = state.summary if state else "(none yet)"
+                    response = await model.aresponse(
+                        messages=[
+                            Message(role="system", content=SUMMARY_PROMPT),
+                            Message(
+                                role="user",
+                                content=f"Summary so far:\n{previous}\n\nNew exchanges:\n{transcript}",
+                            ),
+                        ]
+                    )
+                    if not response.content:
+                        raise ValueError("the model returned an empty summary")
+                    new_state = SessionSummaryState(summary=response.content.strip(), compacted_runs=upto)
+                    await asyncio.to_thread(self.db.upsert, session_id, new_state)
+                    self._metrics["compactions"] += 1
+                    self._metrics["runs_compacted"] += new_runs
+                    logger.debug(f"Compacted {new_runs} runs of session '{session_id}'")
+                except Exception as e:
+                    self._metrics["compactions_failed"] += 1
+                    logger.warning(f"Could not compact session '{session_id}': {e}")
+                finally:
+                    self._metrics["compaction_seconds_total"] += time.perf_counter() - start
+        finally:
+            self._in_flight.discard(session_id)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return the compaction counters."""
+        return {**self._metrics, "enabled": self.enabled, "in_flight": len(self._in_flight)}
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """Wait up to `timeout` seconds for running compactions, then cancel them."""
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        if pending:
+            logger.warning(f"Cancelling {len(pending)} session compaction(s) on shutdown")
+            for task in pending:
+                task.cancel()
+
+
+# Create the process-wide SessionCompactor
+session_compactor = SessionCompactor(concurrency=memory_settings.session_compaction_concurrency)
@@ -0,0 +1,54 @@
+from typing import Literal, Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class MemorySettings(BaseSettings):
+    """User memory settings that are set using environment variables prefixed with ``MEMORY_``."""
+
+    model_config = SettingsConfigDict(env_prefix="MEMORY_")
+
+    # "inline" lets the model manage memories during the run (agentic memory).
+    # "deferred" removes memory extraction from the run and queues it on the background memory worker.
+    mode: Literal["inline", "deferred"] = "inline"
+
+    # Deferred mode: maximum jobs processed together, grouped per user.
+    batch_size: int = 32
+    # Deferred mode: how long the worker waits to fill a batch once it has a job.
+    batch_wait_seconds: float = 2.0
+    # Deferred mode: jobs beyond this queue size are dropped (and counted) rather than blocking requests.
+    max_queue_size: int = 1000
+
+    # How memories are selected for the prompt: "all" loads every memory of the user,
+    # "recency" the newest `retrieval_limit`, "vector" the top `retrieval_limit` by
+    # similarity to the message weighted by recency.
+    retrieval: Literal["all", "recency", "vector"] = "all"
+    retrieval_limit: int = 20
+    # Age in days at which a memory's vector score is halved.
+    recency_half_life_days: float = 90.0
+    embedder_id: str = "text-embedding-3-small"
+    embedding_dimensions: int = 1536
+
+    # Compact a user's memories into summaries once they hold more than this many (disabled when unset).
+    compaction_threshold: Optional[int] = None
+    # Newest memories kept verbatim when compacting.
+    compaction_keep_recent: int = 50
+    # Old memories summarized per summary memory.
+    compaction_batch_size: int = 50
+
+    # Fold the older runs of an agent session into a rolling summary once the runs not yet summarized hold more
+    # than this many (estimated) tokens (disabled when unset). While enabled, agents see the summary and every
+    # run after it, at most `session_compaction_max_history_runs`, instead of their last `history_runs`.
+    session_compaction_threshold_tokens: Optional[int] = None
+    # Newest runs kept verbatim when compacting.
+    session_compaction_keep_recent_runs: int = 2
+    # Upper bound on the runs added as history, should compaction fall behind.
+    session_compaction_max_history_runs: int = 20
+    # Sessions compacted at the same time by each process.
+    session_compaction_concurrency: int = 4
+    # Model writing the session summaries.
+    session_summary_model_id: str = "gpt-4.1-mini"
+
+
+# Create MemorySettings object
+memory_settings = MemorySettings()
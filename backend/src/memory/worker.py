@@ -0,0 +1,176 @@
+"""Background worker that extracts user memories outside of the request critical path.
+
+When ``MEMORY_MODE=deferred`` agents are built without agentic memory, so the model no longer
+spends extra calls managing memories during the run. Once a run has finished streaming, the
+route hands the exchange to ``defer_memory_update``, which queues it on the process-wide
+``memory_worker``. The worker batches queued jobs and runs one extraction per user per batch.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from agno.agent import Agent
+from agno.memory.v2.memory import Memory
+from agno.models.message import Message
+
+from memory.compaction import amaybe_compact_user_memories
+from memory.db import IndexedPostgresMemoryDb
+from memory.settings import memory_settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MemoryJob:
+    memory: Memory
+    user_id: str
+    messages: List[Message]
+    queued_at: float = field(default_factory=time.perf_counter)
+
+
+class MemoryWorker:
+    """Asyncio worker that batches memory extraction jobs per user."""
+
+    def __init__(self, batch_size: int, batch_wait_seconds: float, max_queue_size: int):
+        self.batch_size = batch_size
+        self.batch_wait_seconds = batch_wait_seconds
+        self.max_queue_size = max_queue_size
+        self._queue: Optional[asyncio.Queue[MemoryJob]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._metrics: Dict[str, float] = {
+            "jobs_submitted": 0,
+            "jobs_dropped": 0,
+            "jobs_processed": 0,
+            "jobs_failed": 0,
+            "batches": 0,
+            "extractions": 0,
+            "memories_compacted": 0,
+            # Time spent in memory extraction that would otherwise have been part of a request
+            "extraction_seconds_total": 0.0,
+            "queue_wait_seconds_total": 0.0,
+        }
+
+    def _ensure_started(self) -> asyncio.Queue[MemoryJob]:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(self._queue))
+        return self._queue
+
+    def submit(self, memory: Memory, user_id: str, messages: List[Message]) -> bool:
+        """
+        Queue a memory extraction job without waiting for it. Must be called from the event loop.
+
+        Returns:
+            bool: False if the queue was full and the job was dropped.
+        """
+        queue = self._ensure_started()
+        try:
+            queue.put_nowait(MemoryJob(memory=memory, user_id=user_id, messages=messages))
+        except asyncio.QueueFull:
+            self._metrics["jobs_dropped"] += 1
+            logger.warning(f"Memory queue is full; dropping memory update for user '{user_id}'")
+            return False
+        self._metrics["jobs_submitted"] += 1
+        return True
+
+    async def _run(self, queue: asyncio.Queue[MemoryJob]) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.batch_wait_seconds
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._process(batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _process(self, batch: List[MemoryJob]) -> None:
+        self._metrics["batches"] += 1
+        by_user: Dict[str, List[MemoryJob]] = {}
+        for job in batch:
+            by_user.setdefault(job.user_id, []).append(job)
+
+        for user_id, jobs in by_user.items():
+            messages = [message for job in jobs for message in job.messages]
+            start = time.perf_counter()
+            self._metrics["queue_wait_seconds_total"] += sum(start - job.queued_at for job in jobs)
+            try:
+                # All jobs for a user share the same memory db; the latest job's memory is used.
+                memory = jobs[-1].memory
+                await memory.acreate_user_memories(messages=messages, user_id=user_id)
+                self._metrics["jobs_processed"] += len(jobs)
+                if isinstance(memory.db, IndexedPostgresMemoryDb):
+                    self._metrics["memories_compacted"] += await amaybe_compact_user_memories(
+                        memory.db, memory.get_model(), user_id
+                    )
+            except Exception as e:
+                self._metrics["jobs_failed"] += len(jobs)
+                logger.error(f"Memory extraction failed for user '{user_id}': {e}", exc_info=True)
+            finally:
+                self._metrics["extractions"] += 1
+                self._metrics["extraction_seconds_total"] += time.perf_counter() - start
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return a snapshot of the worker counters."""
+        processed = self._metrics["jobs_processed"] + self._metrics["jobs_failed"]
+        return {
+            **self._metrics,
+            "mode": memory_settings.mode,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            # Average latency each deferred request no longer pays for memory extraction
+            "avg_seconds_removed_per_request": (
+                self._metrics["extraction_seconds_total"] / processed if processed else 0.0
+            ),
+        }
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """Flush queued jobs (up to `timeout` seconds) and stop the worker."""
+        if self._queue is not None and self._task is not None and not self._task.done():
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Dropping {self._queue.qsize()} queued memory update(s) on shutdown")
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+# Create the process-wide MemoryWorker
+memory_worker = MemoryWorker(
+    batch_size=memory_settings.batch_size,
+    batch_wait_seconds=memory_settings.batch_wait_seconds,
+    max_queue_size=memory_settings.max_queue_size,
+)
+
+
+def defer_memory_update(agent: Agent, message: str, response_content: Optional[str]) -> bool:
+    """
+    Queue memory extraction for a finished run when deferred memory mode is enabled.
+
+    Args:
+        agent (Agent): The agent that handled the run.
+        message (str): The user message that started the run.
+        response_content (Optional[str]): The final assistant response.
+
+    Returns:
+        bool: True if a job was queued.
+    """
+    if memory_settings.mode != "deferred" or not isinstance(agent.memory, Memory) or not agent.user_id:
+        return False
+
+    messages = [Message(role="user", content=message)]
+    if response_content:
+        messages.append(Message(role="assistant", content=response_content))
+    return memory_worker.submit(agent.memory, agent.user_id, messages)
@@ -0,0 +1 @@
+"""Background execution of agent and team runs, decoupled from the HTTP request."""
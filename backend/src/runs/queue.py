@@ -0,0 +1,305 @@
+"""Queues of background runs.
+
+A background run is submitted as a ``RunJob`` and returns at once; a worker later claims the job,
+executes it and records its outcome on the job, where clients poll it by run id.
+
+- ``InProcessRunQueue`` keeps jobs in memory; they are executed and can only be polled on the API
+  process that accepted them.
+- ``PostgresRunQueue`` stores jobs in ``ai.run_jobs``. Workers in any process claim the oldest
+  queued job with ``SELECT ... FOR UPDATE SKIP LOCKED`` and send heartbeats while running it; a job
+  whose heartbeat is older than ``lease_seconds`` (e.g. its worker crashed) is claimed again, and
+  only the latest claim can record the job's outcome.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional, Union
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, Text, and_, func, or_, select, text
+from sqlalchemy.engine import Engine
+
+from runs.settings import run_queue_settings
+
+logger = logging.getLogger(__name__)
+
+# Statuses after which a job no longer changes
+TERMINAL_STATUSES = {"completed", "failed"}
+
+
+@dataclass
+class RunJob:
+    """A background run of an agent or team and its outcome."""
+
+    # "agent" or "team"
+    kind: str
+    target_id: str
+    message: str
+    model_id: str
+    user_id: Optional[str] = None
+    session_id: Optional[str] = None
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    # One of "queued", "running", "completed" or "failed"
+    status: str = "queued"
+    content: Optional[str] = None
+    error: Optional[str] = None
+    # How often the job has been claimed, and the worker holding the latest claim
+    attempts: int = 0
+    worker_id: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class InProcessRunQueue:
+    """Run queue held in the memory of the API process."""
+
+    def __init__(self, result_ttl_seconds: int):
+        self.result_ttl_seconds = result_ttl_seconds
+        self._jobs: Dict[str, RunJob] = {}
+        self._pending: Optional[asyncio.Queue[str]] = None
+
+    def _queue(self) -> asyncio.Queue[str]:
+        if self._pending is None:
+            self._pending = asyncio.Queue()
+        return self._pending
+
+    def _prune(self) -> None:
+        now = time.time()
+        for run_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and now - job.finished_at > self.result_ttl_seconds:
+                del self._jobs[run_id]
+
+    async def submit(self, job: RunJob) -> RunJob:
+        self._prune()
+        self._jobs[job.id] = job
+        self._queue().put_nowait(job.id)
+        return job
+
+    async def get(self, run_id: str) -> Optional[RunJob]:
+        return self._jobs.get(run_id)
+
+    async def claim(self, worker_id: str, timeout: float) -> Optional[RunJob]:
+        """Return the next queued job, or None if there was none within `timeout` seconds."""
+        try:
+            run_id = await asyncio.wait_for(self._queue().get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        job = self._jobs.get(run_id)
+        if job is None:
+            return None
+        job.status = "running"
+        job.attempts += 1
+        job.worker_id = worker_id
+        job.started_at = time.time()
+        return job
+
+    async def heartbeat(self, job: RunJob) -> None:
+        pass
+
+    async def finish(self, job: RunJob) -> None:
+        job.finished_at = time.time()
+
+    def depth(self) -> int:
+        return self._pending.qsize() if self._pending is not None else 0
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[float]:
+    return value.timestamp() if value is not None else None
+
+
+class PostgresRunQueue:
+    """Run queue in Postgres, shared by all API and worker processes."""
+
+    def __init__(
+        self,
+        db_engine: Engine,
+        lease_seconds: int,
+        result_ttl_seconds: int,
+        table_name: str = "run_jobs",
+        schema: Optional[str] = "ai",
+    ):
+        self.db_engine = db_engine
+        self.lease_seconds = lease_seconds
+        self.result_ttl_seconds = result_ttl_seconds
+        self.table = Table(
+            table_name,
+            MetaData(schema=schema),
+            Column("id", String, primary_key=True),
+            Column("kind", String, nullable=False),
+            Column("target_id", String, nullable=False),
+            Column("message", Text, nullable=False),
+            Column("model_id", String, nullable=False),
+            Column("user_id", String),
+            Column("session_id", String),
+            Column("status", String, nullable=False),
+            Column("content", Text),
+            Column("error", Text),
+            Column("attempts", Integer, nullable=False, server_default="0"),
+            Column("worker_id", String),
+            Column("created_at", DateTime(timezone=True), server_default=func.now(), nullable=False),
+            Column("started_at", DateTime(timezone=True)),
+            Column("heartbeat_at", DateTime(timezone=True)),
+            Column("finished_at", DateTime(timezone=True)),
+            Index(f"{table_name}_status_created_at_idx", "status", "created_at"),
+        )
+        self._created = False
+        self._last_pruned = 0.0
+
+    def _ensure_table(self) -> None:
+        if not self._created:
+            if self.table.schema:
+                with self.db_engine.begin() as conn:
+                    conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {self.table.schema};"))
+            self.table.create(self.db_engine, checkfirst=True)
+            self._created = True
+
+    def _to_job(self, row: Any) -> RunJob:
+        return RunJob(
+            id=row.id,
+            kind=row.kind,
+            target_id=row.target_id,
+            message=row.message,
+            model_id=row.model_id,
+            user_id=row.user_id,
+            session_id=row.session_id,
+            status=row.status,
+            content=row.content,
+            error=row.error,
+            attempts=row.attempts,
+            worker_id=row.worker_id,
+            created_at=_timestamp(row.created_at) or time.time(),
+            started_at=_timestamp(row.started_at),
+            finished_at=_timestamp(row.finished_at),
+        )
+
+    def _submit(self, job: RunJob) -> None:
+        self._ensure_table()
+        values = {k: v for k, v in job.to_dict().items() if k not in ("created_at", "started_at", "finished_at")}
+        with self.db_engine.begin() as conn:
+            conn.execute(self.table.insert().values(**values))
+
+    def _get(self, run_id: str) -> Optional[RunJob]:
+        self._ensure_table()
+        with self.db_engine.connect() as conn:
+            row = conn.execute(select(self.table).where(self.table.c.id == run_id)).first()
+        return self._to_job(row) if row is not None else None
+
+    def _claim(self, worker_id: str) -> Optional[RunJob]:
+        self._ensure_table()
+        t = self.table
+        expired = func.now() - func.make_interval(0, 0, 0, 0, 0, 0, self.lease_seconds)
+        next_id = (
+            select(t.c.id)
+            .where(or_(t.c.status == "queued", and_(t.c.status == "running", t.c.heartbeat_at < expired)))
+            .order_by(t.c.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        with self.db_engine.begin() as conn:
+            row = conn.execute(
+                t.update()
+                .where(t.c.id == next_id)
+                .values(
+                    status="running",
+                    attempts=t.c.attempts + 1,
+                    worker_id=worker_id,
+                    started_at=func.now(),
+                    heartbeat_at=func.now(),
+                )
+                .returning(*t.c)
+            ).first()
+        return self._to_job(row) if row is not None else None
+
+    def _heartbeat(self, job: RunJob) -> None:
+        with self.db_engine.begin() as conn:
+            conn.execute(
+                self.table.update()
+                .where(self.table.c.id == job.id, self.table.c.status == "running")
+                .values(heartbeat_at=func.now())
+            )
+
+    def _finish(self, job: RunJob) -> None:
+        job.finished_at = time.time()
+        t = self.table
+        with self.db_engine.begin() as conn:
+            # Only the claim that is still current records the outcome, not one whose lease expired meanwhile
+            result = conn.execute(
+                t.update()
+                .where(
+                    t.c.id == job.id,
+                    t.c.worker_id == job.worker_id,
+                    t.c.attempts == job.attempts,
+                    t.c.status == "running",
+                )
+                .values(status=job.status, content=job.content, error=job.error, finished_at=func.now())
+            )
+        if result.rowcount == 0:
+            logger.warning(
+                f"Background run '{job.id}' was claimed again by another worker after its lease expired; "
+                f"its outcome on '{job.worker_id}' (attempt {job.attempts}) is discarded"
+            )
+        self._prune()
+
+    def _prune(self) -> None:
+        """Delete jobs finished more than `result_ttl_seconds` ago, at most once a minute."""
+        if time.monotonic() - self._last_pruned < 60:
+            return
+        self._last_pruned = time.monotonic()
+        with self.db_engine.begin() as conn:
+            conn.execute(
+                self.table.delete().where(
+                    self.table.c.finished_at
+                    < func.now() - func.make_interval(0, 0, 0, 0, 0, 0, self.result_ttl_seconds)
+                )
+            )
+
+    async def submit(self, job: RunJob) -> RunJob:
+        await asyncio.to_thread(self._submit, job)
+        return job
+
+    async def get(self, run_id: str) -> Optional[RunJob]:
+        return await asyncio.to_thread(self._get, run_id)
+
+    async def claim(self, worker_id: str, timeout: float) -> Optional[RunJob]:
+        """Return the next claimable job, or None after waiting `timeout` seconds if there was none."""
+        job = await asyncio.to_thread(self._claim, worker_id)
+        if job is None:
+            await asyncio.sleep(timeout)
+        return job
+
+    async def heartbeat(self, job: RunJob) -> None:
+        await asyncio.to_thread(self._heartbeat, job)
+
+    async def finish(self, job: RunJob) -> None:
+        await asyncio.to_thread(self._finish, job)
+
+    def depth(self) -> Optional[int]:
+        # Not tracked locally; count the queued rows in `ai.run_jobs` instead
+        return None
+
+
+RunQueue = Union[InProcessRunQueue, PostgresRunQueue]
+
+
+def _create_run_queue() -> RunQueue:
+    if run_queue_settings.backend == "postgres":
+        from db.session import db_engine
+
+        return PostgresRunQueue(
+            db_engine,
+            lease_seconds=run_queue_settings.lease_seconds,
+            result_ttl_seconds=run_queue_settings.result_ttl_seconds,
+        )
+    return InProcessRunQueue(result_ttl_seconds=run_queue_settings.result_ttl_seconds)
+
+
+# Create the process-wide run queue
+run_queue = _create_run_queue()
@@ -0,0 +1,31 @@
+from typing import Literal
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class RunQueueSettings(BaseSettings):
+    """Background run settings that are set using environment variables prefixed with ``RUN_QUEUE_``."""
+
+    model_config = SettingsConfigDict(env_prefix="RUN_QUEUE_")
+
+    # "inprocess" executes background runs on asyncio workers of the API process that accepted them.
+    # "postgres" queues them in the `ai.run_jobs` table, where any API process or `scripts/run_worker.py`
+    # process picks them up with SELECT ... FOR UPDATE SKIP LOCKED.
+    backend: Literal["inprocess", "postgres"] = "inprocess"
+
+    # Concurrent background runs executed by each API process. With the postgres backend, 0 leaves the
+    # runs to separate worker processes so API and run workers can be scaled independently.
+    api_concurrency: int = 4
+    # Concurrent runs executed by each `scripts/run_worker.py` process.
+    worker_concurrency: int = 8
+
+    # How often idle workers poll the postgres queue and followers poll for new events.
+    poll_interval_seconds: float = 1.0
+    # A running job whose worker sent no heartbeat for this long is handed to another worker.
+    lease_seconds: int = 300
+    # How long finished in-process jobs are kept for polling.
+    result_ttl_seconds: int = 3600
+
+
+# Create RunQueueSettings object
+run_queue_settings = RunQueueSettings()
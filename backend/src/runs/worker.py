@@ -0,0 +1,174 @@
+"""Workers that execute background runs.
+
+Each ``RunWorkerPool`` task claims jobs from ``runs.queue.run_queue`` and executes them like a
+streamed run of the API: the run is produced into a ``RunStream`` registered under the run id, so
+clients on the same process follow it live, and its events are spilled to Postgres when the queue
+is shared so clients on any process can follow it. Background runs are not cancelled when no
+client is subscribed.
+
+API processes start a pool of ``RUN_QUEUE_API_CONCURRENCY`` workers; with the postgres backend
+``scripts/run_worker.py`` runs a pool in a separate process, so the number of run workers can be
+scaled independently of the API workers.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from contextlib import ExitStack
+from typing import Any, Dict, List, Optional, Union
+
+from agno.agent import Agent
+from agno.team import Team
+
+from agents.selector import get_agent
+from api.replay import get_replay_spill, start_run_stream
+from api.routes.agents import chat_response_streamer
+from api.routes.teams import team_response_streamer
+from memory.retrieval import set_memory_query
+from runs.queue import TERMINAL_STATUSES, PostgresRunQueue, RunJob, RunQueue, run_queue
+from runs.settings import run_queue_settings
+from teams.selector import get_team
+
+logger = logging.getLogger(__name__)
+
+
+def _build_runner(job: RunJob) -> Union[Agent, Team]:
+    if job.kind == "team":
+        return get_team(job.target_id, model_id=job.model_id, user_id=job.user_id, session_id=job.session_id)
+    agent = get_agent(agent_id=job.target_id, model_id=job.model_id, user_id=job.user_id, session_id=job.session_id)
+    set_memory_query(agent, job.message)
+    return agent
+
+
+class RunWorkerPool:
+    """Asyncio tasks that claim background runs from a queue and execute them."""
+
+    def __init__(self, queue: RunQueue, concurrency: int):
+        self.queue = queue
+        self.concurrency = concurrency
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+        self._running = 0
+        self._metrics: Dict[str, float] = {
+            "runs_started": 0,
+            "runs_completed": 0,
+            "runs_failed": 0,
+            "run_seconds_total": 0.0,
+        }
+
+    async def start(self) -> None:
+        """Start the worker tasks on the running event loop."""
+        self._stopping = False
+        while len(self._tasks) < self.concurrency:
+            self._tasks.append(asyncio.get_running_loop().create_task(self._work()))
+        logger.info(f"Started {self.concurrency} background run worker(s) on '{self.worker_id}'")
+
+    async def _work(self) -> None:
+        while not self._stopping:
+            try:
+                job = await self.queue.claim(self.worker_id, run_queue_settings.poll_interval_seconds)
+            except Exception as e:
+                logger.error(f"Could not claim a background run: {e}", exc_info=True)
+                await asyncio.sleep(run_queue_settings.poll_interval_seconds)
+                continue
+            if job is not None:
+                await self.execute(job)
+
+    async def execute(self, job: RunJob) -> None:
+        """Execute a claimed job and record its outcome on the queue."""
+        self._running += 1
+        self._metrics["runs_started"] += 1
+        start = time.perf_counter()
+        try:
+            await self._execute(job)
+        except asyncio.CancelledError:
+            if isinstance(self.queue, PostgresRunQueue):
+                # Left running, so another worker claims it again once its lease expires
+                raise
+            job.status, job.error = "failed", "Cancelled on shutdown"
+            await self.queue.finish(job)
+            raise
+        except Exception as e:
+            logger.error(f"Background run '{job.id}' failed: {e}", exc_info=True)
+            job.status, job.error = "failed", str(e) or type(e).__name__
+        finally:
+            self._running -= 1
+            self._metrics["run_seconds_total"] += time.perf_counter() - start
+        self._metrics["runs_completed" if job.status == "completed" else "runs_failed"] += 1
+        await self.queue.finish(job)
+
+    async def _execute(self, job: RunJob) -> None:
+        try:
+            runner = _build_runner(job)
+        except ValueError as e:
+            job.status, job.error = "failed", str(e)
+            return
+
+        # Followers on other processes read the events from Postgres
+        spill = get_replay_spill(force=isinstance(self.queue, PostgresRunQueue))
+        if spill is not None and job.attempts > 1:
+            # Events of an earlier, interrupted attempt would be mixed with this one
+            await asyncio.to_thread(spill.delete, job.id)
+
+        if isinstance(runner, Team):
+            stream = team_response_streamer(team=runner, message=job.message, model_id=job.model_id, request_id=job.id)
+        else:
+            stream = chat_response_streamer(agent=runner, message=job.message, model_id=job.model_id, request_id=job.id)
+        run_stream = start_run_stream(
+            job.id, job.target_id, stream, ExitStack(), spill=spill, cancel_when_abandoned=False
+        )
+        try:
+            # Keep the lease while the run is in progress
+            while not run_stream.task.done():
+                await asyncio.wait({run_stream.task}, timeout=run_queue_settings.lease_seconds / 3)
+                if not run_stream.task.done():
+                    await self.queue.heartbeat(job)
+        finally:
+            run_stream.cancel("cancelled_on_shutdown")
+
+        if run_stream.error is not None:
+            job.status, job.error = "failed", run_stream.error
+        else:
+            content = runner.run_response.content if runner.run_response is not None else None
+            job.status, job.content = "completed", content if isinstance(content, str) else None
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return a snapshot of the pool counters."""
+        return {
+            **self._metrics,
+            "backend": run_queue_settings.backend,
+            "workers": len(self._tasks),
+            "running": self._running,
+            "queue_depth": self.queue.depth(),
+        }
+
+    def stop_claiming(self) -> None:
+        """Let running jobs finish but claim no new ones."""
+        self._stopping = True
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """Stop claiming jobs, wait up to `timeout` seconds for running jobs and cancel the rest."""
+        self.stop_claiming()
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        if pending:
+            # With the postgres backend these jobs are claimed again once their lease expires
+            logger.warning(f"Cancelling {self._running} background run(s) on shutdown")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+
+
+# Create the process-wide RunWorkerPool
+run_worker_pool = RunWorkerPool(run_queue, concurrency=run_queue_settings.api_concurrency)
+
+
+async def run_is_finished(run_id: str) -> bool:
+    """Return True if the run has finished or does not exist."""
+    job: Optional[RunJob] = await run_queue.get(run_id)
+    return job is None or job.status in TERMINAL_STATUSES
@@ -8,10 +8,14 @@ from typing import List, Callable, Optional, Union, Dict, Any, Literal
 from pydantic import BaseModel, Field
 
 from agno.agent import Agent
+from agno.models.message import Message
 from agno.team import Team
-from agno.models.openai import OpenAIChat
-from agno.storage.postgres import PostgresStorage
-from db.session import db_url
+from db.session import db_engine
+from db.storage import CompactPostgresStorage
+from llm.clients import get_model
+from llm.settings import llm_settings
+from tools.base.memo import ToolCallMemo, add_tool_memo_metrics
+from tools.base.settings import tool_memo_settings
 
 
 class TeamConfig(BaseModel):
@@ -24,6 +28,9 @@ class TeamConfig(BaseModel):
     mode: Literal["route", "coordinate", "collaborate"] = Field(..., description="Coordination mode for the team.")
     member_builders: List[Callable[..., Agent]] = Field(..., description="Callables to construct agent members.")
     model_id: str = Field("gpt-4.1", description="Default model identifier.")
+    leader_model_id: Optional[str] = Field(
+        None, description="Model used by the team leader; defaults to LLM_LEADER_MODEL_ID, then model_id."
+    )
     markdown: bool = Field(True, description="Whether to format outputs in Markdown.")
     debug_mode: bool = Field(False, description="Whether to enable debug logging.")
     show_tool_calls: bool = Field(True, description="Whether to include tool call traces.")
@@ -36,6 +43,13 @@ class TeamConfig(BaseModel):
         arbitrary_types_allowed = True
 
 
+class MemoizedTeam(Team):
+    """Team whose run metrics report the tool calls saved by the `ToolCallMemo` it shares with its members."""
+
+    def _aggregate_metrics_from_messages(self, messages: List[Message]) -> Dict[str, Any]:
+        return add_tool_memo_metrics(self, super()._aggregate_metrics_from_messages(messages))
+
+
 class BaseTeamBuilder:
     """Builder for assembling Team objects from TeamConfig.
 
@@ -55,7 +69,8 @@ class BaseTeamBuilder:
     def build(self) -> Team:
         """Constructs and returns a Team instance using the configuration.
 
-        Instantiates each agent via member_builders and packages them into a Team.
+        Instantiates each agent via member_builders and packages them into a Team. The members share
+        one `ToolCallMemo`, so identical tool calls anywhere in a team run execute once.
 
         Returns:
             Team: The fully built team with all members and settings.
@@ -69,12 +84,14 @@ class BaseTeamBuilder:
             )
             for builder in self.cfg.member_builders
         ]
-        return Team(
+        team = MemoizedTeam(
             name=self.cfg.name,
             team_id=self.cfg.team_id,
             members=members,
             mode=self.cfg.mode,
-            model=OpenAIChat(id=self.cfg.model_id),
+            model=get_model(
+                self.cfg.leader_model_id or llm_settings.leader_model_id or self.cfg.model_id, usage_role="leader"
+            ),
             instructions=self.cfg.instructions,
             user_id=self.user_id,
             session_id=self.session_id,
@@ -82,9 +99,16 @@ class BaseTeamBuilder:
             show_tool_calls=self.cfg.show_tool_calls,
             show_members_responses=self.cfg.show_members_responses,
             debug_mode=self.cfg.debug_mode,
-            storage=PostgresStorage(
+            storage=CompactPostgresStorage(
                 table_name="team_sessions",
-                db_url=db_url,
+                db_engine=db_engine,
+                mode="team",
             ),
             **(self.cfg.extra_kwargs or {}),
         )
+        if tool_memo_settings.enabled:
+            memo = ToolCallMemo(tool_memo_settings.ttl_seconds)
+            for member in members:
+                memo.attach(member)
+            memo.attach(team)
+        return team
@@ -1,7 +1,7 @@
-from agno.models.openai import OpenAIChat
 from agno.team import Team
 from typing import Optional
 from agents.selector import get_agent
+from llm.clients import get_model
 
 
 def get_hn_team(
@@ -27,7 +27,7 @@ def get_hn_team(
         team_id="hn_team",
         user_id=user_id,
         session_id=session_id,
-        model=OpenAIChat(id=model_id),
+        model=get_model(model_id),
         mode="coordinate",  # Could also use 'collaborate' or 'route'
         members=[hn_researcher, web_searcher],
         instructions=[
@@ -0,0 +1,138 @@
+"""Incremental events of streamed team runs.
+
+agno streams only the leader's output: a member's run is consumed inside the leader's
+``transfer_task_to_member`` tool call and handed back as its result, and members do not report
+their own tool calls. ``forward_member_events`` wraps the ``arun`` of every member of a team so
+that, while the team streams, each member run also streams its intermediate steps and reports
+them to a callback as they happen: the member starting, its tool calls starting and completing
+and its partial responses. agno still receives the member's response chunks unchanged. Members
+that agno runs without streaming (all members of a "collaborate" team, which run concurrently)
+report their tool calls and response once they finish.
+
+``ToolCallTracker`` turns the cumulative tool list carried by agno's tool call events into the
+tool calls that just started or completed; it is used for both the leader's and the members' events.
+"""
+
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Union
+
+from agno.agent import Agent
+from agno.run.response import RunEvent
+from agno.team import Team
+
+# A member event: {"type": ..., "member_id": ..., "member_name": ..., plus "content" or "tool"}
+MemberEvent = Dict[str, Any]
+
+# Characters of each tool result sent with a tool call completed event
+_TOOL_RESULT_CHARS = 1000
+# Events of a member run that agno's team tools pass on to the leader
+_FORWARDED_TO_TEAM = {RunEvent.run_response.value, RunEvent.run_cancelled.value}
+
+
+def _event_name(chunk: Any) -> Optional[str]:
+    event = getattr(chunk, "event", None)
+    return getattr(event, "value", event)
+
+
+def member_id(member: Union[Agent, Team]) -> Optional[str]:
+    """Return the id agno's team tools use for `member`."""
+    return getattr(member, "agent_id", None) or getattr(member, "team_id", None)
+
+
+class ToolCallTracker:
+    """Reports each tool call of a run once when it starts and once when it completes."""
+
+    def __init__(self):
+        self._started: Set[str] = set()
+        self._completed: Set[str] = set()
+
+    @staticmethod
+    def _describe(tool: Dict[str, Any], with_result: bool) -> Dict[str, Any]:
+        described = {
+            "tool_call_id": tool.get("tool_call_id"),
+            "tool_name": tool.get("tool_name"),
+            "tool_args": tool.get("tool_args"),
+        }
+        if with_result:
+            result = tool.get("content")
+            result = None if result is None else str(result)
+            if result is not None and len(result) > _TOOL_RESULT_CHARS:
+                result = f"{result[:_TOOL_RESULT_CHARS]}..."
+            described["result"] = result
+            described["tool_call_error"] = tool.get("tool_call_error")
+        return described
+
+    def started(self, tools: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Return the calls of `tools`, the run's tool list, not reported as started yet."""
+        new = [t for t in tools or [] if t.get("tool_call_id") and t["tool_call_id"] not in self._started]
+        self._started.update(t["tool_call_id"] for t in new)
+        return [self._describe(t, with_result=False) for t in new]
+
+    def completed(self, tools: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Return the calls of `tools` that have a result and were not reported as completed yet."""
+        new = [
+            t
+            for t in tools or []
+            if t.get("tool_call_id") and "content" in t and t["tool_call_id"] not in self._completed
+        ]
+        self._completed.update(t["tool_call_id"] for t in new)
+        # A call that completed without a started event still counts as started
+        self._started.update(t["tool_call_id"] for t in new)
+        return [self._describe(t, with_result=True) for t in new]
+
+
+async def _forward(
+    member: Agent, chunks: AsyncIterator[Any], emit: Callable[[MemberEvent], None], with_content: bool
+) -> AsyncIterator[Any]:
+    source = {"member_id": member_id(member), "member_name": member.name}
+    tracker = ToolCallTracker()
+    emit({"type": "member_started", **source})
+    async for chunk in chunks:
+        event = _event_name(chunk)
+        if event == RunEvent.tool_call_started.value:
+            for tool in tracker.started(chunk.tools):
+                emit({"type": "member_tool_call_started", **source, "tool": tool})
+        elif event == RunEvent.tool_call_completed.value:
+            for tool in tracker.completed(chunk.tools):
+                emit({"type": "member_tool_call_completed", **source, "tool": tool})
+        elif event == RunEvent.run_response.value and with_content and isinstance(chunk.content, str):
+            emit({"type": "member_response", **source, "content": chunk.content})
+        if event in _FORWARDED_TO_TEAM:
+            yield chunk
+    emit({"type": "member_completed", **source})
+
+
+async def _report(member: Agent, run: Awaitable[Any], emit: Callable[[MemberEvent], None], with_content: bool) -> Any:
+    source = {"member_id": member_id(member), "member_name": member.name}
+    emit({"type": "member_started", **source})
+    response = await run
+    for tool in ToolCallTracker().completed(getattr(response, "tools", None)):
+        emit({"type": "member_tool_call_completed", **source, "tool": tool})
+    if with_content and isinstance(getattr(response, "content", None), str):
+        emit({"type": "member_response", **source, "content": response.content})
+    emit({"type": "member_completed", **source})
+    return response
+
+
+def forward_member_events(team: Team, emit: Callable[[MemberEvent], None]) -> None:
+    """
+    Report the events of the member runs of `team`, and of its sub-teams, to `emit` while it streams.
+
+    Args:
+        team (Team): A team built for one run.
+        emit (Callable[[MemberEvent], None]): Called on the event loop with each member event.
+    """
+    # In route mode the member's response is the team's response, so it already streams as the leader's
+    with_content = team.mode != "route"
+    for member in team.members:
+        if isinstance(member, Team):
+            forward_member_events(member, emit)
+            continue
+        arun = member.arun
+
+        async def streaming_arun(*args, _member: Agent = member, _arun: Callable = arun, **kwargs):
+            if not kwargs.get("stream"):
+                return await _report(_member, _arun(*args, **kwargs), emit, with_content)
+            kwargs["stream_intermediate_steps"] = True
+            return _forward(_member, await _arun(*args, **kwargs), emit, with_content)
+
+        member.arun = streaming_arun  # type: ignore[method-assign]
@@ -2,13 +2,17 @@
 
 This module defines the ToolConfig dataclass and the BaseToolBuilder class, providing
 an easy way to package together one or many callables that can be supplied to an
-Agno `Agent` or elsewhere.
+Agno `Agent` or elsewhere. Synchronous callables are wrapped so that they run on the
+dedicated pools of `tools.base.executor` rather than on the event loop's default executor.
 """
 
-from typing import List, Callable, Any, Optional
+from typing import Dict, List, Callable, Any, Optional
 
 from pydantic import BaseModel, Field
 
+from tools.base.executor import is_sync_tool, tool_executor
+from tools.base.settings import tool_executor_settings
+
 
 class ToolConfig(BaseModel):
     """Configuration for a tool set.
@@ -26,6 +30,12 @@ class ToolConfig(BaseModel):
         should already fulfil Agno's tool signature requirements.
     extra: Any
         Optional place holder for additional metadata.
+    cpu_bound_tools : List[str] | None
+        Names of the synchronous callables that are CPU-bound and run on the
+        tool process pool, when one is configured.
+    tool_timeouts : Dict[str, float] | None
+        Seconds each synchronous callable, by name, may take; callables not
+        listed use `TOOL_EXECUTOR_TIMEOUT_SECONDS`.
     """
 
     tool_id: str = Field(..., description="Unique identifier for the tool set.")
@@ -33,6 +43,8 @@ class ToolConfig(BaseModel):
     description: Optional[str] = Field(None, description="Description of the tool set.")
     tool_functions: List[Callable[..., Any]] = Field(..., description="Callables that make up the tool set.")
     extra: Optional[dict] = Field(None, description="Optional extra metadata.")
+    cpu_bound_tools: Optional[List[str]] = Field(None, description="Callables to run on the tool process pool.")
+    tool_timeouts: Optional[Dict[str, float]] = Field(None, description="Timeout in seconds of each callable.")
 
     class Config:
         arbitrary_types_allowed = True
@@ -45,5 +57,14 @@ class BaseToolBuilder:
         self.cfg = cfg
 
     def build(self) -> List[Callable[..., Any]]:
-        """Return the list of tool callables defined in the config."""
-        return self.cfg.tool_functions
+        """Return the list of tool callables defined in the config, synchronous ones registered with the tool executor."""
+        if not tool_executor_settings.enabled:
+            return self.cfg.tool_functions
+        cpu_bound = set(self.cfg.cpu_bound_tools or [])
+        timeouts = self.cfg.tool_timeouts or {}
+        return [
+            tool_executor.offload(tool, timeout=timeouts.get(tool.__name__), cpu_bound=tool.__name__ in cpu_bound)
+            if is_sync_tool(tool)
+            else tool
+            for tool in self.cfg.tool_functions
+        ]
@@ -0,0 +1,192 @@
+"""Cache of tool results shared by all agents of a process and, through Postgres, by all workers.
+
+Entries expire after the TTL they were stored with. Each process keeps an LRU of the entries it
+used most recently in front of an optional Postgres table, so a result fetched by one worker is
+served to the others. ``get_or_fetch`` also coalesces concurrent lookups of the same missing key:
+one thread fetches while the others wait for its result instead of calling upstream again.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, Text, delete, func, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class ToolResultCache:
+    """In-process LRU with expiring entries, optionally backed by a Postgres table."""
+
+    def __init__(
+        self,
+        table_name: str,
+        max_entries: int,
+        db_engine: Optional[Engine] = None,
+        schema: Optional[str] = "ai",
+    ):
+        self.max_entries = max_entries
+        self.db_engine = db_engine
+        # Structure: {key: (expires_at, value)}, least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.table = Table(
+            table_name,
+            MetaData(schema=schema),
+            Column("key", String, primary_key=True),
+            Column("data", Text, nullable=False),
+            Column("expires_at", DateTime(timezone=True), nullable=False, index=True),
+        )
+        self._created = False
+        self._last_pruned = 0.0
+        # Structure: {key: Future of the result being fetched}
+        self._in_flight: Dict[str, Future] = {}
+        self._metrics: Dict[str, int] = {
+            "memory_hits": 0,
+            "postgres_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "postgres_errors": 0,
+        }
+
+    def _ensure_table(self) -> None:
+        if not self._created and self.db_engine is not None:
+            if self.table.schema:
+                with self.db_engine.begin() as conn:
+                    conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {self.table.schema};"))
+            self.table.create(self.db_engine, checkfirst=True)
+            self._created = True
+
+    def _remember(self, key: str, expires_at: float, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Return the unexpired values of `keys`, from memory first and then from Postgres."""
+        now = time.time()
+        found: Dict[str, Any] = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if entry[0] <= now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = entry[1]
+        self._metrics["memory_hits"] += len(found)
+
+        missing = [key for key in keys if key not in found]
+        if missing and self.db_engine is not None:
+            try:
+                self._ensure_table()
+                with self.db_engine.connect() as conn:
+                    rows = conn.execute(
+                        select(self.table.c.key, self.table.c.data, self.table.c.expires_at).where(
+                            self.table.c.key.in_(missing), self.table.c.expires_at > func.now()
+                        )
+                    ).all()
+            except Exception as e:
+                self._metrics["postgres_errors"] += 1
+                logger.warning(f"Could not read the {self.table.name} table: {e}")
+                rows = []
+            for row in rows:
+                value = json.loads(row.data)
+                self._remember(row.key, row.expires_at.timestamp(), value)
+                found[row.key] = value
+            self._metrics["postgres_hits"] += len(rows)
+
+        self._metrics["misses"] += len(keys) - len(found)
+        return found
+
+    def set_many(self, values: Dict[str, Any], ttl_seconds: int) -> None:
+        """Cache `values` for `ttl_seconds`."""
+        if not values:
+            return
+        expires_at = time.time() + ttl_seconds
+        for key, value in values.items():
+            self._remember(key, expires_at, value)
+        if self.db_engine is None:
+            return
+        try:
+            self._ensure_table()
+            statement = postgresql.insert(self.table)
+            statement = statement.on_conflict_do_update(
+                index_elements=[self.table.c.key],
+                set_={"data": statement.excluded.data, "expires_at": statement.excluded.expires_at},
+            )
+            expires = func.now() + func.make_interval(0, 0, 0, 0, 0, 0, ttl_seconds)
+            with self.db_engine.begin() as conn:
+                conn.execute(
+                    statement.values(expires_at=expires),
+                    [{"key": key, "data": json.dumps(value, default=str)} for key, value in values.items()],
+                )
+                self._prune(conn)
+        except Exception as e:
+            self._metrics["postgres_errors"] += 1
+            logger.warning(f"Could not write the {self.table.name} table: {e}")
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], Any], ttl_seconds: int) -> Any:
+        """
+        Return the cached value of `key`, or fetch, cache and return it.
+
+        Args:
+            key (str): The cache key.
+            fetch (Callable[[], Any]): Returns the value; exceptions are raised to every caller waiting for it
+                and nothing is cached.
+            ttl_seconds (int): How long the fetched value is cached.
+
+        Returns:
+            Any: The value.
+        """
+        cached = self.get_many([key])
+        if key in cached:
+            return cached[key]
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+        if not owner:
+            self._metrics["coalesced"] += 1
+            return future.result()
+
+        try:
+            value = fetch()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            self.set_many({key: value}, ttl_seconds)
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def _prune(self, conn: Any) -> None:
+        """Delete expired rows, at most once an hour per process."""
+        if time.monotonic() - self._last_pruned < 3600:
+            return
+        self._last_pruned = time.monotonic()
+        conn.execute(delete(self.table).where(self.table.c.expires_at < func.now()))
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return the cache counters."""
+        return {
+            **self._metrics,
+            "memory_entries": len(self._entries),
+            "in_flight": len(self._in_flight),
+            "postgres": self.db_engine is not None,
+        }
@@ -0,0 +1,257 @@
+"""Execution of synchronous tool functions off the event loop.
+
+agno runs a synchronous tool of an async run with ``asyncio.to_thread``, on the default executor
+that the process also uses for its database calls and readiness checks, and without a time limit:
+a burst of slow HTTP tools fills it and delays everything else offloaded by the worker.
+``BaseToolBuilder`` therefore registers each synchronous tool function with ``tool_executor``, and
+``PooledOpenAIChat`` runs the calls of registered tools in async runs on its dedicated pool of
+``TOOL_EXECUTOR_THREADS`` threads, with a per-tool timeout, instead of ``asyncio.to_thread``. The
+tools stay synchronous, so sync runs (``agent.run``, ``print_response``) call them as before. Tools a
+tool set marks as CPU-bound run on a pool of ``TOOL_EXECUTOR_PROCESSES`` processes in either case.
+
+A call that times out returns an error to the model. A call still waiting for a thread is dropped;
+one already running cannot be interrupted and finishes in the background, holding its thread.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from inspect import isasyncgenfunction, iscoroutinefunction, isfunction, isgeneratorfunction, unwrap
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from tools.base.settings import tool_executor_settings
+
+logger = logging.getLogger(__name__)
+
+# Set while a tool call runs on the thread pool, so a CPU-bound tool it calls on the process pool is counted once
+_ON_TOOL_THREAD: contextvars.ContextVar[bool] = contextvars.ContextVar("on_tool_thread", default=False)
+
+
+class ToolTimeoutError(TimeoutError):
+    """Raised when a tool call does not finish within its timeout."""
+
+
+def is_sync_tool(tool: Any) -> bool:
+    """Whether `tool` is a plain synchronous function, as opposed to a generator, async function or Toolkit."""
+    return isfunction(tool) and not (iscoroutinefunction(tool) or isasyncgenfunction(tool) or isgeneratorfunction(tool))
+
+
+class ToolExecutor:
+    """Thread and process pools running synchronous tool calls, with timeouts and counters."""
+
+    def __init__(self, threads: int, processes: int):
+        self.threads = threads
+        self.processes = processes
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._metrics: Dict[str, float] = {
+            "calls": 0,
+            "process_calls": 0,
+            "timeouts": 0,
+            "errors": 0,
+            "max_in_flight": 0,
+            "queued_seconds_total": 0.0,
+            "run_seconds_total": 0.0,
+        }
+        # Structure: {tool_name: {"calls": int, "timeouts": int, "run_seconds_total": float}}
+        self._tools: Dict[str, Dict[str, float]] = {}
+        # Structure: {tool function: timeout in seconds}
+        self._offloaded: Dict[Callable[..., Any], float] = {}
+
+    def _pool(self, cpu_bound: bool) -> Executor:
+        with self._lock:
+            if cpu_bound and self.processes > 0:
+                if self._process_pool is None:
+                    # Forking a process with running threads can deadlock the child
+                    self._process_pool = ProcessPoolExecutor(
+                        max_workers=self.processes, mp_context=multiprocessing.get_context("spawn")
+                    )
+                return self._process_pool
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="tool")
+            return self._thread_pool
+
+    @staticmethod
+    def timeout_for(name: str, timeout: Optional[float] = None) -> float:
+        """Return the timeout of tool `name`: its `TOOL_EXECUTOR_TIMEOUTS` entry, else `timeout`, else the default."""
+        if name in tool_executor_settings.timeouts:
+            return tool_executor_settings.timeouts[name]
+        return timeout if timeout is not None else tool_executor_settings.timeout_seconds
+
+    @contextmanager
+    def _tracked(self, name: str, in_process: bool) -> Iterator[Dict[str, float]]:
+        """Count a call of tool `name`; the call sets `started["at"]` once it leaves the queue."""
+        submitted = time.perf_counter()
+        started: Dict[str, float] = {}
+        with self._lock:
+            self._in_flight += 1
+            self._metrics["calls"] += 1
+            self._metrics["process_calls"] += in_process
+            self._metrics["max_in_flight"] = max(self._metrics["max_in_flight"], self._in_flight)
+            tool = self._tools.setdefault(name, {"calls": 0, "timeouts": 0, "run_seconds_total": 0.0})
+            tool["calls"] += 1
+        try:
+            yield started
+        except ToolTimeoutError:
+            with self._lock:
+                self._metrics["timeouts"] += 1
+                tool["timeouts"] += 1
+            raise
+        except Exception:
+            with self._lock:
+                self._metrics["errors"] += 1
+            raise
+        finally:
+            now = time.perf_counter()
+            start = started.get("at", submitted)
+            with self._lock:
+                self._in_flight -= 1
+                self._metrics["queued_seconds_total"] += start - submitted
+                self._metrics["run_seconds_total"] += now - start
+                tool["run_seconds_total"] += now - start
+
+    @staticmethod
+    def _timed_out(name: str, timeout: float) -> ToolTimeoutError:
+        logger.warning(f"Tool '{name}' did not finish within {timeout:.1f}s")
+        return ToolTimeoutError(f"The tool '{name}' did not finish within {timeout:g} seconds")
+
+    async def run(
+        self,
+        function: Callable[..., Any],
+        args: tuple,
+        kwargs: Dict[str, Any],
+        timeout: Optional[float] = None,
+        cpu_bound: bool = False,
+        name: Optional[str] = None,
+    ) -> Any:
+        """
+        Run `function(*args, **kwargs)` on the thread pool, or on the process pool if `cpu_bound`.
+
+        Args:
+            name (Optional[str]): The tool the call is counted and timed out as; defaults to `function.__name__`.
+
+        Raises:
+            ToolTimeoutError: If the call did not finish within the tool's timeout.
+        """
+        name = name or function.__name__
+        timeout = self.timeout_for(name, timeout)
+        pool = self._pool(cpu_bound)
+        in_process = isinstance(pool, ProcessPoolExecutor)
+        loop = asyncio.get_running_loop()
+        with self._tracked(name, in_process) as started:
+            if in_process:
+                started["at"] = time.perf_counter()
+                future = loop.run_in_executor(pool, functools.partial(function, *args, **kwargs))
+            else:
+                # Keep the caller's context variables, as asyncio.to_thread does
+                context = contextvars.copy_context()
+                context.run(_ON_TOOL_THREAD.set, True)
+
+                def call() -> Any:
+                    started["at"] = time.perf_counter()
+                    return context.run(function, *args, **kwargs)
+
+                future = loop.run_in_executor(pool, call)
+            try:
+                # Not wait_for: a TimeoutError raised by the tool itself is not a timeout of the call
+                done, _ = await asyncio.wait({future}, timeout=timeout)
+                if not done:
+                    raise self._timed_out(name, timeout)
+                return future.result()
+            finally:
+                # Drops the call if it is still waiting for a thread
+                future.cancel()
+
+    def _run_in_process(self, function: Callable[..., Any], args: tuple, kwargs: Dict[str, Any], timeout: float) -> Any:
+        if _ON_TOOL_THREAD.get():
+            # The thread pool call waiting for this one already counts it
+            with self._lock:
+                self._metrics["process_calls"] += 1
+            return self._wait_in_process(function, args, kwargs, timeout)
+        with self._tracked(function.__name__, in_process=True) as started:
+            # Time waiting for a free process is not observable from here
+            started["at"] = time.perf_counter()
+            return self._wait_in_process(function, args, kwargs, timeout)
+
+    def _wait_in_process(
+        self, function: Callable[..., Any], args: tuple, kwargs: Dict[str, Any], timeout: float
+    ) -> Any:
+        future = self._pool(cpu_bound=True).submit(function, *args, **kwargs)
+        try:
+            done, _ = wait([future], timeout)
+            if not done:
+                raise self._timed_out(function.__name__, timeout)
+            return future.result()
+        finally:
+            future.cancel()
+
+    def offload(
+        self, function: Callable[..., Any], timeout: Optional[float] = None, cpu_bound: bool = False
+    ) -> Callable[..., Any]:
+        """
+        Register the synchronous tool `function` to run on this executor.
+
+        In async runs ``PooledOpenAIChat`` runs calls of registered tools on the thread pool with their
+        timeout (see `offloaded_timeout`); sync runs call them directly, as agno does.
+
+        Args:
+            function (Callable[..., Any]): A synchronous tool function.
+            timeout (Optional[float]): Seconds the call may take; `TOOL_EXECUTOR_TIMEOUTS` and then
+                `TOOL_EXECUTOR_TIMEOUT_SECONDS` apply when None.
+            cpu_bound (bool): Run the call on the process pool when `TOOL_EXECUTOR_PROCESSES` is set;
+                `function` and its arguments must then be picklable.
+
+        Returns:
+            Callable[..., Any]: `function`, or for a CPU-bound tool a synchronous function with its name,
+            docstring and signature that runs it on the process pool.
+        """
+        timeout = self.timeout_for(function.__name__, timeout)
+        self._offloaded[function] = timeout
+        if not (cpu_bound and self.processes > 0):
+            return function
+
+        @functools.wraps(function)
+        def run_in_process(*args: Any, **kwargs: Any) -> Any:
+            return self._run_in_process(function, args, kwargs, timeout)
+
+        return run_in_process
+
+    def offloaded_timeout(self, entrypoint: Any) -> Optional[float]:
+        """Return the timeout of an offloaded tool, or None if `entrypoint` is not one; wrappers are looked through."""
+        try:
+            # agno wraps tool functions in its argument validation
+            return self._offloaded.get(unwrap(entrypoint))
+        except (TypeError, ValueError):
+            return None
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return the counters of the pools and of each tool."""
+        return {
+            **{key: round(value, 4) for key, value in self._metrics.items()},
+            "in_flight": self._in_flight,
+            "threads": self.threads,
+            "processes": self.processes,
+            "tools": {
+                name: {key: round(value, 4) for key, value in tool.items()} for name, tool in self._tools.items()
+            },
+        }
+
+    def shutdown(self) -> None:
+        """Stop the pools, dropping the calls still waiting for a thread or process."""
+        with self._lock:
+            for pool in (self._thread_pool, self._process_pool):
+                if pool is not None:
+                    pool.shutdown(wait=False, cancel_futures=True)
+            self._thread_pool = self._process_pool = None
+
+
+# Create the process-wide ToolExecutor
+tool_executor = ToolExecutor(tool_executor_settings.threads, tool_executor_settings.processes)
@@ -0,0 +1,135 @@
+"""Run-scoped memoization of tool calls.
+
+An agent or team is built for each run, and its builder wraps the configured tool functions in
+agno ``Function`` objects whose tool hook is a ``ToolCallMemo``. A call with the same arguments as
+an earlier call of the run is answered with the earlier result instead of running the tool again;
+identical calls running at the same time (e.g. parallel tool calls or team members) wait for the
+first one. A team shares one memo with all its members, so the leader delegating the same task
+twice or two members looking up the same story cost one tool call. Errors are not memoized.
+
+The hook is set on those functions only, not on the agent: agno's built-in memory, knowledge and
+team delegation tools are async in async runs and are never memoized. Each run's metrics report the
+memo under ``tool_memo``: calls to memoized tools, the calls saved and the seconds those calls took
+the first time; ``GET /metrics`` reports the totals of the process.
+"""
+
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from inspect import isasyncgen, isasyncgenfunction, iscoroutine, iscoroutinefunction, isgenerator
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from agno.tools.function import Function
+
+logger = logging.getLogger(__name__)
+
+# Totals of every memo in this process
+TOOL_MEMO_TOTALS: Dict[str, float] = {"calls": 0, "saved_calls": 0, "saved_seconds": 0.0}
+
+
+class ToolCallMemo:
+    """Results of the tool calls of one run, keyed by tool name and arguments."""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        # Structure: {key: (finished_at, duration_seconds, result)}
+        self._results: Dict[str, Tuple[float, float, Any]] = {}
+        # Structure: {key: Future of the (duration_seconds, result) of the call in progress}
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.saved_calls = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def _is_hook(hook: Any) -> bool:
+        return isinstance(getattr(hook, "__self__", None), ToolCallMemo)
+
+    def memoize(self, tools: List[Any]) -> List[Any]:
+        """
+        Return `tools` with each synchronous function replaced by a `Function` memoized in this memo.
+
+        Args:
+            tools (List[Any]): The configured tools; Toolkits, Functions and async functions are kept as they are.
+
+        Returns:
+            List[Any]: The tools to build the runner with.
+        """
+        memoized = []
+        for tool in tools:
+            plain = callable(tool) and not isinstance(tool, Function) and hasattr(tool, "__name__")
+            if plain and not (iscoroutinefunction(tool) or isasyncgenfunction(tool)):
+                tool = Function(name=tool.__name__, entrypoint=tool, tool_hooks=[self.hook])
+            memoized.append(tool)
+        return memoized
+
+    def attach(self, runner: Any) -> None:
+        """Use this memo for the memoized tools and the run metrics of `runner`, an agno Agent or Team."""
+        for tool in runner.tools or []:
+            if isinstance(tool, Function) and tool.tool_hooks and any(self._is_hook(h) for h in tool.tool_hooks):
+                tool.tool_hooks = [h for h in tool.tool_hooks if not self._is_hook(h)] + [self.hook]
+        runner.tool_call_memo = self
+
+    def _saved(self, duration: float) -> None:
+        with self._lock:
+            self.saved_calls += 1
+            self.saved_seconds += duration
+        TOOL_MEMO_TOTALS["saved_calls"] += 1
+        TOOL_MEMO_TOTALS["saved_seconds"] += duration
+
+    def hook(self, function_name: str, function_call: Callable[..., Any], arguments: Dict[str, Any]) -> Any:
+        """agno tool hook answering a repeated call from the memo."""
+        key = f"{function_name}:{json.dumps(arguments, sort_keys=True, default=str)}"
+        with self._lock:
+            self.calls += 1
+            TOOL_MEMO_TOTALS["calls"] += 1
+            cached = self._results.get(key)
+            if cached is not None and time.monotonic() - cached[0] < self.ttl_seconds:
+                hit: Optional[Tuple[float, Any]] = (cached[1], cached[2])
+                future = None
+            else:
+                hit = None
+                future = self._in_flight.get(key)
+                owner = future is None
+                if owner:
+                    future = self._in_flight[key] = Future()
+        if hit is not None:
+            self._saved(hit[0])
+            logger.debug(f"Answered {function_name} from the run's earlier call")
+            return hit[1]
+        if not owner:
+            duration, result = future.result()
+            self._saved(duration)
+            return result
+
+        start = time.perf_counter()
+        try:
+            result = function_call(**arguments)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            duration = time.perf_counter() - start
+            # Generators and coroutines can only be consumed once
+            if not (isgenerator(result) or isasyncgen(result) or iscoroutine(result)):
+                with self._lock:
+                    self._results[key] = (time.monotonic(), duration, result)
+            future.set_result((duration, result))
+            return result
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return the calls to memoized tools, and the calls and seconds saved so far."""
+        return {"calls": self.calls, "saved_calls": self.saved_calls, "saved_seconds": round(self.saved_seconds, 4)}
+
+
+def add_tool_memo_metrics(runner: Any, metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the memo of `runner`, if any, to its run `metrics` under `tool_memo`."""
+    memo = getattr(runner, "tool_call_memo", None)
+    if memo is not None:
+        metrics["tool_memo"] = memo.metrics()
+    return metrics
@@ -0,0 +1,53 @@
+from typing import Dict
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class ToolMemoSettings(BaseSettings):
+    """Run-scoped tool memoization settings that are set using environment variables prefixed with ``TOOL_MEMO_``."""
+
+    model_config = SettingsConfigDict(env_prefix="TOOL_MEMO_")
+
+    # Answer repeated identical tool calls of an agent or team run from the first call's result.
+    enabled: bool = True
+    # How long a result is reused within the run, so long-running sessions still see fresh data.
+    ttl_seconds: float = 300.0
+
+
+class ToolExecutorSettings(BaseSettings):
+    """Synchronous tool execution settings that are set using environment variables prefixed with ``TOOL_EXECUTOR_``."""
+
+    model_config = SettingsConfigDict(env_prefix="TOOL_EXECUTOR_")
+
+    # Run the synchronous tool functions of tool sets on the pools below instead of agno's default executor,
+    # which the rest of the process (database calls, readiness checks) also uses.
+    enabled: bool = True
+    # Threads running synchronous tools; calls beyond it wait for a free thread.
+    threads: int = 16
+    # Processes running the tools a tool set marks as CPU-bound (0 runs them on the threads instead).
+    processes: int = 0
+    # Seconds a tool call may take before the run gets a timeout error instead of its result.
+    timeout_seconds: float = 60.0
+    # Per-tool overrides of `timeout_seconds` by function name, e.g. '{"get_historical_stock_prices": 120}'.
+    timeouts: Dict[str, float] = {}
+
+
+class ParallelToolCallSettings(BaseSettings):
+    """Parallel tool call settings that are set using environment variables prefixed with ``TOOL_PARALLEL_``."""
+
+    model_config = SettingsConfigDict(env_prefix="TOOL_PARALLEL_")
+
+    # Tool calls of one model turn an agent runs at the same time, for agents whose config sets no cap.
+    # 1 runs them one after another; 0 runs them all at once. The cap is per turn: calls of other turns,
+    # e.g. of the agent's concurrent runs or of other team members, do not count against it.
+    max_calls: int = 4
+
+
+# Create ToolMemoSettings object
+tool_memo_settings = ToolMemoSettings()
+
+# Create ToolExecutorSettings object
+tool_executor_settings = ToolExecutorSettings()
+
+# Create ParallelToolCallSettings object
+parallel_tool_call_settings = ParallelToolCallSettings()
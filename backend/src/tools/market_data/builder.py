@@ -0,0 +1,280 @@
+"""Builder module defining the market data tool set.
+
+Each tool looks up a batch of tickers in one call and returns a JSON object keyed by ticker.
+Results are cached per ticker and type of data for the type's TTL (``MARKET_DATA_*_TTL_SECONDS``),
+in this process and, with ``MARKET_DATA_CACHE_BACKEND=postgres``, in a table shared by all workers;
+only the tickers missing from the cache are fetched, in one batch, from the market data source.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from typing import Any, Dict, List, Optional
+
+from agno.utils.log import logger
+
+from tools.base.builder import BaseToolBuilder, ToolConfig
+from tools.base.cache import ToolResultCache
+from tools.market_data.settings import market_data_settings
+from tools.market_data.sources import FixtureSource, MarketDataSource, YahooFinanceSource
+
+# Fields of the company info returned as fundamentals
+FUNDAMENTAL_FIELDS = (
+    "symbol",
+    "longName",
+    "sector",
+    "industry",
+    "marketCap",
+    "enterpriseValue",
+    "trailingPE",
+    "forwardPE",
+    "pegRatio",
+    "priceToBook",
+    "trailingEps",
+    "forwardEps",
+    "dividendYield",
+    "beta",
+    "profitMargins",
+    "returnOnEquity",
+    "debtToEquity",
+    "totalRevenue",
+    "revenueGrowth",
+    "fiftyTwoWeekHigh",
+    "fiftyTwoWeekLow",
+)
+
+_source: Optional[MarketDataSource] = None
+_cache: Optional[ToolResultCache] = None
+_lock = threading.Lock()
+# Structure: {"source_calls": int, "fetched": int, "not_found": int, "source_errors": int}
+_metrics: Dict[str, int] = {"source_calls": 0, "fetched": 0, "not_found": 0, "source_errors": 0}
+
+
+def get_market_data_source() -> MarketDataSource:
+    """Return the market data source selected by `MARKET_DATA_SOURCE`, creating it on first use."""
+    global _source
+    with _lock:
+        if _source is None:
+            if market_data_settings.source == "fixture":
+                if not market_data_settings.fixture_path:
+                    raise ValueError("MARKET_DATA_FIXTURE_PATH is required when MARKET_DATA_SOURCE=fixture")
+                _source = FixtureSource.from_file(market_data_settings.fixture_path)
+            else:
+                _source = YahooFinanceSource(market_data_settings.fetch_concurrency)
+        return _source
+
+
+def set_market_data_source(source: MarketDataSource, cache: Optional[ToolResultCache] = None) -> None:
+    """
+    Replace the market data source, e.g. with a `FixtureSource` in tests and benchmarks.
+
+    Args:
+        source (MarketDataSource): The source to fetch from.
+        cache (Optional[ToolResultCache]): The cache to use from now on. Defaults to an empty in-memory cache,
+            so no data of the previous source is served.
+    """
+    global _source, _cache
+    with _lock:
+        _source = source
+        _cache = cache or ToolResultCache("market_data_cache", market_data_settings.memory_cache_size)
+
+
+def get_market_data_cache() -> ToolResultCache:
+    """Return the process-wide market data cache, creating it on first use."""
+    global _cache
+    with _lock:
+        if _cache is None:
+            db_engine = None
+            if market_data_settings.cache_backend == "postgres":
+                from db.session import db_engine
+            _cache = ToolResultCache("market_data_cache", market_data_settings.memory_cache_size, db_engine=db_engine)
+        return _cache
+
+
+def market_data_metrics() -> Dict[str, Any]:
+    """Return the counters of the market data tools and their cache."""
+    return {**_metrics, "cache": get_market_data_cache().metrics()}
+
+
+def _normalize_symbols(symbols: List[str]) -> List[str]:
+    """Upper-case and deduplicate `symbols`, keeping at most `max_symbols_per_call`."""
+    if isinstance(symbols, str):
+        symbols = symbols.split(",")
+    normalized = list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))
+    if len(normalized) > market_data_settings.max_symbols_per_call:
+        logger.warning(f"Looking up only the first {market_data_settings.max_symbols_per_call} of {len(normalized)}")
+    return normalized[: market_data_settings.max_symbols_per_call]
+
+
+def _lookup(kind: str, symbols: List[str], ttl_seconds: int, **params: Any) -> Dict[str, Any]:
+    """Return `kind` data per symbol, from the cache where possible and otherwise from the source."""
+    normalized = _normalize_symbols(symbols)
+    suffix = "".join(f":{params[name]}" for name in sorted(params))
+    keys = {symbol: f"{kind}:{symbol}{suffix}" for symbol in normalized}
+    cache = get_market_data_cache()
+    cached = cache.get_many(list(keys.values()))
+    results = {symbol: cached[key] for symbol, key in keys.items() if key in cached}
+
+    missing = [symbol for symbol in normalized if symbol not in results]
+    if missing:
+        _metrics["source_calls"] += 1
+        try:
+            fetched = get_market_data_source().fetch(kind, missing, **params)
+        except Exception as e:
+            _metrics["source_errors"] += 1
+            logger.warning(f"Could not fetch {kind} for {missing}: {e}")
+            return {**results, **{symbol: {"error": f"Could not fetch data: {e}"} for symbol in missing}}
+        cache.set_many({keys[symbol]: data for symbol, data in fetched.items() if symbol in keys}, ttl_seconds)
+        _metrics["fetched"] += len(fetched)
+        _metrics["not_found"] += len(missing) - len(fetched)
+        results.update(fetched)
+    return {symbol: results.get(symbol, {"error": f"No data found for {symbol}"}) for symbol in normalized}
+
+
+# -----------------------------------------------------------------------------
+# Tool functions
+# -----------------------------------------------------------------------------
+
+
+def get_current_stock_prices(symbols: List[str]) -> str:
+    """Return the latest price, previous close, day range and volume of one or more stocks.
+
+    Parameters
+    ----------
+    symbols : List[str]
+        Ticker symbols, e.g. ["AAPL", "MSFT"]. Look up all tickers you need in one call.
+
+    Returns
+    -------
+    str
+        A JSON object keyed by ticker symbol.
+    """
+
+    return json.dumps(_lookup("quote", symbols, market_data_settings.quote_ttl_seconds))
+
+
+def get_company_info(symbols: List[str]) -> str:
+    """Return the company profile and key statistics of one or more companies.
+
+    Parameters
+    ----------
+    symbols : List[str]
+        Ticker symbols, e.g. ["AAPL", "MSFT"]. Look up all tickers you need in one call.
+
+    Returns
+    -------
+    str
+        A JSON object keyed by ticker symbol.
+    """
+
+    return json.dumps(_lookup("info", symbols, market_data_settings.info_ttl_seconds), default=str)
+
+
+def get_stock_fundamentals(symbols: List[str]) -> str:
+    """Return valuation, profitability and balance sheet fundamentals of one or more stocks.
+
+    Parameters
+    ----------
+    symbols : List[str]
+        Ticker symbols, e.g. ["AAPL", "MSFT"]. Look up all tickers you need in one call.
+
+    Returns
+    -------
+    str
+        A JSON object keyed by ticker symbol.
+    """
+
+    info = _lookup("info", symbols, market_data_settings.info_ttl_seconds)
+    fundamentals = {
+        symbol: data if "error" in data else {field: data.get(field) for field in FUNDAMENTAL_FIELDS}
+        for symbol, data in info.items()
+    }
+    return json.dumps(fundamentals, default=str)
+
+
+def get_analyst_recommendations(symbols: List[str]) -> str:
+    """Return analyst recommendations of one or more stocks.
+
+    Parameters
+    ----------
+    symbols : List[str]
+        Ticker symbols, e.g. ["AAPL", "MSFT"]. Look up all tickers you need in one call.
+
+    Returns
+    -------
+    str
+        A JSON object keyed by ticker symbol.
+    """
+
+    return json.dumps(_lookup("recommendations", symbols, market_data_settings.recommendations_ttl_seconds))
+
+
+def get_company_news(symbols: List[str], num_stories: int = 3) -> str:
+    """Return recent news of one or more companies.
+
+    Parameters
+    ----------
+    symbols : List[str]
+        Ticker symbols, e.g. ["AAPL", "MSFT"]. Look up all tickers you need in one call.
+    num_stories : int, optional
+        How many stories to return per company. Defaults to 3.
+
+    Returns
+    -------
+    str
+        A JSON object keyed by ticker symbol.
+    """
+
+    news = _lookup("news", symbols, market_data_settings.news_ttl_seconds)
+    return json.dumps(
+        {symbol: data if "error" in data else data[:num_stories] for symbol, data in news.items()}, default=str
+    )
+
+
+def get_historical_stock_prices(symbols: List[str], period: str = "1mo", interval: str = "1d") -> str:
+    """Return the historical prices of one or more stocks.
+
+    Parameters
+    ----------
+    symbols : List[str]
+        Ticker symbols, e.g. ["AAPL", "MSFT"]. Look up all tickers you need in one call.
+    period : str, optional
+        1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd or max. Defaults to "1mo".
+    interval : str, optional
+        1d, 5d, 1wk, 1mo or 3mo. Defaults to "1d".
+
+    Returns
+    -------
+    str
+        A JSON object keyed by ticker symbol, mapping timestamps to prices.
+    """
+
+    return json.dumps(
+        _lookup("history", symbols, market_data_settings.history_ttl_seconds, period=period, interval=interval)
+    )
+
+
+# -----------------------------------------------------------------------------
+# Config & builder entrypoints – required by tools.registry
+# -----------------------------------------------------------------------------
+
+cfg = ToolConfig(
+    tool_id="market_data_tools",
+    name="Market Data Tools",
+    description="Cached, batched stock prices, fundamentals, recommendations and news.",
+    tool_functions=[
+        get_current_stock_prices,
+        get_company_info,
+        get_stock_fundamentals,
+        get_analyst_recommendations,
+        get_company_news,
+        get_historical_stock_prices,
+    ],
+)
+
+
+def get_tools():
+    """Return the list of market data tool callables."""
+
+    return BaseToolBuilder(cfg).build()
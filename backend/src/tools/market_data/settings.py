@@ -0,0 +1,33 @@
+from typing import Literal, Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class MarketDataSettings(BaseSettings):
+    """Market data tool settings that are set using environment variables prefixed with ``MARKET_DATA_``."""
+
+    model_config = SettingsConfigDict(env_prefix="MARKET_DATA_")
+
+    # "yahoo" fetches from Yahoo Finance through yfinance; "fixture" serves `fixture_path` (JSON) offline.
+    source: Literal["yahoo", "fixture"] = "yahoo"
+    fixture_path: Optional[str] = None
+
+    # "postgres" shares cached data between all workers through the `ai.market_data_cache` table, in front of
+    # which each process keeps its own LRU of `memory_cache_size` entries; "memory" keeps only the LRU.
+    cache_backend: Literal["memory", "postgres"] = "postgres"
+    memory_cache_size: int = 5000
+
+    # How long each type of data is served from the cache.
+    quote_ttl_seconds: int = 30
+    info_ttl_seconds: int = 86400
+    recommendations_ttl_seconds: int = 86400
+    news_ttl_seconds: int = 900
+    history_ttl_seconds: int = 3600
+
+    # Most tickers looked up in one call, and concurrent Yahoo requests for data without a batch endpoint.
+    max_symbols_per_call: int = 20
+    fetch_concurrency: int = 8
+
+
+# Create MarketDataSettings object
+market_data_settings = MarketDataSettings()
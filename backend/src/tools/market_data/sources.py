@@ -0,0 +1,126 @@
+"""Sources of market data for ``MarketDataTools``.
+
+A source fetches one kind of data for a batch of symbols and returns it per symbol, leaving out
+symbols it has no data for. ``YahooFinanceSource`` uses yfinance, with one download for quotes and
+price history of all symbols and concurrent requests for the rest; ``FixtureSource`` serves canned
+data so the tools can be exercised offline.
+"""
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Protocol
+
+logger = logging.getLogger(__name__)
+
+# Kinds of data a source provides
+KINDS = ("quote", "info", "recommendations", "news", "history")
+
+
+class MarketDataSource(Protocol):
+    def fetch(self, kind: str, symbols: List[str], **params: Any) -> Dict[str, Any]:
+        """Return `kind` data for each of `symbols` that has any. `history` takes `period` and `interval`."""
+        ...
+
+
+def _frame_to_json(frame: Any) -> Any:
+    return json.loads(frame.to_json(orient="index", date_format="iso"))
+
+
+class YahooFinanceSource:
+    """Market data from Yahoo Finance."""
+
+    def __init__(self, fetch_concurrency: int):
+        import yfinance as yf
+
+        self.yf = yf
+        self.fetch_concurrency = fetch_concurrency
+
+    def fetch(self, kind: str, symbols: List[str], **params: Any) -> Dict[str, Any]:
+        if kind == "quote":
+            return self._quotes(symbols)
+        if kind == "history":
+            return self._history(symbols, params.get("period", "1mo"), params.get("interval", "1d"))
+        return self._per_symbol(kind, symbols)
+
+    def _download(self, symbols: List[str], period: str, interval: str) -> Dict[str, Any]:
+        """Download prices of all symbols in one request, returning a frame per symbol."""
+        frame = self.yf.download(
+            symbols, period=period, interval=interval, group_by="ticker", progress=False, threads=True
+        )
+        frames = {}
+        for symbol in symbols:
+            try:
+                symbol_frame = frame[symbol].dropna(how="all")
+            except KeyError:
+                continue
+            if not symbol_frame.empty:
+                frames[symbol] = symbol_frame
+        return frames
+
+    def _quotes(self, symbols: List[str]) -> Dict[str, Any]:
+        quotes = {}
+        for symbol, frame in self._download(symbols, period="5d", interval="1d").items():
+            last = frame.iloc[-1]
+            previous_close = float(frame["Close"].iloc[-2]) if len(frame) > 1 else None
+            quotes[symbol] = {
+                "symbol": symbol,
+                "price": round(float(last["Close"]), 4),
+                "previous_close": round(previous_close, 4) if previous_close is not None else None,
+                "day_high": round(float(last["High"]), 4),
+                "day_low": round(float(last["Low"]), 4),
+                "volume": int(last["Volume"]),
+                "as_of": frame.index[-1].isoformat(),
+            }
+        return quotes
+
+    def _history(self, symbols: List[str], period: str, interval: str) -> Dict[str, Any]:
+        return {symbol: _frame_to_json(frame) for symbol, frame in self._download(symbols, period, interval).items()}
+
+    def _fetch_one(self, kind: str, symbol: str) -> Any:
+        ticker = self.yf.Ticker(symbol)
+        if kind == "info":
+            return ticker.info or None
+        if kind == "recommendations":
+            recommendations = ticker.recommendations
+            return json.loads(recommendations.to_json(orient="records")) if recommendations is not None else None
+        if kind == "news":
+            return ticker.news or None
+        raise ValueError(f"Unknown market data kind '{kind}'")
+
+    def _per_symbol(self, kind: str, symbols: List[str]) -> Dict[str, Any]:
+        """Fetch data that Yahoo only serves per ticker, for all symbols concurrently."""
+
+        def fetch(symbol: str) -> Any:
+            try:
+                return self._fetch_one(kind, symbol)
+            except Exception as e:
+                logger.warning(f"Could not fetch {kind} for {symbol}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=min(self.fetch_concurrency, len(symbols))) as pool:
+            results = dict(zip(symbols, pool.map(fetch, symbols)))
+        return {symbol: data for symbol, data in results.items() if data is not None}
+
+
+class FixtureSource:
+    """
+    Market data from a fixture, for tests and offline benchmarks.
+
+    The fixture maps each kind to data per symbol, e.g. `{"quote": {"AAPL": {...}}, "info": {...}}`;
+    `history` data is used for every period and interval.
+    """
+
+    def __init__(self, data: Dict[str, Dict[str, Any]]):
+        self.data = data
+        self.calls: Dict[str, int] = {kind: 0 for kind in KINDS}
+
+    @classmethod
+    def from_file(cls, path: str) -> "FixtureSource":
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def fetch(self, kind: str, symbols: List[str], **params: Any) -> Dict[str, Any]:
+        self.calls[kind] = self.calls.get(kind, 0) + 1
+        by_symbol = self.data.get(kind, {})
+        return {symbol: by_symbol[symbol] for symbol in symbols if symbol in by_symbol}
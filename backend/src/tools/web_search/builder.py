@@ -0,0 +1,128 @@
+"""Builder module defining the cached DuckDuckGo web search tool set.
+
+The tools keep the names and arguments of agno's ``DuckDuckGoTools`` and call it on a cache miss.
+Results are cached under the normalized query (case, whitespace and punctuation search engines
+ignore), so near-identical queries from any agent or team share one entry, for
+``WEB_SEARCH_SEARCH_TTL_SECONDS`` or ``WEB_SEARCH_NEWS_TTL_SECONDS``; with
+``WEB_SEARCH_CACHE_BACKEND=postgres`` the entries are shared by all workers. Concurrent identical
+searches in a process wait for one upstream call.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+import unicodedata
+from typing import Any, Dict, Optional
+
+from agno.tools.duckduckgo import DuckDuckGoTools
+
+from tools.base.builder import BaseToolBuilder, ToolConfig
+from tools.base.cache import ToolResultCache
+from tools.web_search.settings import web_search_settings
+
+# Characters that do not change the results of a search
+_IGNORED_CHARACTERS = re.compile(r"[?!,;()\[\]{}]+")
+
+_upstream = DuckDuckGoTools()
+_cache: Optional[ToolResultCache] = None
+_lock = threading.Lock()
+# Structure: {"upstream_calls": int, "upstream_errors": int}
+_metrics: Dict[str, int] = {"upstream_calls": 0, "upstream_errors": 0}
+
+
+def get_web_search_cache() -> ToolResultCache:
+    """Return the process-wide web search cache, creating it on first use."""
+    global _cache
+    with _lock:
+        if _cache is None:
+            db_engine = None
+            if web_search_settings.cache_backend == "postgres":
+                from db.session import db_engine
+            _cache = ToolResultCache("web_search_cache", web_search_settings.memory_cache_size, db_engine=db_engine)
+        return _cache
+
+
+def set_web_search_cache(cache: ToolResultCache) -> None:
+    """Replace the web search cache, e.g. with an in-memory one in tests and benchmarks."""
+    global _cache
+    with _lock:
+        _cache = cache
+
+
+def web_search_metrics() -> Dict[str, Any]:
+    """Return the counters of the web search tools and their cache."""
+    return {**_metrics, "cache": get_web_search_cache().metrics()}
+
+
+def normalize_query(query: str) -> str:
+    """Return `query` case-folded, without punctuation that search engines ignore and with single spaces."""
+    normalized = _IGNORED_CHARACTERS.sub(" ", unicodedata.normalize("NFKC", query).casefold())
+    return " ".join(normalized.split()).strip(" .")
+
+
+def _search(kind: str, query: str, max_results: int, ttl_seconds: int) -> str:
+    def fetch() -> Any:
+        _metrics["upstream_calls"] += 1
+        try:
+            if kind == "news":
+                return json.loads(_upstream.duckduckgo_news(query=query, max_results=max_results))
+            return json.loads(_upstream.duckduckgo_search(query=query, max_results=max_results))
+        except Exception:
+            _metrics["upstream_errors"] += 1
+            raise
+
+    key = f"{kind}:{max_results}:{normalize_query(query)}"
+    return json.dumps(get_web_search_cache().get_or_fetch(key, fetch, ttl_seconds), indent=2)
+
+
+# -----------------------------------------------------------------------------
+# Tool functions
+# -----------------------------------------------------------------------------
+
+
+def duckduckgo_search(query: str, max_results: int = 5) -> str:
+    """Use this function to search DuckDuckGo for a query.
+
+    Args:
+        query(str): The query to search for.
+        max_results (optional, default=5): The maximum number of results to return.
+
+    Returns:
+        The result from DuckDuckGo.
+    """
+
+    return _search("text", query, max_results, web_search_settings.search_ttl_seconds)
+
+
+def duckduckgo_news(query: str, max_results: int = 5) -> str:
+    """Use this function to get the latest news from DuckDuckGo.
+
+    Args:
+        query(str): The query to search for.
+        max_results (optional, default=5): The maximum number of results to return.
+
+    Returns:
+        The latest news from DuckDuckGo.
+    """
+
+    return _search("news", query, max_results, web_search_settings.news_ttl_seconds)
+
+
+# -----------------------------------------------------------------------------
+# Config & builder entrypoints – required by tools.registry
+# -----------------------------------------------------------------------------
+
+cfg = ToolConfig(
+    tool_id="web_search_tools",
+    name="Web Search Tools",
+    description="DuckDuckGo web and news search with results cached across agents and workers.",
+    tool_functions=[duckduckgo_search, duckduckgo_news],
+)
+
+
+def get_tools():
+    """Return the list of web search tool callables."""
+
+    return BaseToolBuilder(cfg).build()
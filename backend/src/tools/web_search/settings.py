@@ -0,0 +1,22 @@
+from typing import Literal
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class WebSearchSettings(BaseSettings):
+    """Web search tool settings that are set using environment variables prefixed with ``WEB_SEARCH_``."""
+
+    model_config = SettingsConfigDict(env_prefix="WEB_SEARCH_")
+
+    # "postgres" shares results between all workers through the `ai.web_search_cache` table, in front of which
+    # each process keeps its own LRU of `memory_cache_size` entries; "memory" keeps only the LRU.
+    cache_backend: Literal["memory", "postgres"] = "postgres"
+    memory_cache_size: int = 2000
+
+    # How long search and news results are served from the cache.
+    search_ttl_seconds: int = 3600
+    news_ttl_seconds: int = 600
+
+
+# Create WebSearchSettings object
+web_search_settings = WebSearchSettings()
@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from api.admission import AdmissionController, AdmissionRejected
+
+
+def _controller(**overrides) -> AdmissionController:
+    settings = dict(
+        max_concurrent_runs=1,
+        max_runs_per_user=None,
+        max_runs_per_agent=None,
+        max_queue_size=10,
+        queue_timeout_seconds=0.05,
+        retry_after_seconds=1,
+    )
+    settings.update(overrides)
+    return AdmissionController(**settings)
+
+
+def test_waiter_is_admitted_when_a_slot_is_released():
+    async def scenario():
+        controller = _controller(queue_timeout_seconds=1)
+        first = await controller.acquire(user_id="u1", agent_id="a")
+        waiting = asyncio.create_task(controller.acquire(user_id="u2", agent_id="a"))
+        await asyncio.sleep(0)
+        assert controller.metrics()["queue_depth"] == 1
+        first.release()
+        second = await waiting
+        second.release()
+        return controller.metrics()
+
+    metrics = asyncio.run(scenario())
+    assert metrics["active_runs"] == 0
+    assert metrics["admitted_after_wait"] == 1
+
+
+def test_wait_times_out_and_queue_full_is_rejected():
+    async def scenario():
+        controller = _controller(max_queue_size=1)
+        first = await controller.acquire(user_id=None, agent_id="a")
+        waiting = asyncio.create_task(controller.acquire(user_id=None, agent_id="a"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as queue_full:
+            await controller.acquire(user_id=None, agent_id="a")
+        with pytest.raises(AdmissionRejected) as timeout:
+            await waiting
+        first.release()
+        return controller, queue_full.value, timeout.value
+
+    controller, queue_full, timeout = asyncio.run(scenario())
+    assert queue_full.reason == "queue_full"
+    assert timeout.reason == "timeout"
+    assert controller.metrics()["active_runs"] == 0
+
+
+def test_slot_handed_over_as_the_wait_times_out_is_kept(monkeypatch):
+    async def scenario():
+        controller = _controller()
+        first = await controller.acquire(user_id="u1", agent_id="a")
+
+        async def wait_for_racing_the_release(future, timeout):
+            # The slot is handed to the waiter in the same iteration as its timeout fires
+            first.release()
+            raise asyncio.TimeoutError
+
+        monkeypatch.setattr(asyncio, "wait_for", wait_for_racing_the_release)
+        second = await controller.acquire(user_id="u2", agent_id="a")
+        monkeypatch.undo()
+        assert controller.metrics()["active_runs"] == 1
+        second.release()
+        return controller.metrics()
+
+    metrics = asyncio.run(scenario())
+    assert metrics["active_runs"] == 0
+    assert metrics["active_runs_by_agent"] == {}
+    assert metrics["rejected_timeout"] == 0
+
+
+def test_cancelled_wait_leaves_the_queue():
+    async def scenario():
+        controller = _controller(queue_timeout_seconds=1)
+        first = await controller.acquire(user_id=None, agent_id="a")
+        waiting = asyncio.create_task(controller.acquire(user_id=None, agent_id="a"))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        first.release()
+        return controller.metrics()
+
+    metrics = asyncio.run(scenario())
+    assert metrics["queue_depth"] == 0
+    assert metrics["active_runs"] == 0
+
+
+def test_user_at_its_cap_does_not_hold_up_other_users():
+    async def scenario():
+        controller = _controller(max_concurrent_runs=10, max_runs_per_user=1, queue_timeout_seconds=1)
+        first = await controller.acquire(user_id="u1", agent_id="a")
+        blocked = asyncio.create_task(controller.acquire(user_id="u1", agent_id="a"))
+        await asyncio.sleep(0)
+        assert controller.metrics()["queue_depth"] == 1
+        # u2 has capacity and is admitted at once, ahead of u1's queued run
+        other = await asyncio.wait_for(controller.acquire(user_id="u2", agent_id="a"), 0.01)
+        assert not blocked.done()
+        first.release()
+        second = await blocked
+        for ticket in (other, second):
+            ticket.release()
+        return controller.metrics()
+
+    metrics = asyncio.run(scenario())
+    assert metrics["active_runs"] == 0
+    assert metrics["admitted_after_wait"] == 1
+    assert metrics["rejected_timeout"] == 0
@@ -0,0 +1,107 @@
+import asyncio
+from contextlib import ExitStack
+from dataclasses import dataclass
+
+import pytest
+
+pytest.importorskip("agno")
+
+from agno.agent import Agent  # noqa: E402
+from agno.models.base import Model  # noqa: E402
+from agno.models.response import ModelResponse  # noqa: E402
+
+from api.replay import start_run_stream  # noqa: E402
+from api.routes.agents import chat_response_streamer  # noqa: E402
+from api.settings import api_settings  # noqa: E402
+from api.streaming import RUN_OUTCOMES, cancel_on_disconnect  # noqa: E402
+
+
+class FakeRequest:
+    """A request whose client disconnects once `disconnect` is set."""
+
+    def __init__(self):
+        self.disconnect = asyncio.Event()
+
+    async def receive(self):
+        await self.disconnect.wait()
+        return {"type": "http.disconnect"}
+
+
+@dataclass
+class ToolCallingModel(Model):
+    """Streams a call of `slow_lookup` on the first turn and a text answer on the next ones."""
+
+    id: str = "tool-calling-stub"
+    name: str = "ToolCallingModel"
+    provider: str = "Stub"
+    calls: int = 0
+
+    def invoke(self, *args, **kwargs):
+        raise NotImplementedError
+
+    async def ainvoke(self, *args, **kwargs):
+        raise NotImplementedError
+
+    def invoke_stream(self, *args, **kwargs):
+        raise NotImplementedError
+
+    async def ainvoke_stream(self, messages, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            yield {
+                "tool_calls": [
+                    {"id": "call-1", "type": "function", "function": {"name": "slow_lookup", "arguments": "{}"}}
+                ]
+            }
+        else:
+            yield {"content": "answer"}
+
+    def parse_provider_response(self, response):
+        return ModelResponse(**response)
+
+    def parse_provider_response_delta(self, response):
+        return ModelResponse(role="assistant", **response)
+
+
+def test_disconnect_cancels_the_running_tool_and_the_next_model_call(monkeypatch):
+    # The run outlives the client's connection for the resume grace period, then is cancelled
+    monkeypatch.setattr(api_settings, "stream_resume_grace_seconds", 0.05)
+    monkeypatch.setattr(api_settings, "stream_replay_spill", False)
+
+    async def scenario():
+        tool_started, tool_cancelled = asyncio.Event(), asyncio.Event()
+
+        async def slow_lookup() -> str:
+            """Look something up, slowly."""
+            tool_started.set()
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                tool_cancelled.set()
+                raise
+            return "found"
+
+        model = ToolCallingModel()
+        agent = Agent(model=model, tools=[slow_lookup])
+        request = FakeRequest()
+        cancelled_before = RUN_OUTCOMES["cancelled_on_disconnect"]
+
+        stream = chat_response_streamer(agent, "look it up", model.id, "request")
+        run_stream = start_run_stream("request", "agent", stream, ExitStack())
+
+        async def read():
+            async for _ in cancel_on_disconnect(request, run_stream.subscribe()):
+                pass
+
+        reader = asyncio.create_task(read())
+        await asyncio.wait_for(tool_started.wait(), 5)
+        request.disconnect.set()
+        await asyncio.wait_for(reader, 5)
+        await asyncio.wait_for(run_stream.task, 5)
+        return tool_cancelled.is_set(), model.calls, RUN_OUTCOMES["cancelled_on_disconnect"] - cancelled_before
+
+    tool_cancelled, model_calls, cancelled_runs = asyncio.run(scenario())
+    assert tool_cancelled
+    # The model is not called again with the tool's result
+    assert model_calls == 1
+    assert cancelled_runs == 1
@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("agno")
+pytest.importorskip("openai")
+
+from llm.clients import MODEL_CLIENT_REGISTRY, close_model_clients, get_model  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def empty_registry(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    yield
+    asyncio.run(close_model_clients())
+
+
+def test_models_with_the_same_settings_share_clients():
+    first = get_model("gpt-4.1", base_url="http://first.test/v1")
+    second = get_model("gpt-4.1", base_url="http://first.test/v1")
+    assert first.get_client() is second.get_client()
+    assert first.get_async_client() is second.get_async_client()
+    assert len(MODEL_CLIENT_REGISTRY) == 1
+
+
+def test_models_with_different_endpoints_or_credentials_get_their_own_clients():
+    first = get_model("gpt-4.1", base_url="http://first.test/v1")
+    other_endpoint = get_model("gpt-4.1", base_url="http://second.test/v1")
+    other_key = get_model("gpt-4.1", base_url="http://first.test/v1", api_key="other-key")
+    other_params = get_model("gpt-4.1", base_url="http://first.test/v1", client_params={"default_query": {"a": "1"}})
+    clients = [model.get_client() for model in (first, other_endpoint, other_key, other_params)]
+    assert len({id(client) for client in clients}) == 4
+    assert str(clients[1].base_url) == "http://second.test/v1/"
+    assert clients[2].api_key == "other-key"
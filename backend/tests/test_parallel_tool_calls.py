@@ -0,0 +1,62 @@
+import asyncio
+from dataclasses import dataclass
+
+import pytest
+
+pytest.importorskip("agno")
+
+from agno.agent import Agent  # noqa: E402
+from agno.models.response import ModelResponse  # noqa: E402
+
+from llm.clients import PooledOpenAIChat  # noqa: E402
+
+
+@dataclass
+class FanOutChat(PooledOpenAIChat):
+    """Makes `fan_out` calls of `search` in its first turn, then answers with the results in order."""
+
+    id: str = "fan-out-stub"
+    fan_out: int = 4
+
+    def _respond(self, messages):
+        results = [message.content for message in messages if message.role == "tool"]
+        if results:
+            return {"content": ",".join(results)}
+        calls = [
+            {"id": f"call-{i}", "type": "function", "function": {"name": "search", "arguments": f'{{"n": {i}}}'}}
+            for i in range(self.fan_out)
+        ]
+        return {"tool_calls": calls}
+
+    async def ainvoke(self, messages):
+        return self._respond(messages)
+
+    def parse_provider_response(self, response):
+        return ModelResponse(role="assistant", **response)
+
+
+def test_calls_of_a_turn_run_under_the_cap_and_keep_their_order():
+    async def scenario(runs):
+        running, most_running = 0, 0
+
+        async def search(n: int) -> str:
+            """Search for result `n`; later calls finish first."""
+            nonlocal running, most_running
+            running += 1
+            most_running = max(most_running, running)
+            await asyncio.sleep(0.01 * (4 - n))
+            running -= 1
+            return str(n)
+
+        model = FanOutChat(tool_call_concurrency=2)
+        responses = await asyncio.gather(*(Agent(model=model, tools=[search]).arun("search") for _ in range(runs)))
+        return [response.content for response in responses], most_running, model._tool_call_slots
+
+    contents, most_running, slots = asyncio.run(scenario(runs=1))
+    assert contents == ["0,1,2,3"]
+    assert most_running == 2
+    assert slots == {}
+    # Concurrent runs sharing the model each get the cap for their own turn
+    contents, most_running, _ = asyncio.run(scenario(runs=2))
+    assert contents == ["0,1,2,3", "0,1,2,3"]
+    assert most_running == 4
@@ -0,0 +1,28 @@
+from api import profiling
+from api.profiling import RequestProfile
+
+
+def test_only_one_profile_runs_at_a_time(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling.api_settings, "profiling_dir", str(tmp_path))
+    first = RequestProfile("first").start()
+    assert first is not None
+    try:
+        assert RequestProfile("second").start() is None
+    finally:
+        first.stop()
+    third = RequestProfile("third").start()
+    assert third is not None
+    assert third.stop() is not None
+
+
+def test_failing_profiler_is_skipped_and_releases_the_slot(monkeypatch):
+    profile = RequestProfile("failing")
+
+    class FailingProfiler:
+        def start(self):
+            raise ValueError("Another profiling tool is already active")
+
+    monkeypatch.setattr(profile, "_profiler", FailingProfiler())
+    assert profile.start() is None
+    assert profile.stop() is None
+    assert not profiling._active_lock.locked()
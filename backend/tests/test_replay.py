@@ -0,0 +1,105 @@
+import asyncio
+import json
+from contextlib import ExitStack
+
+from api.replay import RunStream
+from api.settings import api_settings
+
+
+class MemorySpill:
+    """A ReplaySpill keeping the events in a dict."""
+
+    def __init__(self):
+        self.events = {}
+
+    def write(self, request_id, agent_id, events):
+        self.events.update(events)
+
+    def read(self, request_id, from_seq, to_seq=None):
+        seqs = sorted(seq for seq in self.events if seq >= from_seq and (to_seq is None or seq < to_seq))
+        return "agent", [(seq, self.events[seq]) for seq in seqs]
+
+    def prune(self, older_than_seconds):
+        pass
+
+
+async def _events(count: int):
+    for i in range(count):
+        yield f"data: {i}\n\n"
+        await asyncio.sleep(0)
+
+
+def _seqs(events):
+    return [int(event.split("\n")[0][len("id: ") :]) for event in events if event.startswith("id: ")]
+
+
+def _run(monkeypatch, count, max_events, spill=None, after_seq=None, slow_client=False):
+    monkeypatch.setattr(api_settings, "stream_replay_max_events", max_events)
+
+    async def scenario():
+        run_stream = RunStream("request", "agent", spill=spill, cancel_when_abandoned=False)
+        run_stream.start(_events(count), ExitStack())
+        received = []
+        async for event in run_stream.subscribe(after_seq):
+            received.append(event)
+            if slow_client:
+                # Let the producer evict the events this client has yet to read
+                await asyncio.sleep(0.01)
+        await run_stream.task
+        return received
+
+    return asyncio.run(scenario())
+
+
+def test_subscriber_receives_every_event(monkeypatch):
+    assert _seqs(_run(monkeypatch, count=20, max_events=100)) == list(range(20))
+
+
+def test_resume_replays_after_last_event_id(monkeypatch):
+    async def finished_run():
+        run_stream = RunStream("request", "agent", spill=None, cancel_when_abandoned=False)
+        run_stream.start(_events(10), ExitStack())
+        await run_stream.task
+        return [event async for event in run_stream.subscribe(after_seq=6)]
+
+    monkeypatch.setattr(api_settings, "stream_replay_max_events", 100)
+    assert _seqs(asyncio.run(finished_run())) == [7, 8, 9]
+
+
+def test_slow_subscriber_without_spill_gets_replay_unavailable(monkeypatch):
+    received = _run(monkeypatch, count=50, max_events=5, slow_client=True)
+    assert received[-1].startswith("event: error\n")
+    error = json.loads(received[-1].split("data: ", 1)[1])
+    assert error["error"] == "replay_unavailable"
+    seqs = _seqs(received)
+    assert seqs == list(range(len(seqs)))
+
+
+def test_slow_subscriber_reads_evicted_events_from_the_spill(monkeypatch):
+    received = _run(monkeypatch, count=50, max_events=5, spill=MemorySpill(), slow_client=True)
+    assert _seqs(received) == list(range(50))
+
+
+def test_run_nobody_subscribes_to_is_cancelled_after_the_grace_period(monkeypatch):
+    monkeypatch.setattr(api_settings, "stream_resume_grace_seconds", 0.05)
+
+    async def endless():
+        while True:
+            yield "data: tick\n\n"
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        abandoned = RunStream("abandoned", "agent", spill=MemorySpill())
+        abandoned.start(endless(), ExitStack())
+        followed = RunStream("followed", "agent", spill=MemorySpill())
+        followed.start(endless(), ExitStack())
+        subscription = followed.subscribe()
+        await subscription.__anext__()
+        await asyncio.sleep(0.2)
+        done = abandoned.done, followed.done
+        await subscription.aclose()
+        followed.task.cancel()
+        await followed.task
+        return done
+
+    assert asyncio.run(scenario()) == (True, False)
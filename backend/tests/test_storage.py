@@ -0,0 +1,40 @@
+import pytest
+
+pytest.importorskip("agno")
+
+from db.storage import ZLIB_JSON, decode_payload, encode_payload, strip_tool_outputs  # noqa: E402
+
+SESSION = {
+    "memory": {"runs": [{"messages": [{"role": "tool", "content": "x" * 100}, {"role": "user", "content": "hi"}]}]},
+    "agent_data": {"name": "web_agent", "tools": ["search"]},
+    "extra_data": None,
+}
+
+
+def test_payload_round_trips():
+    assert decode_payload(encode_payload(SESSION, level=3)) == SESSION
+
+
+def test_payload_read_from_a_memoryview():
+    assert decode_payload(memoryview(encode_payload(SESSION, level=3))) == SESSION
+
+
+def test_zlib_payload_is_decoded(monkeypatch):
+    import db.storage
+
+    monkeypatch.setattr(db.storage, "zstandard", None)
+    payload = encode_payload(SESSION, level=3)
+    assert payload[:1] == ZLIB_JSON
+    assert decode_payload(payload) == SESSION
+
+
+def test_unknown_payload_encoding_is_rejected():
+    with pytest.raises(ValueError):
+        decode_payload(b"\x7f{}")
+
+
+def test_strip_tool_outputs_cuts_only_tool_messages():
+    stripped = strip_tool_outputs(SESSION["memory"], max_chars=10)
+    tool, user = stripped["runs"][0]["messages"]
+    assert tool["content"].startswith("x" * 10 + "...")
+    assert user["content"] == "hi"
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from api.streaming import ClientDisconnected, cancel_on_disconnect, run_until_disconnect
+
+
+class FakeRequest:
+    """A request whose client disconnects once `disconnect` is set."""
+
+    def __init__(self):
+        self.disconnect = asyncio.Event()
+
+    async def receive(self):
+        await self.disconnect.wait()
+        return {"type": "http.disconnect"}
+
+
+def test_run_until_disconnect_cancels_the_run():
+    async def scenario():
+        request = FakeRequest()
+        run_cancelled = asyncio.Event()
+
+        async def run():
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                run_cancelled.set()
+                raise
+
+        waiting = asyncio.create_task(run_until_disconnect(request, run()))
+        await asyncio.sleep(0)
+        request.disconnect.set()
+        with pytest.raises(ClientDisconnected):
+            await waiting
+        return run_cancelled.is_set()
+
+    assert asyncio.run(scenario())
+
+
+def test_run_until_disconnect_returns_the_result():
+    async def scenario():
+        async def run():
+            return "done"
+
+        return await run_until_disconnect(FakeRequest(), run())
+
+    assert asyncio.run(scenario()) == "done"
+
+
+def test_cancel_on_disconnect_cancels_the_stream():
+    async def scenario():
+        request = FakeRequest()
+        stream_cancelled = asyncio.Event()
+
+        async def stream():
+            try:
+                yield "first"
+                await asyncio.sleep(60)
+                yield "never sent"
+            except asyncio.CancelledError:
+                stream_cancelled.set()
+                raise
+
+        chunks = []
+        async for chunk in cancel_on_disconnect(request, stream()):
+            chunks.append(chunk)
+            request.disconnect.set()
+        return chunks, stream_cancelled.is_set()
+
+    chunks, cancelled = asyncio.run(scenario())
+    assert chunks == ["first"]
+    assert cancelled
@@ -0,0 +1,48 @@
+import pytest
+
+pytest.importorskip("agno")
+
+from teams.streaming import ToolCallTracker  # noqa: E402
+
+
+def _tool(call_id, content=None, **extra):
+    tool = {"tool_call_id": call_id, "tool_name": "search", "tool_args": {"query": call_id}, **extra}
+    if content is not None:
+        tool["content"] = content
+    return tool
+
+
+def test_each_call_is_reported_once_when_it_starts():
+    tracker = ToolCallTracker()
+    assert [t["tool_call_id"] for t in tracker.started([_tool("a")])] == ["a"]
+    # agno sends the run's cumulative tool list with every event
+    assert [t["tool_call_id"] for t in tracker.started([_tool("a"), _tool("b")])] == ["b"]
+    assert tracker.started([_tool("a"), _tool("b")]) == []
+
+
+def test_each_call_is_reported_once_when_it_completes():
+    tracker = ToolCallTracker()
+    tracker.started([_tool("a"), _tool("b")])
+    completed = tracker.completed([_tool("a", content="found"), _tool("b")])
+    assert completed == [
+        {
+            "tool_call_id": "a",
+            "tool_name": "search",
+            "tool_args": {"query": "a"},
+            "result": "found",
+            "tool_call_error": None,
+        }
+    ]
+    assert [t["tool_call_id"] for t in tracker.completed([_tool("a", content="found"), _tool("b", "x")])] == ["b"]
+
+
+def test_completed_call_without_a_started_event_is_not_reported_as_started():
+    tracker = ToolCallTracker()
+    assert len(tracker.completed([_tool("a", content="found")])) == 1
+    assert tracker.started([_tool("a", content="found")]) == []
+
+
+def test_long_results_are_cut_and_calls_without_an_id_are_ignored():
+    tracker = ToolCallTracker()
+    (completed,) = tracker.completed([_tool("a", content="x" * 5000), {"tool_name": "search", "content": "y"}])
+    assert completed["result"] == "x" * 1000 + "..."
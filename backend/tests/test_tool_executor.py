@@ -0,0 +1,76 @@
+import asyncio
+import threading
+from dataclasses import dataclass, field
+from typing import List
+
+import pytest
+
+pytest.importorskip("agno")
+
+from agno.agent import Agent  # noqa: E402
+from agno.models.response import ModelResponse  # noqa: E402
+
+from llm.clients import PooledOpenAIChat  # noqa: E402
+from tools.base.builder import BaseToolBuilder, ToolConfig  # noqa: E402
+from tools.base.executor import tool_executor  # noqa: E402
+from tools.base.memo import ToolCallMemo  # noqa: E402
+
+
+@dataclass
+class LookupCallingChat(PooledOpenAIChat):
+    """Calls `lookup` on the first turn, then answers with the content of the tool result it was given."""
+
+    id: str = "lookup-calling-stub"
+    tool_results: List[str] = field(default_factory=list)
+
+    def _respond(self, messages):
+        if messages[-1].role == "tool":
+            self.tool_results.append(messages[-1].content)
+            return {"content": "done"}
+        arguments = '{"query": "agno"}'
+        return {
+            "tool_calls": [{"id": "call-1", "type": "function", "function": {"name": "lookup", "arguments": arguments}}]
+        }
+
+    def invoke(self, messages):
+        return self._respond(messages)
+
+    async def ainvoke(self, messages):
+        return self._respond(messages)
+
+    def parse_provider_response(self, response):
+        return ModelResponse(role="assistant", **response)
+
+
+def _build_agent():
+    threads: List[str] = []
+
+    def lookup(query: str) -> str:
+        """Look `query` up."""
+        threads.append(threading.current_thread().name)
+        return f"found {query}"
+
+    tools = BaseToolBuilder(ToolConfig(tool_id="lookup", name="Lookup", tool_functions=[lookup])).build()
+    memo = ToolCallMemo(ttl_seconds=60)
+    model = LookupCallingChat()
+    agent = Agent(model=model, tools=memo.memoize(tools))
+    memo.attach(agent)
+    return agent, model, threads
+
+
+def test_sync_run_calls_the_built_tool_directly():
+    agent, model, threads = _build_agent()
+    response = agent.run("look agno up")
+    assert response.content == "done"
+    assert model.tool_results == ["found agno"]
+    assert threads == [threading.current_thread().name]
+
+
+def test_async_run_calls_the_built_tool_on_the_tool_executor():
+    agent, model, threads = _build_agent()
+    calls_before = tool_executor.metrics()["tools"].get("lookup", {}).get("calls", 0)
+    response = asyncio.run(agent.arun("look agno up"))
+    assert response.content == "done"
+    assert model.tool_results == ["found agno"]
+    assert len(threads) == 1 and threads[0].startswith("tool")
+    assert tool_executor.metrics()["tools"]["lookup"]["calls"] == calls_before + 1